@@ -6,6 +6,12 @@ from base import TestBase
 class ArgsTest(TestBase):
     snippet_dir = "args"
 
+    def test_alias_call(self):
+        self.validate_snippet(self.get_snippet_path("alias_call"))
+
+    def test_alias_value_call(self):
+        self.validate_snippet(self.get_snippet_path("alias_value_call"))
+
     def test_assigned_call(self):
         self.validate_snippet(self.get_snippet_path("assigned_call"))
 
@@ -21,5 +27,8 @@ class ArgsTest(TestBase):
     def test_nested_call(self):
         self.validate_snippet(self.get_snippet_path("nested_call"))
 
+    def test_param_alias_call(self):
+        self.validate_snippet(self.get_snippet_path("param_alias_call"))
+
     def test_param_call(self):
         self.validate_snippet(self.get_snippet_path("param_call"))
@@ -0,0 +1,16 @@
+def g(x):
+    x()
+
+def h(y):
+    y()
+
+def callback():
+    pass
+
+if c:
+    f = g
+else:
+    f = h
+
+alias = f
+alias(callback)
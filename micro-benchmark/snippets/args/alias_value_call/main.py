@@ -0,0 +1,22 @@
+def g(x):
+    x()
+
+def h(y):
+    y()
+
+def first():
+    pass
+
+def second():
+    pass
+
+if c:
+    f = g
+else:
+    f = h
+
+value = first
+f(value)
+alias = f
+alias(second)
+value()
@@ -0,0 +1,16 @@
+def first():
+    pass
+
+def second():
+    pass
+
+def take(fn):
+    fn(first)
+    alias = fn
+    alias(second)
+
+def call(x):
+    x()
+
+take(call)
+first()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+#
+# Compares writing and loading the synthetic call graph of fasten.py
+# in the simple JSON format and in the binary format.
+#
+# usage: ./performance-benchmark/binary.py [--functions 100000]
+#
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(FILE_DIR))
+
+from fasten import SyntheticGenerator  # noqa: E402
+
+from pycg.formats import Binary, BinaryCallGraph, Simple  # noqa: E402
+
+
+class OutputGenerator(SyntheticGenerator):
+    def output(self):
+        output = {}
+        for modname, mod in self.internal_mods.items():
+            for name in mod["methods"]:
+                output[name] = set()
+        for modname, mod in self.external_mods.items():
+            for name in mod["methods"]:
+                output[name] = set()
+        for src, dst in self.edges:
+            output[src].add(dst)
+        return output
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print("{:<24} {:.3f} s".format(label, time.perf_counter() - start))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--functions", type=int, default=100000)
+    parser.add_argument("--per-module", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    generator = OutputGenerator(args.functions, args.per_module, args.calls)
+    names = random.Random(0).sample(generator.functions, args.lookups)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "cg.json")
+        binary_path = os.path.join(tmp_dir, "cg.bin")
+
+        def write_json():
+            with open(json_path, "w") as f:
+                Simple(generator).write(f)
+
+        def write_binary():
+            with open(binary_path, "wb") as f:
+                Binary(generator).write(f)
+
+        def load_json():
+            with open(json_path) as f:
+                return json.load(f)
+
+        timed("json write", write_json)
+        timed("binary write", write_binary)
+        print(
+            "{:<24} {} / {} bytes".format(
+                "json / binary size",
+                os.path.getsize(json_path),
+                os.path.getsize(binary_path),
+            )
+        )
+
+        output = timed("json load", load_json)
+        timed("json lookups", lambda: [output[name] for name in names])
+
+        graph = timed("binary load", lambda: BinaryCallGraph.open(binary_path))
+        timed("binary lookups", lambda: [graph.get_callees(name) for name in names])
+        timed("binary load everything", graph.get)
+        graph.close()
+
+
+if __name__ == "__main__":
+    main()
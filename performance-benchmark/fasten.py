@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+#
+# Times the generation of the FASTEN format for a synthetic call graph,
+# without analyzing any code. Each module holds a class and `--per-module`
+# functions, every function calls `--calls` random functions, and every
+# module calls a function of an external module.
+#
+# usage: ./performance-benchmark/fasten.py [--functions 100000]
+#
+import argparse
+import os
+import random
+import sys
+import time
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(FILE_DIR))
+
+from pycg.formats import Fasten  # noqa: E402
+
+
+class SyntheticGenerator(object):
+    def __init__(self, functions, per_module, calls, externals=10):
+        rand = random.Random(0)
+
+        self.internal_mods = {}
+        self.classes = {}
+        self.functions = []
+        for idx in range((functions + per_module - 1) // per_module):
+            modname = "pkg.mod{}".format(idx)
+            clsname = modname + ".Cls"
+            methods = {
+                modname: dict(name=modname, first=1, last=per_module + 2),
+                clsname: dict(name=clsname, first=1, last=2),
+            }
+            for fn in range(min(per_module, functions - len(self.functions))):
+                name = "{}.func{}".format(modname, fn)
+                methods[name] = dict(name=name, first=fn + 2, last=fn + 2)
+                self.functions.append(name)
+
+            self.internal_mods[modname] = {
+                "filename": "pkg/mod{}.py".format(idx),
+                "methods": methods,
+            }
+            self.classes[clsname] = {
+                "module": modname,
+                "mro": [clsname, "pkg.mod0.Cls", "external0.Base"],
+            }
+
+        self.external_mods = {}
+        for idx in range(externals):
+            modname = "external{}".format(idx)
+            self.external_mods[modname] = {
+                "filename": None,
+                "methods": {
+                    modname: dict(name=modname, first=None, last=None),
+                    modname + ".func": dict(
+                        name=modname + ".func", first=None, last=None
+                    ),
+                },
+            }
+
+        self.edges = []
+        for name in self.functions:
+            for _ in range(calls):
+                self.edges.append([name, rand.choice(self.functions)])
+        for idx, modname in enumerate(self.internal_mods):
+            self.edges.append([modname, "external{}.func".format(idx % externals)])
+
+    def output_internal_mods(self):
+        return self.internal_mods
+
+    def output_external_mods(self):
+        return self.external_mods
+
+    def output_classes(self):
+        return self.classes
+
+    def output_edges(self):
+        return self.edges
+
+    def output_functions(self):
+        return self.functions
+
+
+class NullWriter(object):
+    def write(self, data):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--functions", type=int, default=100000)
+    parser.add_argument("--per-module", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=3)
+    args = parser.parse_args()
+
+    generator = SyntheticGenerator(args.functions, args.per_module, args.calls)
+    print(
+        "{} functions, {} modules, {} edges".format(
+            len(generator.functions),
+            len(generator.internal_mods),
+            len(generator.edges),
+        )
+    )
+
+    def get_formatter():
+        return Fasten(generator, "", "product", "PyPI", "1.0", 0)
+
+    start = time.perf_counter()
+    output = get_formatter().generate()
+    print("generate: {:.3f} s".format(time.perf_counter() - start))
+    print(
+        "{} nodes, {} internal calls, {} external calls".format(
+            output["nodes"],
+            len(output["graph"]["internalCalls"]),
+            len(output["graph"]["externalCalls"]),
+        )
+    )
+
+    start = time.perf_counter()
+    get_formatter().write(NullWriter())
+    print("write:    {:.3f} s".format(time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+#
+# Reports the memory used per definition after analyzing a package.
+# The namespace strings are shared among the definitions,
+# so only the objects holding them are accounted for.
+#
+# usage: ./performance-benchmark/memory.py [package_dir]
+#
+import argparse
+import glob
+import os
+import sys
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(FILE_DIR))
+
+from pycg import utils  # noqa: E402
+from pycg.pycg import CallGraphGenerator  # noqa: E402
+
+
+def object_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def container_size(obj):
+    if isinstance(obj, (str, int)) or obj is None:
+        return 0
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for value in obj.values():
+            size += container_size(value)
+    elif isinstance(obj, (set, frozenset, list, tuple)):
+        for value in obj:
+            size += container_size(value)
+    return size
+
+
+def pointer_size(pointer):
+    size = object_size(pointer) + container_size(pointer.get())
+    if hasattr(pointer, "get_args"):
+        # shared empty maps are not owned by the pointer
+        for attr in ("args", "pos_to_name", "name_to_pos"):
+            value = getattr(pointer, attr)
+            if isinstance(value, dict):
+                size += container_size(value)
+    return size
+
+
+def definition_size(defi):
+    size = object_size(defi)
+    if hasattr(defi, "__dict__") and "points_to" in defi.__dict__:
+        size += sys.getsizeof(defi.__dict__["points_to"])
+    size += pointer_size(defi.get_lit_pointer())
+    size += pointer_size(defi.get_name_pointer())
+    return size
+
+
+def scope_size(scope):
+    return object_size(scope) + sys.getsizeof(scope.get_defs())
+
+
+def class_size(cls):
+    return object_size(cls) + container_size(cls.get_mro())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "package",
+        nargs="?",
+        help="Package to analyze, defaults to the pycg package",
+        default=os.path.join(os.path.dirname(FILE_DIR), "pycg"),
+    )
+    args = parser.parse_args()
+
+    package = os.path.abspath(args.package)
+    entry_points = sorted(
+        glob.glob(os.path.join(package, "**", "*.py"), recursive=True)
+    )
+    cg = CallGraphGenerator(
+        entry_points, os.path.dirname(package), -1, utils.constants.CALL_GRAPH_OP
+    )
+    cg.analyze()
+
+    defs = cg.def_manager.get_defs().values()
+    scopes = cg.scope_manager.get_scopes().values()
+    classes = cg.class_manager.get_classes().values()
+    for name, items, size in [
+        ("definitions", defs, definition_size),
+        ("scopes", scopes, scope_size),
+        ("classes", classes, class_size),
+    ]:
+        total = sum(size(item) for item in items)
+        print(
+            "{:<12} {:>8} objects {:>12} bytes {:>8.1f} bytes/object".format(
+                name, len(items), total, total / max(len(items), 1)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
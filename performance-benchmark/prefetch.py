@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+#
+# Times the analysis of a package with and without prefetching its modules
+# in background threads. A delay of `--latency` seconds is added to every
+# read of a source file, as on a network mounted checkout.
+#
+# usage: ./performance-benchmark/prefetch.py [package_dir] [--latency 0.01]
+#            [--threads 4]
+#
+import argparse
+import glob
+import os
+import sys
+import time
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(FILE_DIR))
+
+from pycg import utils  # noqa: E402
+from pycg.machinery import sources  # noqa: E402
+from pycg.pycg import CallGraphGenerator  # noqa: E402
+
+
+def add_latency(latency):
+    read_source = sources.read_source
+
+    def slow_read_source(filename):
+        time.sleep(latency)
+        return read_source(filename)
+
+    sources.read_source = slow_read_source
+
+
+def analyze(package, prefetch):
+    entry_points = sorted(
+        glob.glob(os.path.join(package, "**", "*.py"), recursive=True)
+    )
+    cg = CallGraphGenerator(
+        entry_points,
+        os.path.dirname(package),
+        -1,
+        utils.constants.CALL_GRAPH_OP,
+        prefetch=prefetch,
+    )
+    start = time.perf_counter()
+    cg.analyze()
+    total = time.perf_counter() - start
+
+    stats = cg.get_stats()
+    preprocess = sum(
+        phase["wall_time"] for phase in stats["phases"] if phase["name"] == "preprocess"
+    )
+    return total, preprocess, stats["counters"]["sources_prefetched"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "package",
+        nargs="?",
+        default=os.path.join(os.path.dirname(FILE_DIR), "pycg"),
+    )
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    add_latency(args.latency)
+    package = os.path.abspath(args.package)
+    for prefetch in [0, args.threads]:
+        total, preprocess, prefetched = analyze(package, prefetch)
+        print(
+            "prefetch {:>2}: total {:.3f} s, preprocess {:.3f} s, {} prefetched".format(
+                prefetch, total, preprocess, prefetched
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+#
+# Measures how the analysis scales along each dimension of the synthetic
+# packages generated by synthetic.py. One dimension is grown at a time
+# while the others keep their default size. Each point is analyzed in
+# a new process, so that the peak memory is that of the point alone,
+# and the time of the best of `--repeat` runs is kept.
+#
+# The results are written as JSON. Given the results of a previous run
+# with --baseline, points that got slower by more than --max-slowdown
+# are reported and the script exits with a non-zero status.
+#
+# usage: ./performance-benchmark/scaling.py [-o results.json]
+#            [--dimensions modules,depth] [--sizes 10,20,40]
+#            [--baseline previous.json]
+#
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(FILE_DIR))
+
+from synthetic import DEFAULTS, DIMENSIONS, generate_package  # noqa: E402
+
+from pycg import utils  # noqa: E402
+from pycg.pycg import CallGraphGenerator  # noqa: E402
+
+SIZES = {
+    "modules": [10, 20, 40, 80],
+    "depth": [10, 20, 40, 80],
+    "classes": [10, 20, 40, 80],
+    "fanout": [10, 20, 40, 80],
+    "literals": [10, 20, 40, 80],
+}
+
+# differences below this many seconds are considered noise
+NOISE = 0.05
+
+
+def analyze(output_dir):
+    """Analyzes the package under `output_dir` and returns the point's results"""
+    entry_points = sorted(
+        glob.glob(os.path.join(output_dir, "**", "*.py"), recursive=True)
+    )
+    cg = CallGraphGenerator(entry_points, output_dir, -1, utils.constants.CALL_GRAPH_OP)
+    cg.analyze()
+    stats = cg.get_stats()
+
+    phases = {}
+    for phase in stats["phases"]:
+        phases[phase["name"]] = phases.get(phase["name"], 0.0) + phase["wall_time"]
+
+    counters = stats["counters"]
+    return {
+        "wall_time": stats["total"]["wall_time"],
+        "cpu_time": stats["total"]["cpu_time"],
+        "peak_rss": stats["total"]["peak_rss"],
+        "phases": phases,
+        "closure_time": counters["closure_time"],
+        "iterations": counters["iterations"],
+        "definitions": counters["definitions"],
+        "edges": counters["edges"],
+    }
+
+
+def run_point(sizes, repeat):
+    with tempfile.TemporaryDirectory() as output_dir:
+        paths = generate_package(output_dir, *[sizes[d] for d in DIMENSIONS])
+        lines = 0
+        for path in paths:
+            with open(path) as f:
+                lines += len(f.readlines())
+
+        best = None
+        for _ in range(repeat):
+            output = subprocess.check_output(
+                [sys.executable, os.path.abspath(__file__), "--analyze", output_dir]
+            )
+            result = json.loads(output)
+            if best is None or result["wall_time"] < best["wall_time"]:
+                best = result
+
+    best["lines"] = lines
+    return best
+
+
+def compare(points, baseline, max_slowdown):
+    """Returns the points that got slower than in the baseline"""
+    previous = {(p["dimension"], p["size"]): p for p in baseline["points"]}
+    regressions = []
+    for point in points:
+        prev = previous.get((point["dimension"], point["size"]))
+        if not prev:
+            continue
+        if (
+            point["wall_time"] > prev["wall_time"] * max_slowdown
+            and point["wall_time"] - prev["wall_time"] > NOISE
+        ):
+            regressions.append((point, prev))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-o", "--output", help="Output path", default="scaling-results.json"
+    )
+    parser.add_argument(
+        "--dimensions",
+        help="Comma separated dimensions to grow, defaults to all of them",
+        default=",".join(DIMENSIONS),
+    )
+    parser.add_argument(
+        "--sizes",
+        help="Comma separated sizes of each dimension, overriding the defaults",
+        default=None,
+    )
+    parser.add_argument("--repeat", type=int, help="Runs for each point", default=1)
+    parser.add_argument(
+        "--baseline", help="Results of a previous run to compare to", default=None
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        help="Slowdown factor over the baseline reported as a regression",
+        default=1.5,
+    )
+    parser.add_argument("--analyze", help=argparse.SUPPRESS, default=None)
+    args = parser.parse_args()
+
+    if args.analyze:
+        print(json.dumps(analyze(args.analyze)))
+        return
+
+    dimensions = args.dimensions.split(",")
+    for dimension in dimensions:
+        if dimension not in DIMENSIONS:
+            parser.error("unknown dimension: " + dimension)
+
+    points = []
+    for dimension in dimensions:
+        if args.sizes:
+            sizes = [int(size) for size in args.sizes.split(",")]
+        else:
+            sizes = SIZES[dimension]
+
+        for size in sizes:
+            point_sizes = dict(DEFAULTS)
+            point_sizes[dimension] = size
+            point = {"dimension": dimension, "size": size}
+            point.update(run_point(point_sizes, args.repeat))
+            points.append(point)
+            print(
+                "{:<10} {:>6} {:>8} lines {:>8.3f} s {:>8.1f} MB {:>4} iter".format(
+                    dimension,
+                    size,
+                    point["lines"],
+                    point["wall_time"],
+                    (point["peak_rss"] or 0) / 2**20,
+                    point["iterations"],
+                )
+            )
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "defaults": DEFAULTS,
+        "points": points,
+    }
+    with open(args.output, "w") as f:
+        f.write(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(points, baseline, args.max_slowdown)
+        for point, prev in regressions:
+            print(
+                "regression: {} {}: {:.3f} s, was {:.3f} s".format(
+                    point["dimension"],
+                    point["size"],
+                    point["wall_time"],
+                    prev["wall_time"],
+                )
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
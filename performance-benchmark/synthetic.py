@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#
+# Generates a synthetic package whose size grows along the dimensions
+# that drive the cost of the analysis:
+#   modules   number of modules, each importing the previous one
+#   depth     length of the call chain in each module
+#   classes   depth of the class hierarchy in each module
+#   fanout    number of functions passed to the same higher-order function
+#   literals  number of items in the dict and list literals of each module
+#
+# usage: ./performance-benchmark/synthetic.py output_dir [--modules N] ...
+#
+import argparse
+import os
+
+PACKAGE = "synthetic"
+
+DIMENSIONS = ["modules", "depth", "classes", "fanout", "literals"]
+
+DEFAULTS = {"modules": 5, "depth": 5, "classes": 5, "fanout": 5, "literals": 5}
+
+
+def generate_module(idx, depth, classes, fanout, literals):
+    lines = []
+    if idx > 0:
+        lines.append("from {} import mod{}".format(PACKAGE, idx - 1))
+        lines.append("")
+
+    # call chain, ending in the previous module
+    for i in range(depth):
+        lines.append("def chain{}(x):".format(i))
+        if i < depth - 1:
+            lines.append("    return chain{}(x)".format(i + 1))
+        elif idx > 0:
+            lines.append("    return mod{}.entry(x)".format(idx - 1))
+        else:
+            lines.append("    return x")
+        lines.append("")
+    lines.append("def entry(x):")
+    lines.append("    return chain0(x)" if depth else "    return x")
+    lines.append("")
+
+    # class hierarchy, each method calling the overridden one
+    for i in range(classes):
+        parent = "(Base{})".format(i - 1) if i else ""
+        lines.append("class Base{}{}:".format(i, parent))
+        lines.append("    def method(self, x):")
+        if i:
+            lines.append("        return super().method(x)")
+        else:
+            lines.append("        return entry(x)")
+        lines.append("")
+
+    # higher order functions
+    for i in range(fanout):
+        lines.append("def handler{}(x):".format(i))
+        lines.append("    return x")
+        lines.append("")
+    lines.append("def apply(func, x):")
+    lines.append("    return func(x)")
+    lines.append("")
+    lines.append("def dispatch(x):")
+    for i in range(fanout):
+        lines.append("    apply(handler{}, x)".format(i))
+    lines.append("    return x")
+    lines.append("")
+
+    # literals holding functions
+    handlers = [
+        "handler{}".format(i % fanout) if fanout else "entry" for i in range(literals)
+    ]
+    lines.append(
+        "table = {"
+        + ", ".join('"key{}": {}'.format(i, h) for i, h in enumerate(handlers))
+        + "}"
+    )
+    lines.append("items = [" + ", ".join(handlers) + "]")
+    lines.append("")
+    lines.append("def lookup(x):")
+    for i in range(literals):
+        lines.append('    table["key{}"](x)'.format(i))
+        lines.append("    items[{}](x)".format(i))
+    lines.append("    return x")
+    lines.append("")
+
+    if classes:
+        lines.append("Base{}().method(1)".format(classes - 1))
+    lines.append("dispatch(1)")
+    lines.append("lookup(1)")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def generate_package(output_dir, modules, depth, classes, fanout, literals):
+    """
+    Writes the synthetic package under `output_dir`
+    and returns the paths of its modules
+    """
+    pkg_dir = os.path.join(output_dir, PACKAGE)
+    os.makedirs(pkg_dir, exist_ok=True)
+
+    paths = [os.path.join(pkg_dir, "__init__.py")]
+    with open(paths[0], "w") as f:
+        f.write("")
+
+    for idx in range(modules):
+        path = os.path.join(pkg_dir, "mod{}.py".format(idx))
+        with open(path, "w") as f:
+            f.write(generate_module(idx, depth, classes, fanout, literals))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output_dir", help="Directory the package is written to")
+    for dimension in DIMENSIONS:
+        parser.add_argument("--" + dimension, type=int, default=DEFAULTS[dimension])
+    args = parser.parse_args()
+
+    paths = generate_package(
+        args.output_dir, *[getattr(args, dimension) for dimension in DIMENSIONS]
+    )
+    print("\n".join(paths))
+
+
+if __name__ == "__main__":
+    main()
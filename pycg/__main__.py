@@ -1,12 +1,381 @@
 import argparse
+import gzip
 import json
+import os
+import sys
+import time
+from contextlib import contextmanager
 
 from pycg import formats
+from pycg.batch import (
+    STATUSES,
+    BatchError,
+    BatchRunner,
+    get_summary,
+    load_manifest,
+)
+from pycg.formats.base import write_json
 from pycg.pycg import CallGraphGenerator
-from pycg.utils.constants import CALL_GRAPH_OP, KEY_ERR_OP
+from pycg.server import AnalysisServer, Client, ServerError, serve
+from pycg.shards import ShardedAnalysis
+from pycg.utils.constants import CALL_GRAPH_OP, KEY_ERR_OP, MAX_EXTERNAL_DEPTH
 
 
-def main():
+@contextmanager
+def open_output(path, compress=False, binary=False):
+    """Opens `path`, or stdout if no path is given, for writing the output"""
+    if compress:
+        with gzip.open(path or sys.stdout.buffer, "wb" if binary else "wt") as f:
+            yield f
+    elif path:
+        with open(path, "wb" if binary else "w+") as f:
+            yield f
+    elif binary:
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+    else:
+        yield sys.stdout
+        sys.stdout.write("\n")
+
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="pycg serve",
+        description=("Keep the analysis in memory and answer queries on a Unix socket"),
+    )
+    parser.add_argument("entry_point", nargs="*", help="Entry points to be processed")
+    parser.add_argument("--socket", help="Path of the Unix socket", required=True)
+    parser.add_argument(
+        "--package", help="Package containing the code to be analyzed", default=None
+    )
+    parser.add_argument(
+        "--max-iter",
+        type=int,
+        help=(
+            "Maximum number of iterations through source code. "
+            "If not specified a fix-point iteration will be performed."
+        ),
+        default=-1,
+    )
+    parser.add_argument(
+        "--max-cached-trees",
+        type=int,
+        help=(
+            "Maximum number of parsed source files kept in memory. "
+            "If not specified every parsed file is kept."
+        ),
+        default=None,
+    )
+    args = parser.parse_args(argv)
+
+    analysis = AnalysisServer(
+        args.entry_point,
+        args.package,
+        max_iter=args.max_iter,
+        max_trees=args.max_cached_trees,
+    )
+    try:
+        serve(args.socket, analysis)
+    except ServerError as e:
+        parser.exit(1, "pycg serve: {}\n".format(e))
+
+
+def query_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="pycg query", description="Send a request to a running pycg serve"
+    )
+    parser.add_argument("--socket", help="Path of the Unix socket", required=True)
+    parser.add_argument(
+        "command",
+        choices=[
+            "ping",
+            "changed",
+            "callees",
+            "callers",
+            "reachable",
+            "reaching",
+            "path",
+            "graph",
+            "stats",
+            "shutdown",
+        ],
+        help="Request to send",
+    )
+    parser.add_argument(
+        "args",
+        nargs="*",
+        help=(
+            "Changed files, the node to find the calls of, or the source "
+            "and target nodes of a path"
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    kwargs = {}
+    if args.command == "changed":
+        kwargs["files"] = [os.path.abspath(f) for f in args.args]
+    elif args.command in ("callees", "callers", "reachable", "reaching"):
+        if len(args.args) != 1:
+            parser.error("{} expects a single node".format(args.command))
+        kwargs["name"] = args.args[0]
+    elif args.command == "path":
+        if len(args.args) != 2:
+            parser.error("path expects a source and a target node")
+        kwargs["source"], kwargs["target"] = args.args
+
+    try:
+        with Client(args.socket) as client:
+            result = client.request(args.command, **kwargs)
+    except (OSError, ServerError) as e:
+        parser.exit(1, "pycg query: {}\n".format(e))
+    print(json.dumps(result, indent=2))
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="pycg batch",
+        description="Analyze the packages of a manifest in a pool of workers",
+    )
+    parser.add_argument(
+        "manifest",
+        help=(
+            "File with a JSON object per line, holding the package directory, "
+            "entry points and FASTEN metadata of a package"
+        ),
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="Directory the call graphs and the summary are written to",
+        required=True,
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Number of worker processes", default=1
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds after which the analysis of a package is stopped",
+        default=None,
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help=(
+            "Seconds after which the fix-point iteration of a package stops "
+            "and its call graph is built from the state reached"
+        ),
+        default=None,
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        help="Maximum address space of each worker, in megabytes",
+        default=None,
+    )
+    parser.add_argument(
+        "--max-jobs-per-worker",
+        type=int,
+        help="Number of packages after which a worker is replaced",
+        default=None,
+    )
+    parser.add_argument(
+        "--max-iter",
+        type=int,
+        help=(
+            "Maximum number of iterations through source code. "
+            "If not specified a fix-point iteration will be performed."
+        ),
+        default=-1,
+    )
+    parser.add_argument(
+        "--fasten",
+        help="Produce call graphs using the FASTEN format",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--binary",
+        help="Produce call graphs using a compact binary format",
+        action="store_true",
+        default=False,
+    )
+    args = parser.parse_args(argv)
+    if args.binary and args.fasten:
+        parser.error("--binary and --fasten cannot be used together")
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, BatchError) as e:
+        parser.exit(1, "pycg batch: {}\n".format(e))
+
+    def on_result(job, result):
+        print(
+            "{:<8} {:>8.2f} s  {}{}".format(
+                result["status"],
+                result["wall_time"],
+                job.name,
+                ": " + result["error"] if "error" in result else "",
+            ),
+            file=sys.stderr,
+        )
+
+    runner = BatchRunner(
+        args.output_dir,
+        workers=args.workers,
+        timeout=args.timeout,
+        time_budget=args.time_budget,
+        max_memory=args.max_memory * 2**20 if args.max_memory else None,
+        max_jobs_per_worker=args.max_jobs_per_worker,
+        max_iter=args.max_iter,
+        fasten=args.fasten,
+        binary=args.binary,
+    )
+    start = time.monotonic()
+    results = runner.run(jobs, on_result)
+    summary = get_summary(results, time.monotonic() - start)
+    with open(os.path.join(args.output_dir, "summary.json"), "w+") as f:
+        f.write(json.dumps(summary, indent=2))
+    print(
+        ", ".join("{} {}".format(summary[status], status) for status in STATUSES),
+        file=sys.stderr,
+    )
+
+
+def shards_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="pycg shards",
+        description=(
+            "Analyze each top-level package of a directory on its own "
+            "and link their call graphs"
+        ),
+    )
+    parser.add_argument(
+        "root", help="Directory holding the packages and modules to be analyzed"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Number of worker processes", default=1
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Directory storing the call graph and summary of each package, "
+            "which are reused if none of its modules changed since"
+        ),
+        default=None,
+    )
+    parser.add_argument(
+        "--max-iter",
+        type=int,
+        help=(
+            "Maximum number of iterations through source code. "
+            "If not specified a fix-point iteration will be performed."
+        ),
+        default=-1,
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help=(
+            "Seconds after which the fix-point iteration of a package stops "
+            "and its call graph is built from the state reached"
+        ),
+        default=None,
+    )
+    parser.add_argument(
+        "--max-external-depth",
+        type=int,
+        help=(
+            "Maximum number of attributes accessed on an external value that "
+            "are given definitions, -1 for no limit"
+        ),
+        default=MAX_EXTERNAL_DEPTH,
+    )
+    parser.add_argument(
+        "--max-external-defs",
+        type=int,
+        help=(
+            "Maximum number of definitions created for the attributes "
+            "of external values. If not specified there is no limit."
+        ),
+        default=None,
+    )
+    parser.add_argument(
+        "--no-models",
+        help=(
+            "Do not use the models of the standard library, treating its "
+            "functions as opaque external functions"
+        ),
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--binary",
+        help="Produce call graph using a compact binary format",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--summaries",
+        help="Output for the summary of each package, in JSON",
+        default=None,
+    )
+    parser.add_argument("-o", "--output", help="Output path", default=None)
+    parser.add_argument(
+        "--gzip",
+        help="Compress the outputs with gzip",
+        action="store_true",
+        default=False,
+    )
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.root):
+        parser.error("not a directory: {}".format(args.root))
+
+    analysis = ShardedAnalysis(
+        args.root,
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+        max_iter=args.max_iter,
+        time_budget=args.time_budget,
+        max_external_depth=(
+            args.max_external_depth if args.max_external_depth >= 0 else None
+        ),
+        max_externals=args.max_external_defs,
+        models=not args.no_models,
+    )
+    analysis.analyze()
+    if analysis.output_incomplete():
+        print(
+            "pycg: warning: incomplete call graph: {}".format(
+                analysis.output_incomplete()
+            ),
+            file=sys.stderr,
+        )
+
+    if args.binary:
+        formatter = formats.Binary(analysis)
+    else:
+        formatter = formats.Simple(analysis)
+    with open_output(args.output, args.gzip, formatter.binary) as f:
+        formatter.write(f)
+
+    if args.summaries:
+        with open_output(args.summaries, args.gzip) as f:
+            write_json(analysis.output_summaries(), f)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "serve":
+        return serve_main(argv[1:])
+    if argv and argv[0] == "query":
+        return query_main(argv[1:])
+    if argv and argv[0] == "batch":
+        return batch_main(argv[1:])
+    if argv and argv[0] == "shards":
+        return shards_main(argv[1:])
+
     parser = argparse.ArgumentParser()
     parser.add_argument("entry_point", nargs="*", help="Entry points to be processed")
     parser.add_argument(
@@ -18,6 +387,15 @@ def main():
         action="store_true",
         default=False,
     )
+    parser.add_argument(
+        "--binary",
+        help=(
+            "Produce call graph using a compact binary format, "
+            "read with pycg.formats.BinaryCallGraph"
+        ),
+        action="store_true",
+        default=False,
+    )
     parser.add_argument("--product", help="Package name", default="")
     parser.add_argument(
         "--forge", help="Source the product was downloaded from", default=""
@@ -49,40 +427,162 @@ def main():
         default=CALL_GRAPH_OP,
     )
 
+    parser.add_argument(
+        "--max-cached-trees",
+        type=int,
+        help=(
+            "Maximum number of parsed source files kept in memory. "
+            "If not specified every parsed file is kept."
+        ),
+        default=None,
+    )
+
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        help=(
+            "Number of threads reading and parsing the modules ahead of "
+            "their analysis. Defaults to 0, reading each module when analyzed."
+        ),
+        default=0,
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Directory storing the analysis state of each module, so that only "
+            "the modules that changed and those importing them are analyzed again."
+        ),
+        default=None,
+    )
+
+    parser.add_argument(
+        "--max-external-depth",
+        type=int,
+        help=(
+            "Maximum number of attributes accessed on an external value that "
+            "are given definitions, -1 for no limit. Defaults to {}.".format(
+                MAX_EXTERNAL_DEPTH
+            )
+        ),
+        default=MAX_EXTERNAL_DEPTH,
+    )
+
+    parser.add_argument(
+        "--max-external-defs",
+        type=int,
+        help=(
+            "Maximum number of definitions created for the attributes "
+            "of external values. If not specified there is no limit."
+        ),
+        default=None,
+    )
+
+    parser.add_argument(
+        "--no-models",
+        help=(
+            "Do not use the models of the standard library, treating its "
+            "functions as opaque external functions"
+        ),
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help=(
+            "Seconds after which the fix-point iteration stops and the call "
+            "graph is built from the state reached, which might miss calls. "
+            "The output is then marked as incomplete."
+        ),
+        default=None,
+    )
+
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print the time and memory spent on each phase to stderr",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--profile-json",
+        help=(
+            "Output for the time, memory and counters recorded "
+            "for each phase and module, in JSON"
+        ),
+        default=None,
+    )
+
     parser.add_argument(
         "--as-graph-output", help="Output for the assignment graph", default=None
     )
     parser.add_argument("-o", "--output", help="Output path", default=None)
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Compress the outputs with gzip",
+        default=False,
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.binary and (args.fasten or args.operation != CALL_GRAPH_OP):
+        parser.error("--binary is only available for call graphs in the simple format")
 
     cg = CallGraphGenerator(
-        args.entry_point, args.package, args.max_iter, args.operation
+        args.entry_point,
+        args.package,
+        args.max_iter,
+        args.operation,
+        max_trees=args.max_cached_trees,
+        prefetch=args.prefetch,
+        cache_dir=args.cache_dir,
+        time_budget=args.time_budget,
+        max_external_depth=(
+            args.max_external_depth if args.max_external_depth >= 0 else None
+        ),
+        max_externals=args.max_external_defs,
+        models=not args.no_models,
     )
     cg.analyze()
+    if cg.output_incomplete():
+        print(
+            "pycg: warning: incomplete call graph: {}".format(cg.output_incomplete()),
+            file=sys.stderr,
+        )
 
-    if args.operation == CALL_GRAPH_OP:
-        if args.fasten:
-            formatter = formats.Fasten(
-                cg, args.package, args.product, args.forge, args.version, args.timestamp
-            )
+    with cg.stats.phase("format"):
+        if args.operation == CALL_GRAPH_OP:
+            if args.fasten:
+                formatter = formats.Fasten(
+                    cg,
+                    args.package,
+                    args.product,
+                    args.forge,
+                    args.version,
+                    args.timestamp,
+                )
+            elif args.binary:
+                formatter = formats.Binary(cg)
+            else:
+                formatter = formats.Simple(cg)
+            with open_output(args.output, args.gzip, formatter.binary) as f:
+                formatter.write(f)
         else:
-            formatter = formats.Simple(cg)
-        output = formatter.generate()
-    else:
-        output = cg.output_key_errs()
+            with open_output(args.output, args.gzip) as f:
+                write_json(cg.output_key_errs(), f)
 
-    as_formatter = formats.AsGraph(cg)
+        if args.as_graph_output:
+            with open_output(args.as_graph_output, args.gzip) as f:
+                formats.AsGraph(cg).write(f)
 
-    if args.output:
-        with open(args.output, "w+") as f:
-            f.write(json.dumps(output))
-    else:
-        print(json.dumps(output))
+    if args.stats:
+        print(cg.stats.get_summary(), file=sys.stderr)
 
-    if args.as_graph_output:
-        with open(args.as_graph_output, "w+") as f:
-            f.write(json.dumps(as_formatter.generate()))
+    if args.profile_json:
+        with open(args.profile_json, "w+") as f:
+            f.write(json.dumps(cg.get_stats(), indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,340 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import glob
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import re
+import time
+from collections import deque
+
+from pycg import formats
+from pycg.machinery.stats import get_peak_rss, resource
+from pycg.pycg import CallGraphGenerator
+from pycg.utils.constants import CALL_GRAPH_OP
+
+STATUSES = ["ok", "error", "timeout", "crashed"]
+
+
+class Job(object):
+    def __init__(
+        self, name, package, entry_points, product="", forge="", version="", timestamp=0
+    ):
+        self.name = name
+        self.package = package
+        self.entry_points = entry_points
+        self.product = product
+        self.forge = forge
+        self.version = version
+        self.timestamp = timestamp
+
+
+def get_job_name(entry, package):
+    name = entry.get("name")
+    if not name:
+        name = entry.get("product") or os.path.basename(package)
+        if entry.get("version"):
+            name += "-" + str(entry["version"])
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+def load_manifest(path):
+    """
+    Returns the jobs of a manifest, a file with a JSON object per line
+    holding the `package` directory and optionally its `entry_points`
+    (by default every module under the package), the `name` of its
+    output and the `product`, `forge`, `version` and `timestamp` of the
+    FASTEN format. Relative paths are relative to the manifest.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    names = set()
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                package = os.path.join(base_dir, entry["package"])
+            except (ValueError, TypeError, KeyError) as e:
+                raise BatchError(
+                    "{}:{}: invalid entry: {}".format(path, lineno, e)
+                ) from None
+
+            if "entry_points" in entry:
+                entry_points = [
+                    os.path.join(base_dir, e) for e in entry["entry_points"]
+                ]
+            else:
+                entry_points = sorted(
+                    glob.glob(os.path.join(package, "**", "*.py"), recursive=True)
+                )
+
+            name = get_job_name(entry, package)
+            unique_name, idx = name, 1
+            while unique_name in names:
+                idx += 1
+                unique_name = "{}.{}".format(name, idx)
+            names.add(unique_name)
+
+            jobs.append(
+                Job(
+                    unique_name,
+                    package,
+                    entry_points,
+                    product=entry.get("product", ""),
+                    forge=entry.get("forge", ""),
+                    version=entry.get("version", ""),
+                    timestamp=entry.get("timestamp", 0),
+                )
+            )
+    return jobs
+
+
+def get_output(output_dir, job, binary=False):
+    return os.path.join(output_dir, job.name + (".cg" if binary else ".json"))
+
+
+def remove_partial_output(output_dir, job, binary=False):
+    tmp_output = get_output(output_dir, job, binary) + ".tmp"
+    if os.path.exists(tmp_output):
+        os.remove(tmp_output)
+
+
+def run_job(job, output_dir, max_iter, fasten, time_budget=None, binary=False):
+    """Analyzes a package and writes its call graph under `output_dir`"""
+    output = get_output(output_dir, job, binary)
+    # written to a temporary file first, so that a failed
+    # or stopped job does not leave a partial output
+    tmp_output = output + ".tmp"
+    try:
+        cg = CallGraphGenerator(
+            job.entry_points,
+            job.package,
+            max_iter,
+            CALL_GRAPH_OP,
+            time_budget=time_budget,
+        )
+        cg.analyze()
+        if fasten:
+            formatter = formats.Fasten(
+                cg, job.package, job.product, job.forge, job.version, job.timestamp
+            )
+        elif binary:
+            formatter = formats.Binary(cg)
+        else:
+            formatter = formats.Simple(cg)
+        with open(tmp_output, "wb" if binary else "w") as f:
+            formatter.write(f)
+        os.replace(tmp_output, output)
+    except Exception as e:
+        remove_partial_output(output_dir, job, binary)
+        return {"status": "error", "error": "{}: {}".format(type(e).__name__, e)}
+
+    result = {"status": "ok", "output": output}
+    if cg.output_incomplete():
+        result["incomplete"] = cg.output_incomplete()
+    result.update(cg.get_counts())
+    return result
+
+
+def run_worker(conn, output_dir, max_iter, fasten, time_budget, max_memory, binary):
+    """Runs the jobs received on `conn` until it receives None"""
+    if max_memory and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        result = run_job(job, output_dir, max_iter, fasten, time_budget, binary)
+        # of the worker, which includes the previous jobs it ran
+        result["peak_rss"] = get_peak_rss()
+        conn.send(result)
+
+
+class Worker(object):
+    def __init__(self, args):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=run_worker, args=(child_conn,) + args, daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.job = None
+        self.started = None
+
+    def assign(self, job):
+        self.job = job
+        self.started = time.monotonic()
+        self.conn.send(job)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+class BatchRunner(object):
+    """
+    Analyzes the packages of a list of jobs in a pool of worker processes.
+    A job running for more than `timeout` seconds is stopped by killing
+    its worker, while after `time_budget` seconds the analysis of a package
+    stops refining and outputs the call graph reached so far. The address
+    space of each worker is limited to `max_memory` bytes. Workers are
+    replaced after `max_jobs_per_worker` jobs and after every failed job,
+    as it might have left them in a bad state, so that memory does not
+    build up over a long run.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        workers=1,
+        timeout=None,
+        time_budget=None,
+        max_memory=None,
+        max_jobs_per_worker=None,
+        max_iter=-1,
+        fasten=False,
+        binary=False,
+    ):
+        self.output_dir = output_dir
+        self.binary = binary
+        self.workers = workers
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.worker_args = (
+            output_dir,
+            max_iter,
+            fasten,
+            time_budget,
+            max_memory,
+            binary,
+        )
+
+    def _get_wait_timeout(self, busy):
+        if not self.timeout:
+            return None
+        deadline = min(w.started + self.timeout for w in busy)
+        return max(0, deadline - time.monotonic())
+
+    def _collect(self, worker):
+        """Returns the result of the worker's job, or None if it is running"""
+        if worker.conn.poll():
+            try:
+                return worker.conn.recv()
+            except EOFError:
+                pass
+
+        if not worker.process.is_alive():
+            return {
+                "status": "crashed",
+                "error": "Worker exited with code {}".format(worker.process.exitcode),
+            }
+
+        if self.timeout and time.monotonic() - worker.started >= self.timeout:
+            return {
+                "status": "timeout",
+                "error": "Timed out after {} seconds".format(self.timeout),
+            }
+
+    def run(self, jobs, on_result=None):
+        """
+        Runs the jobs and returns their results, in the order of the jobs.
+        `on_result` is called with each job and its result as it finishes.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        pending = deque(jobs)
+        workers = []
+        results = {}
+        try:
+            while pending or workers:
+                for worker in workers:
+                    if worker.job is None and pending:
+                        worker.assign(pending.popleft())
+                while len(workers) < self.workers and pending:
+                    worker = Worker(self.worker_args)
+                    workers.append(worker)
+                    worker.assign(pending.popleft())
+
+                busy = [w for w in workers if w.job is not None]
+                multiprocessing.connection.wait(
+                    [w.conn for w in busy] + [w.process.sentinel for w in busy],
+                    self._get_wait_timeout(busy),
+                )
+
+                for worker in busy:
+                    result = self._collect(worker)
+                    if result is None:
+                        continue
+
+                    job = worker.job
+                    result["name"] = job.name
+                    result["package"] = job.package
+                    result["wall_time"] = time.monotonic() - worker.started
+                    results[job.name] = result
+                    if on_result is not None:
+                        on_result(job, result)
+
+                    worker.job = None
+                    worker.jobs += 1
+                    if result["status"] != "ok":
+                        worker.kill()
+                        workers.remove(worker)
+                        remove_partial_output(self.output_dir, job, self.binary)
+                    elif not pending or (
+                        self.max_jobs_per_worker
+                        and worker.jobs >= self.max_jobs_per_worker
+                    ):
+                        worker.stop()
+                        workers.remove(worker)
+        finally:
+            for worker in workers:
+                worker.kill()
+
+        return [results[job.name] for job in jobs]
+
+
+def get_summary(results, wall_time):
+    summary = {status: 0 for status in STATUSES}
+    for result in results:
+        summary[result["status"]] += 1
+    summary["jobs"] = len(results)
+    summary["wall_time"] = wall_time
+    summary["packages"] = results
+    return summary
+
+
+class BatchError(Exception):
+    pass
@@ -19,5 +19,6 @@
 # under the License.
 #
 from .as_graph import AsGraph  # noqa: F401
+from .binary import Binary, BinaryCallGraph, BinaryFormatError  # noqa: F401
 from .fasten import Fasten  # noqa: F401
 from .simple import Simple  # noqa: F401
@@ -18,7 +18,7 @@
 # specific language governing permissions and limitations
 # under the License.
 #
-from .base import BaseFormatter
+from .base import BaseFormatter, StreamedObject
 
 
 class AsGraph(BaseFormatter):
@@ -31,3 +31,9 @@ class AsGraph(BaseFormatter):
         for key, defi in graph:
             output[key] = list(defi.get_name_pointer().get().copy())
         return output
+
+    def stream(self):
+        graph = self.cg_generator.get_as_graph()
+        return StreamedObject(
+            (key, list(defi.get_name_pointer().get().copy())) for key, defi in graph
+        )
@@ -18,6 +18,97 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import json
+
+
+class StreamedObject:
+    """A JSON object whose (key, value) pairs are written as they are produced"""
+
+    def __init__(self, items):
+        self.items = items
+
+
+class StreamedArray:
+    """A JSON array whose items are written as they are produced"""
+
+    def __init__(self, items):
+        self.items = items
+
+
+BATCH_SIZE = 1000
+
+
+def encode_key(key):
+    # keys are converted to strings the way json.dumps converts them
+    if not isinstance(key, str):
+        key = json.dumps(key)
+    return json.dumps(key)
+
+
+def _write_batch(batch, f, empty):
+    """Writes items of an array, returns whether the array is still empty"""
+    if not batch:
+        return empty
+    if not empty:
+        f.write(", ")
+    f.write(json.dumps(batch)[1:-1])
+    return False
+
+
+def write_json(obj, f):
+    """
+    Writes `obj` to the file object `f` as json.dumps would encode it.
+    Streamed objects and arrays are written item by item without holding
+    them in memory, anything else is encoded at once.
+    """
+    if isinstance(obj, StreamedObject):
+        f.write("{")
+        for idx, (key, value) in enumerate(obj.items):
+            if idx:
+                f.write(", ")
+            f.write(encode_key(key))
+            f.write(": ")
+            write_json(value, f)
+        f.write("}")
+    elif isinstance(obj, StreamedArray):
+        f.write("[")
+        # items that are not streamed are encoded in batches,
+        # as encoding them one by one is much slower
+        batch = []
+        empty = True
+        for item in obj.items:
+            if isinstance(item, (StreamedObject, StreamedArray)):
+                empty = _write_batch(batch, f, empty)
+                batch = []
+                if not empty:
+                    f.write(", ")
+                write_json(item, f)
+                empty = False
+            else:
+                batch.append(item)
+                if len(batch) == BATCH_SIZE:
+                    empty = _write_batch(batch, f, empty)
+                    batch = []
+        _write_batch(batch, f, empty)
+        f.write("]")
+    else:
+        f.write(json.dumps(obj))
+
+
 class BaseFormatter:
+    # whether the output is written to a file opened in binary mode
+    binary = False
+
     def generate(self):
         raise NotImplementedError("generate method not implemented in child class")
+
+    def stream(self):
+        """
+        Returns the output with its largest parts as streamed objects
+        and arrays, produced while the output is written
+        """
+        return self.generate()
+
+    def write(self, f):
+        """Writes the output to the file object `f` as JSON"""
+        write_json(self.stream(), f)
@@ -0,0 +1,243 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import gzip
+import io
+import mmap
+import struct
+import sys
+from array import array
+
+from .base import BaseFormatter
+
+MAGIC = b"PYCG"
+VERSION = 1
+# magic, version, number of nodes, number of edges, size of the string table
+HEADER = struct.Struct("<4sIQQQ")
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Layout, in little-endian byte order:
+#   header
+#   name offsets   nodes + 1 uint64, the names of node i are the bytes
+#                  [offsets[i], offsets[i + 1]) of the string table
+#   edge offsets   nodes + 1 uint64, the callees of node i are the targets
+#                  [offsets[i], offsets[i + 1])
+#   targets        edges uint32, node indices
+#   string table   the UTF-8 encoded names of the nodes, in sorted order
+# Each section starts aligned to the size of its items.
+
+
+def _to_little_endian(items):
+    if sys.byteorder == "big":
+        items = array(items.typecode, items)
+        items.byteswap()
+    return items
+
+
+class Binary(BaseFormatter):
+    """
+    Writes the call graph as a table of the sorted node names and
+    its adjacency lists as offsets into an array of node indices
+    (compressed sparse rows), which BinaryCallGraph reads in place
+    """
+
+    binary = True
+
+    def __init__(self, cg_generator):
+        self.cg_generator = cg_generator
+
+    def generate(self):
+        f = io.BytesIO()
+        self.write(f)
+        return f.getvalue()
+
+    def write(self, f):
+        output = self.cg_generator.output()
+        names = sorted(output)
+        ids = {name: idx for idx, name in enumerate(names)}
+
+        strings = []
+        name_offsets = array("Q", [0])
+        edge_offsets = array("Q", [0])
+        targets = array("I")
+        size = 0
+        for name in names:
+            encoded = name.encode("utf-8")
+            strings.append(encoded)
+            size += len(encoded)
+            name_offsets.append(size)
+
+            targets.extend(sorted(map(ids.__getitem__, output[name])))
+            edge_offsets.append(len(targets))
+
+        f.write(HEADER.pack(MAGIC, VERSION, len(names), len(targets), size))
+        for items in (name_offsets, edge_offsets, targets):
+            f.write(_to_little_endian(items).tobytes())
+        f.write(b"".join(strings))
+
+
+class BinaryCallGraph(object):
+    """
+    A call graph in the binary format, read in place from a buffer such
+    as a memory mapped file. Loading it neither copies nor decodes the
+    graph: names are decoded as they are accessed and are looked up
+    through a binary search on the sorted string table.
+    """
+
+    def __init__(self, buf):
+        self.mmap = None
+        self.views = []
+        self.buf = self._view(memoryview(buf))
+
+        if len(self.buf) < HEADER.size:
+            raise BinaryFormatError("Truncated header")
+        magic, version, nodes, edges, size = HEADER.unpack_from(self.buf)
+        if magic != MAGIC:
+            raise BinaryFormatError("Not a call graph in the binary format")
+        if version != VERSION:
+            raise BinaryFormatError("Unsupported version {}".format(version))
+        if len(self.buf) != HEADER.size + 16 * (nodes + 1) + 4 * edges + size:
+            raise BinaryFormatError("Size does not match the header")
+
+        pos = HEADER.size
+        self.name_offsets, pos = self._array(pos, "Q", nodes + 1)
+        self.edge_offsets, pos = self._array(pos, "Q", nodes + 1)
+        self.targets, pos = self._array(pos, "I", edges)
+        self.strings = self._view(self.buf[pos:])
+
+    @classmethod
+    def open(cls, path):
+        """
+        Maps the file at `path` in memory. Compressed files
+        are decompressed in memory instead.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(GZIP_MAGIC)) == GZIP_MAGIC:
+                f.seek(0)
+                with gzip.open(f) as decompressed:
+                    return cls(decompressed.read())
+
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files cannot be mapped
+                return cls(b"")
+
+        try:
+            graph = cls(mapped)
+        except BinaryFormatError:
+            mapped.close()
+            raise
+        graph.mmap = mapped
+        return graph
+
+    def _view(self, view):
+        self.views.append(view)
+        return view
+
+    def _array(self, pos, typecode, count):
+        end = pos + count * array(typecode).itemsize
+        items = self._view(self._view(self.buf[pos:end]).cast(typecode))
+        if sys.byteorder == "big":
+            items = array(typecode, items)
+            items.byteswap()
+        return items, end
+
+    def close(self):
+        # the views hold the buffer, so they are released before the mapping
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.name_offsets) - 1
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def get_edge_count(self):
+        return len(self.targets)
+
+    def get_name(self, idx):
+        return str(
+            self.strings[self.name_offsets[idx] : self.name_offsets[idx + 1]], "utf-8"
+        )
+
+    def find(self, name):
+        """Returns the index of the node named `name`, or None"""
+        key = name.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self.strings[self.name_offsets[mid] : self.name_offsets[mid + 1]]
+            if current == key:
+                return mid
+            if bytes(current) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get_callee_ids(self, idx):
+        return self.targets[
+            self.edge_offsets[idx] : self.edge_offsets[idx + 1]
+        ].tolist()
+
+    def get_callees(self, name):
+        idx = self.find(name)
+        if idx is None:
+            raise KeyError(name)
+        return [self.get_name(callee) for callee in self.get_callee_ids(idx)]
+
+    def get_names(self):
+        """Returns the names of all the nodes, in the order of their indices"""
+        strings = bytes(self.strings)
+        offsets = self.name_offsets.tolist()
+        text = strings.decode("utf-8")
+        if len(text) != len(strings):
+            # the byte offsets are not character offsets
+            return [
+                strings[offsets[idx] : offsets[idx + 1]].decode("utf-8")
+                for idx in range(len(self))
+            ]
+        return [text[offsets[idx] : offsets[idx + 1]] for idx in range(len(self))]
+
+    def get(self):
+        """Returns the call graph as the adjacency sets of CallGraph.get"""
+        names = self.get_names()
+        offsets = self.edge_offsets.tolist()
+        targets = self.targets.tolist()
+        return {
+            name: {names[t] for t in targets[offsets[idx] : offsets[idx + 1]]}
+            for idx, name in enumerate(names)
+        }
+
+
+class BinaryFormatError(Exception):
+    pass
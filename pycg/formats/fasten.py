@@ -24,7 +24,7 @@ from pkg_resources import Requirement
 
 from pycg import utils
 
-from .base import BaseFormatter
+from .base import BaseFormatter, StreamedArray, StreamedObject
 
 
 class Fasten(BaseFormatter):
@@ -34,7 +34,10 @@ class Fasten(BaseFormatter):
         self.external_mods = self.cg_generator.output_external_mods() or {}
         self.classes = self.cg_generator.output_classes() or {}
         self.edges = self.cg_generator.output_edges() or []
-        self.functions = self.cg_generator.output_functions() or []
+        self.functions = set(self.cg_generator.output_functions() or [])
+        # only reported by generators that can stop before the fix-point
+        output_incomplete = getattr(self.cg_generator, "output_incomplete", None)
+        self.incomplete = output_incomplete() if output_incomplete else None
         self.unique = 0
         self.namespace_map = {}
         self.package = package
@@ -185,9 +188,10 @@ class Fasten(BaseFormatter):
     def add_superclasses(self, mods):
         for cls_name, cls in self.classes.items():
             cls_uri = self.namespace_map.get(self.to_uri(cls["module"], cls_name))
+            superclasses = []
             mods[self.to_uri(cls["module"])]["namespaces"][cls_uri]["metadata"][
                 "superClasses"
-            ] = []
+            ] = superclasses
             for parent in cls["mro"]:
                 if parent == cls_name:
                     continue
@@ -198,9 +202,7 @@ class Fasten(BaseFormatter):
                     parent_mod = parent.split(".")[0]
                     parent_uri = self.to_external_uri(parent_mod, parent)
 
-                mods[self.to_uri(cls["module"])]["namespaces"][cls_uri]["metadata"][
-                    "superClasses"
-                ].append(parent_uri)
+                superclasses.append(parent_uri)
 
         return mods
 
@@ -233,41 +235,90 @@ class Fasten(BaseFormatter):
                     self.namespace_map[namespace_uri] = unique
         return mods
 
-    def get_graph(self):
-        graph = {"internalCalls": [], "externalCalls": [], "resolvedCalls": []}
-
-        internal, external = self.create_namespaces_map()
+    def get_node_ids(self, namespaces_maps):
+        """
+        Returns the identifier of each node of the call graph in the output:
+        the unique id of its namespace, or its URI if it does not have one
+        """
+        internal, external = namespaces_maps
+
+        node_ids = {}
+        for node, mod in external.items():
+            node_ids[node] = self.namespace_map.get(self.to_external_uri(mod, node))
+        # internal namespaces take precedence
+        for node, mod in internal.items():
+            uri = self.to_uri(mod, node)
+            node_ids[node] = self.namespace_map.get(uri, uri)
+        return node_ids
+
+    def get_calls(self, namespaces_maps, external_calls, node_ids=None):
+        """
+        Yields the internal or the external calls,
+        depending on `external_calls`, in the FASTEN format
+        """
+        _, external = namespaces_maps
+        if node_ids is None:
+            node_ids = self.get_node_ids(namespaces_maps)
 
         for src, dst in self.edges:
-            uris = []
-            for node in [src, dst]:
-                if node in internal:
-                    mod = internal[node]
-                    uri = self.to_uri(mod, node)
-                    uris.append(self.namespace_map.get(uri, uri))
-                elif node in external:
-                    mod = external[node]
-                    uris.append(self.namespace_map.get(self.to_external_uri(mod, node)))
-
-            if len(uris) == 2:
-                if dst in external:
-                    graph["externalCalls"].append([str(uris[0]), str(uris[1]), {}])
-                else:
-                    graph["internalCalls"].append([str(uris[0]), str(uris[1]), {}])
-        return graph
+            if src not in node_ids or dst not in node_ids:
+                continue
+            if (dst in external) == external_calls:
+                yield [str(node_ids[src]), str(node_ids[dst]), {}]
 
-    def generate(self):
+    def get_graph(self):
         return {
-            "product": self.product,
-            "forge": self.forge,
-            "generator": "PyCG",
-            "depset": self.find_dependencies(self.package),
-            "version": self.version,
-            "timestamp": self.timestamp,
-            "modules": {
-                "internal": self.get_internal_modules(),
-                "external": self.get_external_modules(),
-            },
-            "graph": self.get_graph(),
-            "nodes": self.get_unique_and_increment(),
+            key: list(value.items) if isinstance(value, StreamedArray) else value
+            for key, value in self.stream_graph().items
         }
+
+    def stream_graph(self):
+        namespaces_maps = self.create_namespaces_map()
+        node_ids = self.get_node_ids(namespaces_maps)
+        return StreamedObject(
+            [
+                (
+                    "internalCalls",
+                    StreamedArray(self.get_calls(namespaces_maps, False, node_ids)),
+                ),
+                (
+                    "externalCalls",
+                    StreamedArray(self.get_calls(namespaces_maps, True, node_ids)),
+                ),
+                ("resolvedCalls", []),
+            ]
+        )
+
+    def _generate(self, streamed):
+        # produced in order, as the number of nodes
+        # is only known after the modules are produced
+        yield "product", self.product
+        yield "forge", self.forge
+        yield "generator", "PyCG"
+        yield "depset", self.find_dependencies(self.package)
+        yield "version", self.version
+        yield "timestamp", self.timestamp
+
+        internal = self.get_internal_modules()
+        external = self.get_external_modules()
+        if streamed:
+            yield "modules", StreamedObject(
+                [
+                    ("internal", StreamedObject(internal.items())),
+                    ("external", StreamedObject(external.items())),
+                ]
+            )
+            yield "graph", self.stream_graph()
+        else:
+            yield "modules", {"internal": internal, "external": external}
+            yield "graph", self.get_graph()
+
+        yield "nodes", self.get_unique_and_increment()
+        if self.incomplete:
+            yield "incomplete", self.incomplete
+
+    def generate(self):
+        return dict(self._generate(streamed=False))
+
+    def stream(self):
+        return StreamedObject(self._generate(streamed=True))
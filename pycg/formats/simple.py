@@ -18,7 +18,7 @@
 # specific language governing permissions and limitations
 # under the License.
 #
-from .base import BaseFormatter
+from .base import BaseFormatter, StreamedObject
 
 
 class Simple(BaseFormatter):
@@ -31,3 +31,7 @@ class Simple(BaseFormatter):
         for node in output:
             output_cg[node] = list(output[node])
         return output_cg
+
+    def stream(self):
+        output = self.cg_generator.output()
+        return StreamedObject((node, list(output[node])) for node in output)
@@ -0,0 +1,256 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import glob
+import hashlib
+import os
+import pickle
+
+CACHE_FORMAT = 1
+
+
+def get_analyzer_hash():
+    """
+    Returns a hash of the source code and the models of PyCG, so that
+    the states stored by a different version of it are not loaded
+    """
+    pkg_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+    paths = glob.glob(os.path.join(pkg_dir, "**", "*.py"), recursive=True)
+    paths += glob.glob(os.path.join(pkg_dir, "models", "*.json"))
+    for path in sorted(paths):
+        if os.path.join(pkg_dir, "tests") in path:
+            continue
+        digest.update(os.path.relpath(path, pkg_dir).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def get_content_hash(contents):
+    return hashlib.sha256(contents.encode("utf-8", errors="replace")).hexdigest()
+
+
+def get_dir_key(dirname):
+    try:
+        return os.stat(dirname).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_listing(dirname):
+    try:
+        return sorted(os.listdir(dirname))
+    except OSError:
+        return None
+
+
+class AnalysisCache(object):
+    """
+    Stores analysis results on disk, keyed by the PyCG sources and the
+    analysis arguments. `load` and `store` keep a single result, along
+    with a hash of the contents of each analyzed module and the
+    modification time of its directory, so that added or removed files
+    that might change how imports are resolved are also detected.
+    An entry is only loaded if none of them changed.
+
+    `load_modules` and `store_modules` keep the state of each module in
+    a file of its own, along with a hash of its contents and the listings
+    of the directories imports were resolved in. The states are loaded
+    along with the modules whose contents changed since, so that only
+    those are analyzed again, unless a listing changed. Only the states
+    that changed since they were loaded are written again.
+    """
+
+    MANIFEST = "manifest.pickle"
+    SHARED = "shared.pickle"
+    MODULES = "modules"
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.analyzer_hash = None
+        self.hits = 0
+        self.misses = 0
+        # key -> the hash of each state file loaded
+        self.digests = {}
+
+    def get_analyzer_hash(self):
+        if self.analyzer_hash is None:
+            self.analyzer_hash = get_analyzer_hash()
+        return self.analyzer_hash
+
+    def get_key(self, entry_points, package, *options):
+        digest = hashlib.sha256(self.get_analyzer_hash().encode())
+        digest.update(repr(os.path.abspath(package) if package else None).encode())
+        digest.update(repr(options).encode())
+        for entry_point in sorted(os.path.abspath(e) for e in entry_points):
+            digest.update(entry_point.encode())
+        return digest.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key + ".pickle")
+
+    def load(self, key, source_manager):
+        """
+        Returns the stored state for the key if the analyzed
+        modules did not change since it was stored
+        """
+        try:
+            with open(self._get_path(key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+
+        if not self._is_valid(entry, source_manager):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry["state"]
+
+    def _is_valid(self, entry, source_manager):
+        for dirname, dir_key in entry["dirs"].items():
+            if get_dir_key(dirname) != dir_key:
+                return False
+
+        for filename, content_hash in entry["files"].items():
+            try:
+                contents = source_manager.get_contents(filename)
+            except OSError:
+                return False
+            if get_content_hash(contents) != content_hash:
+                return False
+        return True
+
+    def store(self, key, state, filenames, source_manager):
+        files = {}
+        for filename in filenames:
+            filename = os.path.abspath(filename)
+            files[filename] = get_content_hash(source_manager.get_contents(filename))
+        dirs = {
+            dirname: get_dir_key(dirname)
+            for dirname in set(os.path.dirname(f) for f in files)
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write to a temporary file first so that
+        # concurrent runs never read a partial entry
+        path = self._get_path(key)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"files": files, "dirs": dirs, "state": state},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, path)
+
+    def _get_module_path(self, key, modname):
+        if modname is None:
+            return os.path.join(self.cache_dir, key, self.SHARED)
+        return os.path.join(self.cache_dir, key, self.MODULES, modname + ".pickle")
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, path, data):
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def load_modules(self, key, source_manager):
+        """
+        Returns the states stored for the key by store_modules, along with
+        the names of the modules whose contents changed since, or None if
+        there are none or a directory listing changed
+        """
+        data = self._read(os.path.join(self.cache_dir, key, self.MANIFEST))
+        try:
+            manifest = pickle.loads(data) if data is not None else None
+        except (EOFError, pickle.UnpicklingError):
+            manifest = None
+        if manifest is None or any(
+            get_listing(dirname) != listing
+            for dirname, listing in manifest["dirs"].items()
+        ):
+            self.misses += 1
+            return None
+
+        states = {}
+        changed = set()
+        for modname, digest in manifest["digests"].items():
+            # a state written by a concurrent run does not match the manifest
+            data = self._read(self._get_module_path(key, modname))
+            if data is None or hashlib.sha256(data).hexdigest() != digest:
+                self.misses += 1
+                return None
+            states[modname] = pickle.loads(data)
+
+        for modname, (filename, content_hash) in manifest["files"].items():
+            try:
+                contents = source_manager.get_contents(filename)
+            except OSError:
+                changed.add(modname)
+                continue
+            if get_content_hash(contents) != content_hash:
+                changed.add(modname)
+
+        self.hits += 1
+        self.digests[key] = manifest["digests"]
+        return states, changed
+
+    def store_modules(self, key, states, filenames, dirs, source_manager):
+        """
+        Stores the state of each module in `states`, along with the state
+        owned by no module under None. `filenames` maps the modules to their
+        files, and `dirs` are the directories imports were resolved in.
+        """
+        os.makedirs(os.path.join(self.cache_dir, key, self.MODULES), exist_ok=True)
+        loaded = self.digests.get(key, {})
+        digests = {}
+        for modname, state in states.items():
+            data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            digests[modname] = hashlib.sha256(data).hexdigest()
+            if loaded.get(modname) != digests[modname]:
+                self._write(self._get_module_path(key, modname), data)
+
+        files = {}
+        for modname, filename in filenames.items():
+            filename = os.path.abspath(filename)
+            contents = source_manager.get_contents(filename)
+            files[modname] = (filename, get_content_hash(contents))
+        manifest = {
+            "files": files,
+            "dirs": {dirname: get_listing(dirname) for dirname in sorted(dirs)},
+            "digests": digests,
+        }
+        # the manifest goes last, so that it only
+        # lists states that were written entirely
+        self._write(
+            os.path.join(self.cache_dir, key, self.MANIFEST),
+            pickle.dumps(manifest, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+        self.digests[key] = digests
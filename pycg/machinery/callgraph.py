@@ -18,10 +18,25 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import sys
+from collections import deque
+
+
 class CallGraph(object):
     def __init__(self):
         self.cg = {}
+        # the reverse edges, from each node to its callers
+        self.callers = {}
         self.modnames = {}
+        # the nodes reachable from, and reaching, each node queried,
+        # until a node or an edge is added
+        self.reachable = {}
+        self.reaching = {}
+
+    def _changed(self):
+        if self.reachable or self.reaching:
+            self.reachable = {}
+            self.reaching = {}
 
     def add_node(self, name, modname=""):
         if not isinstance(name, str):
@@ -29,9 +44,14 @@ class CallGraph(object):
         if not name:
             raise CallGraphError("Empty node name")
 
+        # interned like the namespaces of the definitions, so that
+        # the nodes share their copies
+        name = sys.intern(name)
         if name not in self.cg:
             self.cg[name] = set()
+            self.callers[name] = set()
             self.modnames[name] = modname
+            self._changed()
 
         if name in self.cg and not self.modnames[name]:
             self.modnames[name] = modname
@@ -39,7 +59,26 @@ class CallGraph(object):
     def add_edge(self, src, dest):
         self.add_node(src)
         self.add_node(dest)
-        self.cg[src].add(dest)
+        if dest not in self.cg[src]:
+            self.cg[src].add(sys.intern(dest))
+            self.callers[dest].add(sys.intern(src))
+            self._changed()
+
+    def remove_callees(self, name):
+        """Removes the edges from `name`"""
+        for dest in self.cg[name]:
+            self.callers[dest].discard(name)
+        self.cg[name] = set()
+        self._changed()
+
+    def remove_node(self, name):
+        """Removes `name` along with its edges"""
+        self.remove_callees(name)
+        for src in self.callers[name]:
+            self.cg[src].discard(name)
+        del self.cg[name]
+        del self.callers[name]
+        del self.modnames[name]
 
     def get(self):
         return self.cg
@@ -54,6 +93,110 @@ class CallGraph(object):
     def get_modules(self):
         return self.modnames
 
+    def _check_nodes(self, names):
+        for name in names:
+            if name not in self.cg:
+                raise CallGraphError("Unknown node: {}".format(name))
+
+    def get_callees(self, name):
+        self._check_nodes([name])
+        return self.cg[name]
+
+    def get_callers(self, name):
+        self._check_nodes([name])
+        return self.callers[name]
+
+    def _get_closure(self, names, edges, memo):
+        """
+        Returns the nodes reached from any of `names` through one or more
+        `edges`. The nodes whose closure is memoised are not traversed again.
+        """
+        self._check_nodes(names)
+        seen = set()
+        expanded = set()
+        stack = []
+        for name in names:
+            known = memo.get(name)
+            if known is None:
+                stack.append(name)
+            else:
+                seen |= known
+        while stack:
+            node = stack.pop()
+            if node in expanded:
+                continue
+            expanded.add(node)
+            for item in edges[node]:
+                if item in seen:
+                    continue
+                seen.add(item)
+                known = memo.get(item)
+                if known is None:
+                    stack.append(item)
+                else:
+                    seen |= known
+        return seen
+
+    def get_reachable(self, name):
+        """Returns the nodes `name` calls, directly or through other nodes"""
+        if name not in self.reachable:
+            self.reachable[name] = frozenset(
+                self._get_closure([name], self.cg, self.reachable)
+            )
+        return self.reachable[name]
+
+    def get_reaching(self, name):
+        """Returns the nodes calling `name`, directly or through other nodes"""
+        if name not in self.reaching:
+            self.reaching[name] = frozenset(
+                self._get_closure([name], self.callers, self.reaching)
+            )
+        return self.reaching[name]
+
+    def get_all_reachable(self, names):
+        """Returns the nodes reachable from any of `names`, in a single pass"""
+        return self._get_closure(names, self.cg, self.reachable)
+
+    def get_all_reaching(self, names):
+        """Returns the nodes reaching any of `names`, in a single pass"""
+        return self._get_closure(names, self.callers, self.reaching)
+
+    def get_paths(self, src, dests):
+        """
+        Returns the shortest call chain from `src` to each of `dests`
+        reachable from it, as the list of the nodes along the chain.
+        The chain from `src` to itself is [src].
+        """
+        self._check_nodes([src] + list(dests))
+        remaining = set(dests)
+        paths = {}
+        if src in remaining:
+            paths[src] = [src]
+            remaining.discard(src)
+        if src in self.reachable:
+            remaining &= self.reachable[src]
+
+        parents = {src: None}
+        queue = deque([src])
+        while queue and remaining:
+            node = queue.popleft()
+            for item in self.cg[node]:
+                if item in parents:
+                    continue
+                parents[item] = node
+                queue.append(item)
+                if item in remaining:
+                    remaining.discard(item)
+                    path = [item]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    paths[item] = path[::-1]
+        return paths
+
+    def get_path(self, src, dest):
+        """Returns the shortest call chain from `src` to `dest`, or None"""
+        return self.get_paths(src, [dest]).get(dest)
+
 
 class CallGraphError(Exception):
     pass
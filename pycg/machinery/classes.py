@@ -18,37 +18,121 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+from pycg.machinery.versions import StateVersion
+
+
 class ClassManager:
     def __init__(self):
         self.names = {}
+        self.worklist = None
+        # classes created or with a changed MRO since the last call to pop_changes
+        self.changes = set()
+        # the MRO of each class when it was last returned by pop_changes
+        self.popped_mros = {}
+        # bumped when a class is created or its MRO changes
+        self.version = StateVersion()
+
+    def bump_version(self):
+        return self.version.bump()
+
+    def get_version(self):
+        return self.version.get()
+
+    def set_worklist(self, worklist):
+        self.worklist = worklist
+
+    def add_mro(self, name):
+        self.changes.add(name)
+
+    def pop_changes(self):
+        # A class defined more than once in a module, such as in the
+        # branches of an if statement, changes its MRO on each definition
+        # of every pass. Only the MRO it ends up with is a change.
+        changes = set()
+        for name in self.changes:
+            if name not in self.names:
+                # removed since it changed
+                changes.add(name)
+                continue
+            mro = self.names[name].get_mro()
+            if self.popped_mros.get(name) != mro:
+                self.popped_mros[name] = mro.copy()
+                changes.add(name)
+        self.changes = set()
+        return changes
 
     def get(self, name):
+        if self.worklist is not None:
+            self.worklist.record(name)
         if name in self.names:
             return self.names[name]
 
     def create(self, name, module):
         if name not in self.names:
-            cls = ClassNode(name, module)
+            cls = ClassNode(name, module, self)
             self.names[name] = cls
+            self.version.bump()
+            self.changes.add(name)
         return self.names[name]
 
+    def remove(self, name):
+        """Removes the class `name`, if it exists"""
+        if self.names.pop(name, None) is None:
+            return
+        self.popped_mros.pop(name, None)
+        self.version.bump()
+        self.changes.add(name)
+
     def get_classes(self):
         return self.names
 
+    def get_state(self, name):
+        """Returns the class `name` as plain values, as load takes them"""
+        cls = self.names[name]
+        return name, cls.get_module(), cls.get_mro().copy()
+
+    def load(self, states):
+        """
+        Creates the classes from the values returned by
+        get_state, without recording them as changes
+        """
+        for name, module, mro in states:
+            cls = ClassNode(name, module, self)
+            cls.mro = mro.copy()
+            self.names[name] = cls
+            self.popped_mros[name] = mro.copy()
+
 
 class ClassNode:
-    def __init__(self, ns, module):
+    __slots__ = ("ns", "module", "mro", "prev_mro", "listener")
+
+    def __init__(self, ns, module, listener=None):
         self.ns = ns
         self.module = module
         self.mro = [ns]
+        # the MRO before clear_mro, compared against
+        # the one built until the next compute_mro
+        self.prev_mro = None
+        # notified with the namespace of the class when its MRO changes
+        self.listener = listener
+
+    def _changed(self, prev_mro):
+        if self.mro == prev_mro:
+            return
+        if self.listener is not None:
+            self.listener.bump_version()
+            self.listener.add_mro(self.ns)
 
     def add_parent(self, parent):
+        prev_mro = self.mro.copy() if self.prev_mro is None else None
         if isinstance(parent, str):
             self.mro.append(parent)
         elif isinstance(parent, list):
             for item in parent:
                 self.mro.append(item)
         self.fix_mro()
+        if prev_mro is not None:
+            self._changed(prev_mro)
 
     def fix_mro(self):
         new_mro = []
@@ -65,6 +149,9 @@ class ClassNode:
         return self.module
 
     def compute_mro(self):
+        prev_mro = self.prev_mro if self.prev_mro is not None else self.mro.copy()
+        self.prev_mro = None
+
         res = []
         self.mro.reverse()
         for parent in self.mro:
@@ -73,6 +160,9 @@ class ClassNode:
 
         res.reverse()
         self.mro = res
+        self._changed(prev_mro)
 
     def clear_mro(self):
+        if self.prev_mro is None:
+            self.prev_mro = self.mro
         self.mro = [self.ns]
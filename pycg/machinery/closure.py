@@ -0,0 +1,195 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import time
+
+
+class ClosureIndex(object):
+    """
+    Maintains the transitive closure of the name pointers of the
+    definitions, i.e. for each namespace the set of namespaces it might
+    eventually point to.
+
+    The index is updated incrementally: definitions whose names grew or
+    that were created since the last refresh are marked as dirty and on
+    refresh only they and the definitions that can reach them are
+    considered. Cycles are collapsed into strongly connected components,
+    whose members share a single closure: the closures of the definitions
+    the component points to along with one member representing the cycle.
+    Components whose successors did not change keep their previous closure.
+    """
+
+    def __init__(self, defs):
+        self.defs = defs
+        self.closured = {}
+        self.pointed_by = {}
+        self.dirty = set()
+        self.worklist = None
+
+        self.refreshes = 0
+        self.recomputed = 0
+        # seconds spent refreshing
+        self.refresh_time = 0.0
+
+    def add_def(self, ns):
+        self.dirty.add(ns)
+
+    def add_names(self, ns, names):
+        self.dirty.add(ns)
+        for name in names:
+            if name not in self.pointed_by:
+                self.pointed_by[name] = set()
+            self.pointed_by[name].add(ns)
+
+    def get_pointed_by(self, ns):
+        return self.pointed_by.get(ns, set())
+
+    def get(self, ns, default=None):
+        if self.worklist is not None:
+            self.worklist.record(ns)
+        return self.closured.get(ns, default)
+
+    def __getitem__(self, ns):
+        if self.worklist is not None:
+            self.worklist.record(ns)
+        return self.closured[ns]
+
+    def __contains__(self, ns):
+        return ns in self.closured
+
+    def __len__(self):
+        return len(self.closured)
+
+    def items(self):
+        return self.closured.items()
+
+    def refresh(self):
+        if not self.dirty:
+            return
+
+        start = time.perf_counter()
+        self._refresh()
+        self.refresh_time += time.perf_counter() - start
+
+    def _refresh(self):
+        self.refreshes += 1
+        dirty = self.dirty
+        self.dirty = set()
+
+        # only the dirty definitions and the ones reaching them can change
+        region = set()
+        stack = list(dirty)
+        while stack:
+            ns = stack.pop()
+            if ns in region:
+                continue
+            region.add(ns)
+            stack.extend(self.get_pointed_by(ns))
+
+        region = set(ns for ns in region if ns in self.defs)
+        for ns in dirty:
+            if ns not in self.defs:
+                self.closured.pop(ns, None)
+
+        # components are produced after all of their successors
+        changed = set()
+        for scc in self._get_sccs(region):
+            members = set(scc)
+            successors = set()
+            for ns in scc:
+                for name in self.defs[ns].get_name_pointer().get():
+                    if name in self.defs and name not in members:
+                        successors.add(name)
+
+            if not (members & dirty) and not (successors & changed):
+                continue
+
+            self.recomputed += len(scc)
+            new_set = self._compute(scc, members, successors)
+            for ns in scc:
+                if self.closured.get(ns) != new_set:
+                    changed.add(ns)
+                self.closured[ns] = new_set
+
+    def _compute(self, scc, members, successors):
+        if len(scc) == 1 and scc[0] not in self.defs[scc[0]].get_name_pointer().get():
+            ns = scc[0]
+            # names that do not point anywhere point to themselves
+            if not self.defs[ns].get_name_pointer().get():
+                return set([ns])
+            new_set = set()
+        else:
+            # a cycle is represented by a single one of its members
+            new_set = set([min(members)])
+
+        for name in successors:
+            items = self.closured.get(name)
+            if items:
+                new_set |= items
+            else:
+                new_set.add(name)
+        return new_set
+
+    def _get_sccs(self, region):
+        """Tarjan's algorithm, without recursion, restricted to `region`"""
+
+        def successors(ns):
+            names = self.defs[ns].get_name_pointer().get()
+            return iter([name for name in names if name in region])
+
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        sccs = []
+        for root in region:
+            if root in index:
+                continue
+
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, successors(root))]
+            while work:
+                ns, succs = work[-1]
+                for succ in succs:
+                    if succ not in index:
+                        index[succ] = low[succ] = len(index)
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, successors(succ)))
+                        break
+                    if succ in on_stack:
+                        low[ns] = min(low[ns], index[succ])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[ns])
+                    if low[ns] == index[ns]:
+                        scc = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            scc.append(member)
+                            if member == ns:
+                                break
+                        sccs.append(scc)
+        return sccs
@@ -0,0 +1,171 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+class ContributionTable(object):
+    """
+    Records what processing a module adds to the definitions and scopes
+    owned by other modules, so that it can be dropped when the module is
+    analyzed again. A namespace is owned by the longest module name it
+    starts with, and external namespaces are owned by no module.
+
+    Each contribution is a (kind, namespace, slot, item) key: an item
+    added to the names, literals or an argument (the slot) of a
+    definition, a definition created along with its type, or an entry
+    (the slot) added to a scope along with the definition it points to.
+    Items that a definition already held are not recorded.
+
+    A definition only points to itself if it pointed to nothing when it
+    was first resolved, which depends on the order the modules were
+    processed in. So that is recorded even for the module owning it,
+    and kept along with the definition when its contributors are dropped.
+    """
+
+    NAMES = "names"
+    LITS = "lits"
+    ARGS = "args"
+    DEF = "def"
+    SCOPE = "scope"
+
+    def __init__(self):
+        self.modules = set()
+        self.owners = {}
+        self.current_mod = None
+        # module -> keys it contributed
+        self.contributed = {}
+        # key -> modules that contributed it
+        self.contributors = {}
+        # owner -> keys contributed to its namespaces
+        self.received = {}
+
+    def set_current_mod(self, modname):
+        """Sets the module the contributions that follow are recorded for"""
+        if modname is not None and modname not in self.modules:
+            self.modules.add(modname)
+            self.owners = {}
+        self.current_mod = modname
+
+    def get_current_mod(self):
+        return self.current_mod
+
+    def get_owner(self, ns):
+        """Returns the module owning the namespace `ns`, or None"""
+        if ns in self.owners:
+            return self.owners[ns]
+
+        owner = None
+        prefix = ns
+        while prefix:
+            if prefix in self.modules:
+                owner = prefix
+                break
+            prefix = prefix.rpartition(".")[0]
+        self.owners[ns] = owner
+        return owner
+
+    def add(self, kind, ns, slot, items):
+        """Records the items added by the current module, if it does not own `ns`"""
+        modname = self.current_mod
+        if modname is None:
+            return
+        owner = self.get_owner(ns)
+        for item in items:
+            key = (kind, ns, slot, item)
+            if owner != modname or self.is_kept(key):
+                self.add_key(modname, owner, key)
+
+    def is_kept(self, key):
+        """Returns whether `key` is a definition pointing to itself"""
+        return key[0] == self.NAMES and key[1] == key[3]
+
+    def add_key(self, modname, owner, key):
+        if key not in self.contributors:
+            self.contributors[key] = set()
+        self.contributors[key].add(modname)
+        if modname not in self.contributed:
+            self.contributed[modname] = set()
+        self.contributed[modname].add(key)
+        if owner not in self.received:
+            self.received[owner] = set()
+        self.received[owner].add(key)
+
+    def get_contributed(self, modname):
+        return self.contributed.get(modname, set())
+
+    def load(self, contributed):
+        """
+        Records the keys contributed by each module, as returned by
+        get_contributed, with every module that owns namespaces included.
+        Those kept for definitions owned by no module are under None.
+        """
+        self.modules.update(modname for modname in contributed if modname)
+        self.owners = {}
+        for modname, keys in contributed.items():
+            for key in keys:
+                self.add_key(modname, self.get_owner(key[1]), key)
+
+    def get_received(self, modnames):
+        """Returns the keys contributed to the namespaces the modules own"""
+        received = set()
+        for modname in modnames:
+            received |= self.received.get(modname, set())
+        return received
+
+    def drop(self, modnames):
+        """
+        Forgets the contributions of the modules. Returns the keys no other
+        module contributed, whose items have to be removed from the
+        namespaces of the others. Those the other modules contributed to
+        the namespaces of the modules are kept, to be added back.
+        """
+        removed = set()
+        kept = set()
+        for modname in modnames:
+            for key in self.contributed.pop(modname, ()):
+                contributors = self.contributors.get(key)
+                if contributors is None:
+                    continue
+                contributors.discard(modname)
+                if contributors:
+                    continue
+                if self.is_kept(key):
+                    kept.add(key)
+                else:
+                    del self.contributors[key]
+                    removed.add(key)
+
+        for modname in modnames:
+            received = self.received.pop(modname, set())
+            # the namespaces of the modules are dropped as a whole
+            removed -= received
+            received = {key for key in received if key in self.contributors}
+            if received:
+                self.received[modname] = received
+
+        for key in removed:
+            received = self.received.get(self.get_owner(key[1]))
+            if received is not None:
+                received.discard(key)
+
+        # the owners take over those kept, so that they are still recorded
+        for key in kept:
+            if not self.contributors[key]:
+                owner = self.get_owner(key[1])
+                self.add_key(owner, owner, key)
+        return removed
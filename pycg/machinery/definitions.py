@@ -18,13 +18,150 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import sys
+import time
+
 from pycg import utils
+from pycg.machinery.closure import ClosureIndex
+from pycg.machinery.contributions import ContributionTable
+from pycg.machinery.externals import ExternalTable
 from pycg.machinery.pointers import LiteralPointer, NamePointer
+from pycg.machinery.versions import StateVersion
 
 
 class DefinitionManager(object):
-    def __init__(self):
+    def __init__(
+        self,
+        max_external_depth=None,
+        max_externals=None,
+        models=None,
+        contributions=None,
+    ):
         self.defs = {}
+        if contributions is None:
+            contributions = ContributionTable()
+        # what each module adds to the definitions of the others
+        self.contributions = contributions
+        self.closure = ClosureIndex(self.defs)
+        self.externals = ExternalTable(max_external_depth, max_externals)
+        # the ModelManager describing external functions, if any
+        self.models = models
+        self.worklist = None
+        # bumped when a definition is created or a pointer grows
+        self.version = StateVersion()
+        # bumped along with version when the names a definition points to grow
+        self.names_version = StateVersion()
+
+        # definitions whose names or arguments grew since
+        # their arguments were last propagated
+        self.changed_names = set()
+        self.changed_args = set()
+        # for each namespace, the definitions having it among their arguments
+        self.arg_refs = {}
+        # definitions created or changed since the last call to pop_changes
+        self.changes = set()
+
+        self.propagation_rounds = 0
+        self.propagations = 0
+
+    def bump_version(self):
+        return self.version.bump()
+
+    def get_version(self):
+        return self.version.get()
+
+    def get_values_version(self):
+        """
+        Returns a version that changes along with the definitions, except
+        for the names they point to. Those are read through the transitive
+        closure, which only changes on refresh.
+        """
+        return self.version.get() - self.names_version.get()
+
+    def add_names(self, ns, names):
+        self.names_version.bump()
+        self.closure.add_names(ns, names)
+        self.changed_names.add(ns)
+        self.changes.add(ns)
+        self.contributions.add(ContributionTable.NAMES, ns, None, names)
+
+    def add_lits(self, ns, items):
+        self.changes.add(ns)
+        self.contributions.add(ContributionTable.LITS, ns, None, items)
+
+    def add_args(self, ns, name, items):
+        self.changed_args.add(ns)
+        self.contributions.add(ContributionTable.ARGS, ns, name, items)
+
+    def _add_def(self, ns):
+        self.version.bump()
+        self.changes.add(ns)
+        self.closure.add_def(ns)
+        # definitions pointing to it might now propagate their arguments
+        self.changed_args.add(ns)
+        self.contributions.add(
+            ContributionTable.DEF, ns, None, [self.defs[ns].get_type()]
+        )
+
+    def set_current_mod(self, modname):
+        """Sets the module processed, which the items added are recorded for"""
+        self.contributions.set_current_mod(modname)
+
+    def remove(self, ns):
+        """Removes the definition `ns`, if it exists"""
+        if self.defs.pop(ns, None) is None:
+            return
+        self.externals.remove(ns)
+        self.version.bump()
+        self.changes.add(ns)
+        self.closure.add_def(ns)
+
+    def discard(self, kind, ns, slot, item):
+        """
+        Removes an item from the names, the literals or the argument `slot`
+        of the definition `ns`, as given by a contribution key
+        """
+        defi = self.defs.get(ns)
+        if not defi:
+            return
+
+        if kind == ContributionTable.NAMES:
+            if not defi.get_name_pointer().discard(item):
+                return
+            self.names_version.bump()
+            self.closure.add_def(ns)
+        elif kind == ContributionTable.LITS:
+            if not defi.get_lit_pointer().discard(item):
+                return
+        elif kind == ContributionTable.ARGS:
+            if not defi.get_name_pointer().discard_arg(slot, item):
+                return
+        else:
+            raise DefinitionError("Invalid contribution kind")
+
+        self.version.bump()
+        self.changes.add(ns)
+        # the item might have been propagated from the arguments of a
+        # definition pointing to the function, which propagates them again
+        self.changed_args.add(ns)
+        self.changed_args.add(ns.rpartition(".")[0])
+
+    def set_worklist(self, worklist):
+        self.worklist = worklist
+        self.closure.worklist = worklist
+
+    def intern(self, ns):
+        # equal namespaces built in different places share a single copy
+        # among the definitions, the pointers, the closure and the call graph
+        return sys.intern(ns)
+
+    def intern_set(self, s):
+        return set(sys.intern(ns) for ns in s)
+
+    def pop_changes(self):
+        changes = self.changes
+        self.changes = set()
+        return changes
 
     def create(self, ns, def_type):
         if not ns or not isinstance(ns, str):
@@ -34,17 +171,22 @@ class DefinitionManager(object):
         if self.get(ns):
             raise DefinitionError("Definition already exists")
 
-        self.defs[ns] = Definition(ns, def_type)
+        ns = self.intern(ns)
+        self.defs[ns] = Definition(ns, def_type, self)
+        self._add_def(ns)
         return self.defs[ns]
 
     def assign(self, ns, defi):
-        self.defs[ns] = Definition(ns, defi.get_type())
+        ns = self.intern(ns)
+        self.defs[ns] = Definition(ns, defi.get_type(), self)
+        self._add_def(ns)
         self.defs[ns].merge(defi)
 
         # if it is a function def, we need to create a return pointer
         if defi.is_function_def():
-            return_ns = utils.join_ns(ns, utils.constants.RETURN_NAME)
-            self.defs[return_ns] = Definition(return_ns, utils.constants.NAME_DEF)
+            return_ns = self.intern(utils.join_ns(ns, utils.constants.RETURN_NAME))
+            self.defs[return_ns] = Definition(return_ns, utils.constants.NAME_DEF, self)
+            self._add_def(return_ns)
             self.defs[return_ns].get_name_pointer().add(
                 utils.join_ns(defi.get_ns(), utils.constants.RETURN_NAME)
             )
@@ -52,12 +194,41 @@ class DefinitionManager(object):
         return self.defs[ns]
 
     def get(self, ns):
+        if self.worklist is not None:
+            self.worklist.record(ns)
         if ns in self.defs:
             return self.defs[ns]
 
     def get_defs(self):
         return self.defs
 
+    def get_state(self, ns):
+        """Returns the definition `ns` as plain values, as load takes them"""
+        defi = self.defs[ns]
+        return ns, defi.get_type(), defi.get_state()
+
+    def load(self, states):
+        """
+        Creates the definitions from the values returned by get_state,
+        without recording them as changes, and indexes them
+        """
+        for ns, def_type, state in states:
+            ns = self.intern(ns)
+            defi = Definition(ns, def_type, self)
+            defi.set_state(state)
+            self.defs[ns] = defi
+
+        for ns, _, _ in states:
+            defi = self.defs[ns]
+            self.closure.add_def(ns)
+            self.closure.add_names(ns, defi.get_name_pointer().get())
+            for arg in defi.get_name_pointer().get_args().values():
+                for item in arg:
+                    if item not in self.arg_refs:
+                        self.arg_refs[item] = set()
+                    self.arg_refs[item].add(ns)
+        self.closure.refresh()
+
     def handle_function_def(self, parent_ns, fn_name):
         full_ns = utils.join_ns(parent_ns, fn_name)
         defi = self.get(full_ns)
@@ -79,108 +250,179 @@ class DefinitionManager(object):
 
         return defi
 
-    def transitive_closure(self):
-        closured = {}
+    def handle_external_def(self, ns):
+        """Returns the external definition `ns`, which is created if missing"""
+        defi = self.get(ns)
+        if not defi:
+            return self.create(ns, utils.constants.EXT_DEF)
 
-        def dfs(defi):
-            name_pointer = defi.get_name_pointer()
-            new_set = set()
-            # bottom
-            if closured.get(defi.get_ns(), None) is not None:
-                return closured[defi.get_ns()]
+        # external definitions are shared, so each module using
+        # one is recorded as if it created it
+        self.contributions.add(ContributionTable.DEF, ns, None, [defi.get_type()])
+        return defi
 
-            if not name_pointer.get():
-                new_set.add(defi.get_ns())
+    def handle_external_attribute(self, ns, attr, check_recursion=True):
+        """
+        Returns the definition of the attribute `attr` of the external
+        definition `ns`, which is created if the external table allows it.
+        Unless `check_recursion` is False, an attribute repeating one of
+        the chain leading to `ns` is not given a definition.
+        """
+        if check_recursion and self.externals.is_recursive(ns, attr):
+            return None
+
+        defi = self.get(utils.join_ns(ns, attr))
+        if defi:
+            self.contributions.add(
+                ContributionTable.DEF, defi.get_ns(), None, [defi.get_type()]
+            )
+            return defi
 
-            closured[defi.get_ns()] = new_set
+        attr_ns = self.externals.add(ns, attr)
+        if attr_ns is None:
+            return None
+        return self.create(attr_ns, utils.constants.EXT_DEF)
 
-            for name in name_pointer.get():
-                if not self.defs.get(name, None):
-                    continue
-                items = dfs(self.defs[name])
-                if not items:
-                    items = set([name])
-                new_set = new_set.union(items)
-
-            closured[defi.get_ns()] = new_set
-            return closured[defi.get_ns()]
-
-        for ns, current_def in self.defs.items():
-            if closured.get(current_def, None) is None:
-                dfs(current_def)
-
-        return closured
-
-    def complete_definitions(self):
-        # THE MOST expensive part of this tool's process
-        # TODO: IMPROVE COMPLEXITY
-        def update_pointsto_args(pointsto_args, arg, name):
-            changed_something = False
-            if arg == pointsto_args:
-                return False
-            for pointsto_arg in pointsto_args:
-                if not self.defs.get(pointsto_arg, None):
-                    continue
-                if pointsto_arg == name:
-                    continue
-                pointsto_arg_def = self.defs[pointsto_arg].get_name_pointer()
-                if pointsto_arg_def == pointsto_args:
-                    continue
-
-                # sometimes we may end up with a cycle
-                if pointsto_arg in arg:
-                    arg.remove(pointsto_arg)
+    def get_model(self, ns):
+        """Returns the model of the external function `ns`, if there is one"""
+        if self.models is None:
+            return None
+        return self.models.get(ns)
 
-                for item in arg:
-                    if item not in pointsto_arg_def.get():
-                        if self.defs.get(item, None) is not None:
-                            changed_something = True
-                    # HACK: this check shouldn't be needed
-                    # if we remove this the following breaks:
-                    # x = lambda x: x + 1
-                    # x(1)
-                    # since on line 184 we don't discriminate between
-                    # literal values and name values
-                    if not self.defs.get(item, None):
-                        continue
-                    pointsto_arg_def.add(item)
-            return changed_something
-
-        for i in range(len(self.defs)):
-            changed_something = False
-            for ns, current_def in self.defs.items():
-                # the name pointer of the definition we're currently iterating
-                current_name_pointer = current_def.get_name_pointer()
-                # iterate the names the current definition points to items
-                # for name in current_name_pointer.get():
-                for name in current_name_pointer.get().copy():
-                    # get the name pointer of the points to name
-                    if not self.defs.get(name, None):
+    def transitive_closure(self):
+        self.closure.refresh()
+        return self.closure
+
+    def _update_pointsto_args(self, pointsto_args, arg, name):
+        if arg == pointsto_args:
+            return
+        for pointsto_arg in pointsto_args:
+            if not self.defs.get(pointsto_arg, None):
+                continue
+            if pointsto_arg == name:
+                continue
+            pointsto_arg_def = self.defs[pointsto_arg].get_name_pointer()
+
+            # sometimes we may end up with a cycle
+            if pointsto_arg in arg:
+                arg.remove(pointsto_arg)
+
+            for item in arg:
+                # HACK: this check shouldn't be needed
+                # if we remove this the following breaks:
+                # x = lambda x: x + 1
+                # x(1)
+                # since on line 184 we don't discriminate between
+                # literal values and name values
+                if not self.defs.get(item, None):
+                    continue
+                pointsto_arg_def.add(item)
+
+    def _propagate_args(self, ns):
+        current_def = self.defs.get(ns)
+        if not current_def:
+            return
+
+        # the name pointer of the definition we're currently iterating
+        current_name_pointer = current_def.get_name_pointer()
+        if not current_name_pointer.get_args():
+            return
+
+        # iterate the names the current definition points to items
+        for name in current_name_pointer.get().copy():
+            # get the name pointer of the points to name
+            if not self.defs.get(name, None):
+                continue
+            if name == ns:
+                continue
+
+            pointsto_name_pointer = self.defs[name].get_name_pointer()
+            # only the arguments of a function are its parameters, those of
+            # other definitions are the values passed to them, so they are
+            # collected and not made to point to each other
+            collect = not self.defs[name].is_function_def()
+            # iterate the arguments of the definition
+            # we're currently iterating
+            for arg_name, arg in list(current_name_pointer.get_args().items()):
+                self.propagations += 1
+                pos = current_name_pointer.get_pos_of_name(arg_name)
+                if pos is not None:
+                    pointsto_args = pointsto_name_pointer.get_pos_arg(pos)
+                    if not pointsto_args or collect:
+                        pointsto_name_pointer.add_pos_arg(pos, None, arg)
                         continue
-                    if name == ns:
+                else:
+                    pointsto_args = pointsto_name_pointer.get_arg(arg_name)
+                    if not pointsto_args or collect:
+                        pointsto_name_pointer.add_arg(arg_name, arg)
                         continue
-
-                    pointsto_name_pointer = self.defs[name].get_name_pointer()
-                    # iterate the arguments of the definition
-                    # we're currently iterating
-                    for arg_name, arg in current_name_pointer.get_args().items():
-                        pos = current_name_pointer.get_pos_of_name(arg_name)
-                        if pos is not None:
-                            pointsto_args = pointsto_name_pointer.get_pos_arg(pos)
-                            if not pointsto_args:
-                                pointsto_name_pointer.add_pos_arg(pos, None, arg)
-                                continue
-                        else:
-                            pointsto_args = pointsto_name_pointer.get_arg(arg_name)
-                            if not pointsto_args:
-                                pointsto_name_pointer.add_arg(arg_name, arg)
-                                continue
-                        changed_something = changed_something or update_pointsto_args(
-                            pointsto_args, arg, current_def.get_ns()
-                        )
-
-            if not changed_something:
-                break
+                self._update_pointsto_args(pointsto_args, arg, ns)
+
+    def complete_definitions(self, deadline=None):
+        """
+        Propagates the arguments of each definition to the arguments of the
+        definitions it points to, until nothing changes.
+        Only the definitions whose names or arguments grew since they were
+        last propagated, along with the definitions pointing to a
+        definition whose arguments grew, are processed on each round.
+        A definition that is created or whose arguments grow also counts as
+        a change of the arguments of the definitions referencing it from
+        their arguments, as their propagation skips missing definitions.
+        Returns False if it stopped at the `deadline`, a time.monotonic()
+        value, in which case the next call resumes the propagation.
+        """
+        queue = []
+        queued = set()
+
+        def enqueue(ns):
+            if ns not in queued:
+                queued.add(ns)
+                queue.append(ns)
+
+        def enqueue_changed():
+            changed_names, self.changed_names = self.changed_names, set()
+            changed_args, self.changed_args = self.changed_args, set()
+            for ns in changed_names:
+                enqueue(ns)
+            for ns in changed_args:
+                defi = self.defs.get(ns)
+                if not defi:
+                    continue
+                for arg in defi.get_name_pointer().get_args().values():
+                    for item in arg:
+                        if item not in self.arg_refs:
+                            self.arg_refs[item] = set()
+                        self.arg_refs[item].add(ns)
+
+            for ns in changed_args:
+                for ref in self.arg_refs.get(ns, set()) | set([ns]):
+                    enqueue(ref)
+                    for pointed_by in self.closure.get_pointed_by(ref):
+                        enqueue(pointed_by)
+
+        # the items propagated are recorded as added by
+        # the module owning the definition propagating them
+        current_mod = self.contributions.get_current_mod()
+        try:
+            enqueue_changed()
+            for i in range(len(self.defs)):
+                if not queue:
+                    break
+
+                self.propagation_rounds += 1
+                current, queue = queue, []
+                queued.clear()
+                for idx, ns in enumerate(current):
+                    if deadline is not None and time.monotonic() > deadline:
+                        self.changed_names.update(current[idx:])
+                        self.changed_names.update(queue)
+                        return False
+                    self.contributions.set_current_mod(self.contributions.get_owner(ns))
+                    self._propagate_args(ns)
+                    enqueue_changed()
+        finally:
+            self.contributions.set_current_mod(current_mod)
+        return True
 
 
 class Definition(object):
@@ -192,11 +434,19 @@ class Definition(object):
         utils.constants.EXT_DEF,
     ]
 
-    def __init__(self, fullns, def_type):
+    # decorator_names is only set for function definitions
+    __slots__ = ("fullns", "def_type", "lit_pointer", "name_pointer", "decorator_names")
+
+    def __init__(self, fullns, def_type, listener=None):
         self.fullns = fullns
-        self.points_to = {"lit": LiteralPointer(), "name": NamePointer()}
+        self.lit_pointer = LiteralPointer(fullns, listener)
+        self.name_pointer = NamePointer(fullns, listener)
         self.def_type = def_type
 
+    @property
+    def points_to(self):
+        return {"lit": self.lit_pointer, "name": self.name_pointer}
+
     def get_type(self):
         return self.def_type
 
@@ -210,10 +460,10 @@ class Definition(object):
         return self.is_function_def() or self.is_ext_def()
 
     def get_lit_pointer(self):
-        return self.points_to["lit"]
+        return self.lit_pointer
 
     def get_name_pointer(self):
-        return self.points_to["name"]
+        return self.name_pointer
 
     def get_name(self):
         return self.fullns.split(".")[-1]
@@ -222,8 +472,24 @@ class Definition(object):
         return self.fullns
 
     def merge(self, to_merge):
-        for name, pointer in to_merge.points_to.items():
-            self.points_to[name].merge(pointer)
+        self.lit_pointer.merge(to_merge.lit_pointer)
+        self.name_pointer.merge(to_merge.name_pointer)
+
+    def get_state(self):
+        """Returns the pointers as plain values, as set_state takes them"""
+        decorator_names = getattr(self, "decorator_names", None)
+        return (
+            self.lit_pointer.get_state(),
+            self.name_pointer.get_state(),
+            sorted(decorator_names) if decorator_names is not None else None,
+        )
+
+    def set_state(self, state):
+        lits, names, decorator_names = state
+        self.lit_pointer.set_state(lits)
+        self.name_pointer.set_state(names)
+        if decorator_names is not None:
+            self.decorator_names = set(decorator_names)
 
 
 class DefinitionError(Exception):
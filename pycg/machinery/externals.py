@@ -0,0 +1,83 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+from pycg import utils
+
+
+class ExternalTable(object):
+    """
+    Tracks the definitions created for the attributes accessed on external
+    definitions, such as `os.path.join` for `os.path.join(...)`, along with
+    the length of the attribute chain each one ends. Chains repeating an
+    attribute, which usually walk a recursive structure such as
+    `node.parent.parent`, are not extended. Neither are chains that would
+    get longer than `max_depth`, nor any chain once `max_size` definitions
+    were created. Either limit is enough to drop an attribute, so that
+    attribute chains on external values cannot keep creating definitions
+    on every iteration of the fix-point.
+    """
+
+    def __init__(self, max_depth=None, max_size=None):
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.depths = {}
+        # attributes that were not given a definition
+        self.dropped = 0
+
+    def get_depth(self, ns):
+        """Returns the number of attributes accessed to reach `ns`"""
+        return self.depths.get(ns, 0)
+
+    def is_recursive(self, ns, attr):
+        """
+        Returns whether `attr` is one of the attributes the table added to
+        reach `ns`. The segments of the external definition the chain
+        starts from, such as the module path of
+        `http.server.BaseHTTPRequestHandler`, are not compared.
+        """
+        depth = self.get_depth(ns)
+        if not depth:
+            return False
+        return attr in ns.split(".")[-depth:]
+
+    def add(self, ns, attr):
+        """
+        Returns the namespace of the attribute `attr` of the external
+        definition `ns`, or None if it exceeds the limits of the table
+        """
+        depth = self.get_depth(ns) + 1
+        if (self.max_depth is not None and depth > self.max_depth) or (
+            self.max_size is not None and len(self.depths) >= self.max_size
+        ):
+            self.dropped += 1
+            return None
+
+        attr_ns = utils.join_ns(ns, attr)
+        self.depths[attr_ns] = depth
+        return attr_ns
+
+    def remove(self, ns):
+        self.depths.pop(ns, None)
+
+    def __contains__(self, ns):
+        return ns in self.depths
+
+    def __len__(self):
+        return len(self.depths)
@@ -20,6 +20,8 @@
 #
 import copy
 import importlib
+import importlib.machinery
+import importlib.util
 import os
 import sys
 from importlib import abc
@@ -81,6 +83,9 @@ class ImportManager(object):
         self.import_graph[name] = {"filename": "", "imports": set()}
         return self.import_graph[name]
 
+    def remove_node(self, name):
+        self.import_graph.pop(name, None)
+
     def create_edge(self, dest):
         if not dest or not isinstance(dest, str):
             raise ImportManagerError("Invalid node name")
@@ -211,6 +216,13 @@ class ImportManager(object):
     def get_import_graph(self):
         return self.import_graph
 
+    def find_import(self, name, level):
+        """
+        Returns the file an import resolves to without recording it, or
+        None if it cannot be found without importing the module
+        """
+        return None
+
     def install_hooks(self):
         loader = get_custom_loader(self)
         self.old_path_hooks = copy.deepcopy(sys.path_hooks)
@@ -231,5 +243,200 @@ class ImportManager(object):
         self._clear_caches()
 
 
+class ModuleIndex(object):
+    """
+    Maps dotted module names to the files under a directory, following the
+    lookup order of the import system. Each directory is listed once,
+    when a module under it is first looked up.
+    """
+
+    SUFFIXES = importlib.machinery.all_suffixes()
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.listings = {}
+        self.modules = {}
+
+    def _list(self, dirname):
+        if dirname not in self.listings:
+            try:
+                self.listings[dirname] = set(os.listdir(dirname))
+            except OSError:
+                self.listings[dirname] = set()
+        return self.listings[dirname]
+
+    def _find(self, dirname, name):
+        entries = self._list(dirname)
+        path = os.path.join(dirname, name)
+        if name in entries and os.path.isdir(path):
+            for suffix in self.SUFFIXES:
+                init_name = "__init__" + suffix
+                if init_name in self._list(path):
+                    return ModuleEntry(os.path.join(path, init_name), path)
+
+        for suffix in self.SUFFIXES:
+            if name + suffix in entries:
+                return ModuleEntry(path + suffix)
+
+        if name in entries and os.path.isdir(path):
+            # a namespace package
+            return ModuleEntry(None, path)
+
+    def find(self, modname):
+        """
+        Returns the entry of a module, or None if the module
+        or any of its parent packages is not under the directory
+        """
+        if modname not in self.modules:
+            parent, _, name = modname.rpartition(".")
+            if not parent:
+                dirname = self.root
+            else:
+                parent_entry = self.find(parent)
+                dirname = parent_entry.get_path() if parent_entry else None
+
+            self.modules[modname] = self._find(dirname, name) if dirname else None
+        return self.modules[modname]
+
+    def is_outdated(self, path):
+        """
+        Returns whether `path` was added or removed since the directories
+        leading to it were listed, which might change how imports resolve
+        """
+        path = os.path.abspath(path)
+        if os.path.commonpath([self.root, path]) != self.root:
+            return False
+
+        while path != self.root:
+            dirname, name = os.path.split(path)
+            if dirname in self.listings:
+                exists = os.path.lexists(path)
+                if (name in self.listings[dirname]) != exists:
+                    return True
+            path = dirname
+        return False
+
+
+class ModuleEntry(object):
+    def __init__(self, filename, path=None):
+        self.filename = filename
+        # the directory of a package
+        self.path = path
+
+    def get_filename(self):
+        return self.filename
+
+    def get_path(self):
+        return self.path
+
+
+class FileSystemImportManager(ImportManager):
+    """
+    Resolves imports through an index of the files under the package
+    directory, instead of import hooks. It does not modify sys.path,
+    sys.path_hooks or sys.modules, so the modules imported by the
+    running interpreter do not affect the analysis.
+
+    If `shard` is set, only the modules of the top-level package
+    or module `shard` are resolved, the others are external.
+    """
+
+    def __init__(self, shard=None):
+        super().__init__()
+        self.index = None
+        self.shard = shard
+
+    def install_hooks(self):
+        mod_dir = os.path.abspath(self.mod_dir)
+        if self.index is None or self.index.root != mod_dir:
+            self.index = ModuleIndex(mod_dir)
+
+    def remove_hooks(self):
+        pass
+
+    def _do_import(self, mod_name, package, record=True):
+        """
+        Returns the entry of the module, after adding an edge to it and
+        to each of its parent packages, as importing it would import them,
+        if `record` is set
+        """
+        if mod_name.startswith("."):
+            try:
+                mod_name = importlib.util.resolve_name(mod_name, package)
+            except (ImportError, ValueError):
+                return None
+
+        parts = mod_name.split(".")
+        if not all(parts):
+            return None
+        if self.shard is not None and parts[0] != self.shard:
+            return None
+
+        for idx in range(1, len(parts) + 1):
+            name = ".".join(parts[:idx])
+            entry = self.index.find(name)
+            if not entry:
+                return None
+
+            if entry.get_filename() and record:
+                self.create_edge(name)
+                if not self.get_node(name):
+                    self.create_node(name)
+                    self.set_filepath(name, entry.get_filename())
+
+            if idx < len(parts) and not entry.get_path():
+                # not a package
+                return None
+        return entry
+
+    def _resolve(self, name, level, record=True):
+        """Returns the entry of the module an import resolves to"""
+        try:
+            mod_name, package = self._handle_import_level(name, level)
+        except ImportError:
+            return None
+
+        parent = ".".join(mod_name.split(".")[:-1])
+        parent_name = ".".join(name.split(".")[:-1])
+        combos = [
+            (mod_name, package),
+            (parent, package),
+            (utils.join_ns(package, name), ""),
+            (utils.join_ns(package, parent_name), ""),
+        ]
+
+        for mn, pkg in combos:
+            entry = self._do_import(mn, pkg, record)
+            if entry:
+                return entry
+        return None
+
+    def find_import(self, name, level):
+        if self.index is None or name.split(".")[0] in sys.builtin_module_names:
+            return None
+
+        entry = self._resolve(name, level, record=False)
+        return entry.get_filename() if entry else None
+
+    def handle_import(self, name, level):
+        root = name.split(".")[0]
+        if root in sys.builtin_module_names:
+            self.create_edge(root)
+            return
+
+        entry = self._resolve(name, level)
+        if not entry:
+            return
+
+        # namespace packages have no file to analyze
+        fname = entry.get_filename()
+        if not fname:
+            return
+        if fname.endswith("__init__" + os.path.splitext(fname)[1]):
+            fname = os.path.split(fname)[0]
+
+        return utils.to_mod_name(os.path.relpath(fname, self.index.root))
+
+
 class ImportManagerError(Exception):
     pass
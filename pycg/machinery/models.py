@@ -0,0 +1,148 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import json
+import os
+
+from pycg import utils
+
+MODELS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models"
+)
+# bumped whenever the format of the model files changes
+MODELS_VERSION = 1
+# the module holding the models of the builtin functions
+BUILTINS_MODULE = "builtins"
+
+
+class FunctionModel(object):
+    """
+    Describes what an external function does with the arguments of a
+    call: the arguments it calls, either during the call or later on
+    behalf of the caller, the arguments its return value points to and
+    whether it points to the return values of the arguments it calls.
+    Each argument is a (position, keyword) pair, either of which might
+    be None if the argument cannot be passed that way.
+    """
+
+    def __init__(self, name, calls=None, returns=None, returns_calls=False):
+        self.name = name
+        self.calls = [tuple(param) for param in calls or []]
+        self.returns = [tuple(param) for param in returns or []]
+        self.returns_calls = returns_calls
+
+    def get_name(self):
+        return self.name
+
+    def get_calls(self):
+        return self.calls
+
+    def get_returns(self):
+        return self.returns
+
+    def does_return_calls(self):
+        return self.returns_calls
+
+
+class ModelManager(object):
+    """
+    Provides the models of external functions, such as those of the
+    standard library, from a directory holding a JSON file for each
+    module. The models of a module are loaded when a function of the
+    module is first looked up, so only the modules used are read.
+    """
+
+    def __init__(self, models_dir=MODELS_DIR):
+        self.models_dir = models_dir
+        # the modules having models, listed on the first lookup
+        self.available = None
+        self.modules = {}
+        self.models = {}
+
+    def _load(self, modname):
+        """Returns the models of the functions of a module, or None"""
+        if self.available is None:
+            try:
+                self.available = set(
+                    os.path.splitext(name)[0]
+                    for name in os.listdir(self.models_dir)
+                    if name.endswith(".json")
+                )
+            except OSError:
+                self.available = set()
+
+        if modname not in self.available:
+            return None
+
+        if modname not in self.modules:
+            path = os.path.join(self.models_dir, modname + ".json")
+            with open(path) as f:
+                contents = json.load(f)
+            if contents.get("version") != MODELS_VERSION:
+                raise ModelError(
+                    "Unsupported version of the models of {}: {}".format(
+                        modname, contents.get("version")
+                    )
+                )
+
+            functions = {}
+            for name, entry in contents.get("functions", {}).items():
+                functions[name] = FunctionModel(
+                    utils.join_ns(modname, name),
+                    entry.get("calls"),
+                    entry.get("returns"),
+                    entry.get("returns_calls", False),
+                )
+            self.modules[modname] = functions
+        return self.modules[modname]
+
+    def get(self, name):
+        """
+        Returns the model of the external function `name`, such as
+        `functools.partial` or `<builtin>.map`, or None if there is none
+        """
+        if name in self.models:
+            return self.models[name]
+
+        model = None
+        builtin_prefix = utils.constants.BUILTIN_NAME + "."
+        if name.startswith(builtin_prefix):
+            functions = self._load(BUILTINS_MODULE)
+            if functions is not None:
+                model = functions.get(name[len(builtin_prefix) :])
+        else:
+            # the module with the longest name defines the function
+            parts = name.split(".")
+            for idx in range(len(parts) - 1, 0, -1):
+                functions = self._load(".".join(parts[:idx]))
+                if functions is not None:
+                    model = functions.get(".".join(parts[idx:]))
+                    break
+
+        self.models[name] = model
+        return model
+
+    def get_loaded(self):
+        """Returns the names of the modules whose models were loaded"""
+        return set(self.modules)
+
+
+class ModelError(Exception):
+    pass
@@ -18,44 +18,146 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+from collections.abc import Mapping
+
+
+class EmptySet(frozenset):
+    # pickled by reference so that loaded pointers still share it
+    def __reduce__(self):
+        return "EMPTY_SET"
+
+
+class EmptyMap(Mapping):
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __reduce__(self):
+        return "EMPTY_MAP"
+
+
+# Most pointers stay empty and most names never get arguments,
+# so they share these until the first item is added
+EMPTY_SET = EmptySet()
+EMPTY_MAP = EmptyMap()
+
+
 class Pointer(object):
-    def __init__(self):
-        self.values = set()
+    __slots__ = ("values", "ns", "listener")
+
+    def __init__(self, ns=None, listener=None):
+        self.values = EMPTY_SET
+        # notified with the namespace of the pointer when it grows
+        self.ns = ns
+        self.listener = listener
+
+    def _notify(self, items):
+        if self.listener is not None:
+            self.listener.bump_version()
 
     def add(self, item):
-        self.values.add(item)
+        if item not in self.values:
+            if self.values is EMPTY_SET:
+                self.values = set()
+            self.values.add(item)
+            self._notify([item])
 
     def add_set(self, s):
-        self.values = self.values.union(s)
+        values = self.values
+        if values is EMPTY_SET:
+            if not s:
+                return
+            self.values = set(s)
+        else:
+            self.values = values.union(s)
+        if len(self.values) != len(values):
+            self._notify(self.values - values)
+
+    def discard(self, item):
+        """Removes `item`, returning whether the pointer held it"""
+        if item not in self.values:
+            return False
+        self.values.discard(item)
+        return True
 
     def get(self):
         return self.values
 
+    def get_state(self):
+        """Returns the values in a fixed order, as set_state takes them"""
+        return sorted(self.values, key=repr)
+
+    def set_state(self, state):
+        """Replaces the values, without notifying the listener"""
+        self.values = set(state) if state else EMPTY_SET
+
     def merge(self, pointer):
-        self.values = self.values.union(pointer.values)
+        self.add_set(pointer.values)
 
 
 class LiteralPointer(Pointer):
+    __slots__ = ()
+
     STR_LIT = "STRING"
     INT_LIT = "INTEGER"
     UNK_LIT = "UNKNOWN"
 
+    def _notify(self, items):
+        super()._notify(items)
+        if self.listener is not None:
+            self.listener.add_lits(self.ns, items)
+
     # no need to add the actual item
     def add(self, item):
-        if isinstance(item, str):
-            self.values.add(item)
-        elif isinstance(item, int):
-            self.values.add(item)
+        if isinstance(item, str) or isinstance(item, int):
+            super().add(item)
         else:
-            self.values.add(self.UNK_LIT)
+            super().add(self.UNK_LIT)
 
 
 class NamePointer(Pointer):
-    def __init__(self):
-        super().__init__()
-        self.pos_to_name = {}
-        self.name_to_pos = {}
-        self.args = {}
+    __slots__ = ("pos_to_name", "name_to_pos", "args")
+
+    def __init__(self, ns=None, listener=None):
+        super().__init__(ns, listener)
+        self.pos_to_name = EMPTY_MAP
+        self.name_to_pos = EMPTY_MAP
+        self.args = EMPTY_MAP
+
+    def _notify(self, names):
+        super()._notify(names)
+        if self.listener is not None:
+            self.listener.add_names(self.ns, names)
+
+    def _notify_args(self, name, items):
+        # arguments are not part of the state checked for convergence,
+        # as a cycle might remove an argument that a pass adds back
+        if self.listener is not None:
+            self.listener.add_args(self.ns, name, items)
+
+    def _intern(self, item):
+        if self.listener is not None:
+            return self.listener.intern(item)
+        return item
+
+    def _intern_set(self, s, values):
+        # only the names that are not already stored need to be interned
+        if self.listener is not None:
+            return self.listener.intern_set(set(s).difference(values))
+        return s
+
+    def add(self, item):
+        super().add(self._intern(item))
+
+    def add_set(self, s):
+        super().add_set(self._intern_set(s, self.values))
 
     def _sanitize_pos(self, pos):
         try:
@@ -65,28 +167,52 @@ class NamePointer(Pointer):
 
         return pos
 
+    def _set_pos_name(self, pos, name):
+        if self.pos_to_name is EMPTY_MAP:
+            self.pos_to_name = {}
+        self.pos_to_name[pos] = name
+
+    def _set_pos(self, pos, name):
+        self._set_pos_name(pos, name)
+        if self.name_to_pos is EMPTY_MAP:
+            self.name_to_pos = {}
+        self.name_to_pos[name] = pos
+
     def get_or_create(self, name):
         if name not in self.args:
+            if self.args is EMPTY_MAP:
+                self.args = {}
             self.args[name] = set()
         return self.args[name]
 
     def add_arg(self, name, item):
+        size = len(self.args[name]) if name in self.args else -1
         self.get_or_create(name)
         if isinstance(item, str):
-            self.args[name].add(item)
+            items = [self._intern(item)]
+            self.args[name].add(items[0])
         elif isinstance(item, set):
-            self.args[name] = self.args[name].union(item)
+            items = self._intern_set(item, self.args[name])
+            self.args[name] = self.args[name].union(items)
         else:
             raise Exception()
 
+        if len(self.args[name]) != size:
+            self._notify_args(name, items)
+
     def add_lit_arg(self, name, item):
+        size = len(self.args[name]) if name in self.args else -1
         arg = self.get_or_create(name)
         if isinstance(item, str):
-            arg.add(LiteralPointer.STR_LIT)
+            lit = LiteralPointer.STR_LIT
         elif isinstance(item, int):
-            arg.add(LiteralPointer.INT_LIT)
+            lit = LiteralPointer.INT_LIT
         else:
-            arg.add(LiteralPointer.UNK_LIT)
+            lit = LiteralPointer.UNK_LIT
+        arg.add(lit)
+
+        if len(arg) != size:
+            self._notify_args(name, [lit])
 
     def add_pos_arg(self, pos, name, item):
         pos = self._sanitize_pos(pos)
@@ -95,8 +221,7 @@ class NamePointer(Pointer):
                 name = self.pos_to_name[pos]
             else:
                 name = str(pos)
-        self.pos_to_name[pos] = name
-        self.name_to_pos[name] = pos
+        self._set_pos(pos, name)
 
         self.add_arg(name, item)
 
@@ -107,8 +232,7 @@ class NamePointer(Pointer):
         pos = self._sanitize_pos(pos)
         if not name:
             name = str(pos)
-        self.pos_to_name[pos] = name
-        self.name_to_pos[name] = pos
+        self._set_pos(pos, name)
         self.add_lit_arg(name, item)
 
     def get_pos_arg(self, pos):
@@ -116,6 +240,13 @@ class NamePointer(Pointer):
         name = self.pos_to_name.get(pos, None)
         return self.get_arg(name)
 
+    def discard_arg(self, name, item):
+        """Removes `item` from the argument `name`, returning whether it held it"""
+        if item not in self.args.get(name, ()):
+            return False
+        self.args[name].discard(item)
+        return True
+
     def get_arg(self, name):
         if self.args.get(name, None):
             return self.args[name]
@@ -136,11 +267,33 @@ class NamePointer(Pointer):
     def get_pos_names(self):
         return self.pos_to_name
 
+    def get_state(self):
+        return (
+            super().get_state(),
+            sorted(
+                ((name, sorted(items, key=repr)) for name, items in self.args.items()),
+                key=repr,
+            ),
+            sorted(self.pos_to_name.items(), key=repr),
+            sorted(self.name_to_pos.items(), key=repr),
+        )
+
+    def set_state(self, state):
+        values, args, pos_to_name, name_to_pos = state
+        super().set_state(self._intern_set(values, EMPTY_SET))
+        self.args = (
+            {name: set(self._intern_set(items, EMPTY_SET)) for name, items in args}
+            if args
+            else EMPTY_MAP
+        )
+        self.pos_to_name = dict(pos_to_name) if pos_to_name else EMPTY_MAP
+        self.name_to_pos = dict(name_to_pos) if name_to_pos else EMPTY_MAP
+
     def merge(self, pointer):
         super().merge(pointer)
         if hasattr(pointer, "get_pos_names"):
             for pos, name in pointer.get_pos_names().items():
-                self.pos_to_name[pos] = name
+                self._set_pos_name(pos, name)
             for name, arg in pointer.get_args().items():
                 self.add_arg(name, arg)
 
@@ -21,17 +21,106 @@
 import symtable
 
 from pycg import utils
+from pycg.machinery.contributions import ContributionTable
+from pycg.machinery.versions import StateVersion
 
 
 class ScopeManager(object):
     """Manages the scope entries"""
 
-    def __init__(self):
+    def __init__(self, contributions=None):
         self.scopes = {}
+        self.worklist = None
+        # the ContributionTable recording the entries added by each module
+        self.contributions = contributions
+        # scopes and scope entries changed since the last call to pop_changes
+        self.changes = set()
+        # bumped when a scope is created or an entry changes
+        self.version = StateVersion()
+        # (scope namespace, name) -> (definition, keys read by the lookup)
+        self.resolved = {}
+        # (scope namespace, name) -> lookups that walked through the entry
+        self.dependents = {}
+        self.hits = 0
+        self.misses = 0
+
+    def set_worklist(self, worklist):
+        self.worklist = worklist
+
+    def bump_version(self):
+        return self.version.bump()
+
+    def get_version(self):
+        return self.version.get()
+
+    def add_name(self, ns, name):
+        self.changes.add(ns)
+        self.changes.add(utils.join_ns(ns, name))
+        defi = self.scopes[ns].get_def(name) if ns in self.scopes else None
+        if self.contributions is not None and defi is not None:
+            self.contributions.add(ContributionTable.SCOPE, ns, name, [defi.get_ns()])
+
+    def pop_changes(self):
+        changes = self.changes
+        self.changes = set()
+        return changes
+
+    def invalidate(self, ns, name):
+        """Drops the cached lookups of `name` that reached the scope `ns`"""
+        for key in self.dependents.pop((ns, name), ()):
+            self.resolved.pop(key, None)
+
+    def remove_scope(self, namespace):
+        """Removes the scope `namespace` along with all the cached lookups"""
+        scope = self.scopes.pop(namespace, None)
+        if scope is None:
+            return
+        self.version.bump()
+        self.changes.add(namespace)
+        for name in scope.get_defs():
+            self.changes.add(utils.join_ns(namespace, name))
+        self.resolved = {}
+        self.dependents = {}
+
+    def get_state(self, namespace):
+        """
+        Returns the scope `namespace` as plain values, as load takes them,
+        with the namespace of the definition each entry points to
+        """
+        scope = self.scopes[namespace]
+        return (
+            namespace,
+            scope.parent.get_ns() if scope.parent else None,
+            sorted((name, defi.get_ns()) for name, defi in scope.get_defs().items()),
+        )
 
-    def handle_module(self, modulename, filename, contents):
-        functions = []
-        classes = []
+    def load(self, states, defs):
+        """
+        Creates the scopes from the values returned by get_state, with
+        their entries pointing to `defs`, without recording them as changes
+        """
+        for namespace, _, _ in states:
+            self.scopes[namespace] = ScopeItem(namespace, None, self)
+        for namespace, parent, entries in states:
+            scope = self.scopes[namespace]
+            scope.parent = self.scopes.get(parent)
+            for name, ns in entries:
+                scope.defs[name] = defs[ns]
+
+    def remove_def(self, namespace, name):
+        """Removes the entry `name` of the scope `namespace`, if both exist"""
+        scope = self.scopes.get(namespace)
+        if scope is not None:
+            scope.remove_def(name)
+
+    @staticmethod
+    def get_module_scopes(filename, contents):
+        """
+        Returns the scopes of a module, built from its symbol table,
+        as (namespace, parent namespace, type) tuples relative to the module.
+        They only contain strings so they can be stored in the analysis cache.
+        """
+        scopes = []
 
         def process(namespace, parent, table):
             if table.get_name() == "top" and table.get_lineno() == 0:
@@ -40,24 +129,39 @@ class ScopeManager(object):
                 name = table.get_name()
 
             if name:
-                fullns = utils.join_ns(namespace, name)
+                fullns = utils.join_ns(namespace, name) if namespace else name
             else:
                 fullns = namespace
 
-            if table.get_type() == "function":
+            scopes.append((fullns, parent, table.get_type()))
+
+            for t in table.get_children():
+                process(fullns, fullns, t)
+
+        process("", None, symtable.symtable(contents, filename, compile_type="exec"))
+        return scopes
+
+    def handle_module(self, modulename, filename, contents, scopes=None):
+        if scopes is None:
+            scopes = self.get_module_scopes(filename, contents)
+
+        def to_fullns(namespace):
+            return utils.join_ns(modulename, namespace) if namespace else modulename
+
+        functions = []
+        classes = []
+        for namespace, parent, table_type in scopes:
+            fullns = to_fullns(namespace)
+            if table_type == "function":
                 functions.append(fullns)
 
-            if table.get_type() == "class":
+            if table_type == "class":
                 classes.append(fullns)
 
-            sc = self.create_scope(fullns, parent)
-
-            for t in table.get_children():
-                process(fullns, sc, t)
+            if parent is not None:
+                parent = self.scopes[to_fullns(parent)]
+            self.create_scope(fullns, parent)
 
-        process(
-            modulename, None, symtable.symtable(contents, filename, compile_type="exec")
-        )
         return {"functions": functions, "classes": classes}
 
     def handle_assign(self, ns, target, defi):
@@ -65,22 +169,58 @@ class ScopeManager(object):
         if scope:
             scope.add_def(target, defi)
 
-    def get_def(self, current_ns, var_name):
-        current_scope = self.get_scope(current_ns)
+    def _resolve(self, current_scope, var_name):
+        key = (current_scope.get_ns(), var_name)
+        reads = [current_scope.get_ns()]
+        defi = None
         while current_scope:
+            ns = current_scope.get_ns()
+            reads.append(utils.join_ns(ns, var_name))
+            self.dependents.setdefault((ns, var_name), set()).add(key)
             defi = current_scope.get_def(var_name)
             if defi:
-                return defi
+                break
             current_scope = current_scope.parent
 
+        self.resolved[key] = (defi, reads)
+        return self.resolved[key]
+
+    def get_def(self, current_ns, var_name):
+        """
+        Returns the definition `var_name` points to from the scope
+        `current_ns` or one of its parents. Lookups are cached until
+        an entry named `var_name` changes in a scope on their path.
+        """
+        resolved = self.resolved.get((current_ns, var_name))
+        if resolved is not None:
+            self.hits += 1
+        else:
+            current_scope = self.get_scope(current_ns)
+            if not current_scope:
+                return
+            self.misses += 1
+            resolved = self._resolve(current_scope, var_name)
+
+        defi, reads = resolved
+        if self.worklist is not None:
+            for key in reads:
+                self.worklist.record(key)
+            if defi:
+                self.worklist.record(defi.get_ns())
+        return defi
+
     def get_scope(self, namespace):
+        if self.worklist is not None:
+            self.worklist.record(namespace)
         if namespace in self.get_scopes():
             return self.get_scopes()[namespace]
 
     def create_scope(self, namespace, parent):
         if namespace not in self.scopes:
-            sc = ScopeItem(namespace, parent)
+            sc = ScopeItem(namespace, parent, self)
             self.scopes[namespace] = sc
+            self.version.bump()
+            self.changes.add(namespace)
         return self.scopes[namespace]
 
     def get_scopes(self):
@@ -88,7 +228,17 @@ class ScopeManager(object):
 
 
 class ScopeItem(object):
-    def __init__(self, fullns, parent):
+    __slots__ = (
+        "parent",
+        "defs",
+        "lambda_counter",
+        "dict_counter",
+        "list_counter",
+        "fullns",
+        "listener",
+    )
+
+    def __init__(self, fullns, parent, listener=None):
         if parent and not isinstance(parent, ScopeItem):
             raise ScopeError("Parent must be a ScopeItem instance")
 
@@ -101,6 +251,14 @@ class ScopeItem(object):
         self.dict_counter = 0
         self.list_counter = 0
         self.fullns = fullns
+        # notified with the namespace of the scope and the name
+        # of an entry when the entry points to a new definition
+        self.listener = listener
+
+    def _changed(self, name):
+        if self.listener is not None:
+            self.listener.bump_version()
+            self.listener.add_name(self.fullns, name)
 
     def get_ns(self):
         return self.fullns
@@ -139,12 +297,30 @@ class ScopeItem(object):
         self.dict_counter = 0
         self.list_counter = 0
 
-    def add_def(self, name, defi):
+    def _set_def(self, name, defi):
+        prev = self.defs.get(name)
         self.defs[name] = defi
+        if prev is not defi and self.listener is not None:
+            self.listener.invalidate(self.fullns, name)
+        return prev
+
+    def add_def(self, name, defi):
+        prev = self._set_def(name, defi)
+        if prev is None or prev.get_ns() != defi.get_ns():
+            self._changed(name)
+
+    def remove_def(self, name):
+        if name not in self.defs:
+            return
+        del self.defs[name]
+        if self.listener is not None:
+            self.listener.invalidate(self.fullns, name)
+        self._changed(name)
 
     def merge_def(self, name, to_merge):
         if name not in self.defs:
-            self.defs[name] = to_merge
+            self._set_def(name, to_merge)
+            self._changed(name)
             return
 
         self.defs[name].merge_points_to(to_merge.get_points_to())
@@ -0,0 +1,228 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import ast
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pycg.machinery.scopes import ScopeManager
+
+
+def get_key(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def read_source(filename):
+    with open(filename, "rt", errors="replace") as f:
+        return f.read()
+
+
+def prefetch_source(filename, parse):
+    """
+    Reads a source file and parses it if `parse` is set. Runs in
+    the threads of SourceManager.prefetch, ahead of the analysis.
+    """
+    key = get_key(filename)
+    try:
+        contents = read_source(filename)
+    except OSError:
+        # left to be raised when the module is processed
+        return key, None, None
+
+    tree = None
+    if parse:
+        try:
+            tree = ast.parse(contents, filename)
+        except (SyntaxError, ValueError):
+            # raised again when the module is processed
+            pass
+    return key, contents, tree
+
+
+class SourceManager(object):
+    """
+    Caches the contents, the parsed AST and the scopes of each source file
+    so that they are read and parsed once and shared among all passes.
+    Entries are keyed by path and invalidated when the modification time
+    or the size of the file changes. If `max_trees` is set, the least
+    recently used trees are evicted once more than `max_trees` are held.
+
+    Files can be prefetched by a pool of threads, which read them and
+    parse them ahead of the analysis, so that the latency of reading
+    them is not spent waiting.
+    """
+
+    def __init__(self, max_trees=None):
+        self.sources = OrderedDict()
+        self.max_trees = max_trees
+        # filename -> source holding a tree, least recently used first,
+        # if the number of trees held is bounded
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.executor = None
+        # filename -> future of prefetch_source
+        self.pending = {}
+        self.prefetched = 0
+
+    def _get_prefetched(self, filename):
+        future = self.pending.pop(filename)
+        if future.cancel():
+            # not started yet, it is faster to read it now
+            return
+        key, contents, tree = future.result()
+        if contents is None:
+            return
+
+        source = Source(filename, key, contents)
+        self._set_source(filename, source)
+        self.prefetched += 1
+        if tree is not None:
+            self._set_tree(source, tree)
+
+    def _get_source(self, filename):
+        filename = os.path.abspath(filename)
+        if filename in self.pending:
+            self._get_prefetched(filename)
+
+        key = get_key(filename)
+        source = self.sources.get(filename)
+        if source and source.key == key:
+            self.sources.move_to_end(filename)
+            return source
+
+        source = Source(filename, key, read_source(filename))
+        self._set_source(filename, source)
+        return source
+
+    def _set_source(self, filename, source):
+        self.sources[filename] = source
+        # the tree of the contents replaced is no longer held
+        self.trees.pop(filename, None)
+
+    def start_prefetch(self, workers):
+        """Starts `workers` threads reading the files passed to prefetch"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="pycg-prefetch"
+            )
+
+    def is_prefetching(self):
+        return self.executor is not None
+
+    def prefetch(self, filenames):
+        """
+        Queues the files to be read, and parsed unless the number of trees
+        held is bounded, in the order given. Files already read or queued
+        are skipped.
+        """
+        if self.executor is None:
+            return
+
+        for filename in filenames:
+            filename = os.path.abspath(filename)
+            if filename in self.sources or filename in self.pending:
+                continue
+            self.pending[filename] = self.executor.submit(
+                prefetch_source, filename, self.max_trees is None
+            )
+
+    def stop_prefetch(self):
+        """Stops the threads, dropping the files that were not requested"""
+        if self.executor is None:
+            return
+
+        for future in self.pending.values():
+            future.cancel()
+        self.executor.shutdown(wait=True)
+        self.executor = None
+        self.pending = {}
+
+    def get_contents(self, filename):
+        return self._get_source(filename).get_contents()
+
+    def get_tree(self, filename):
+        source = self._get_source(filename)
+        tree = source.tree
+        if tree is None:
+            self.misses += 1
+            tree = ast.parse(source.get_contents(), source.get_filename())
+            self._set_tree(source, tree)
+        else:
+            self.hits += 1
+            if source.get_filename() in self.trees:
+                self.trees.move_to_end(source.get_filename())
+        return tree
+
+    def get_scopes(self, filename):
+        source = self._get_source(filename)
+        if source.scopes is None:
+            source.scopes = ScopeManager.get_module_scopes(
+                source.get_filename(), source.get_contents()
+            )
+        return source.scopes
+
+    def set_scopes(self, filename, scopes):
+        """Sets the scopes of a file, as get_scopes built them for its contents"""
+        self._get_source(filename).scopes = scopes
+
+    def _set_tree(self, source, tree):
+        """Sets the tree of a source, evicting the least recently used ones"""
+        source.tree = tree
+        if self.max_trees is None:
+            return
+
+        self.trees[source.get_filename()] = source
+        self.trees.move_to_end(source.get_filename())
+        while len(self.trees) > self.max_trees:
+            _, evicted = self.trees.popitem(last=False)
+            evicted.tree = None
+
+    def remove(self, filename):
+        filename = os.path.abspath(filename)
+        self.sources.pop(filename, None)
+        self.trees.pop(filename, None)
+        future = self.pending.pop(filename, None)
+        if future is not None:
+            future.cancel()
+
+    def clear(self):
+        self.sources.clear()
+        self.trees.clear()
+
+
+class Source(object):
+    def __init__(self, filename, key, contents):
+        self.filename = filename
+        self.key = key
+        self.contents = contents
+        self.tree = None
+        self.scopes = None
+
+    def get_filename(self):
+        return self.filename
+
+    def get_contents(self):
+        return self.contents
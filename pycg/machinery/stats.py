@@ -0,0 +1,148 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def get_peak_rss():
+    """Returns the peak resident set size of the process in bytes"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on macOS and in kilobytes elsewhere
+    if sys.platform != "darwin":
+        peak *= 1024
+    return peak
+
+
+class Stats(object):
+    """
+    Records the wall time, CPU time and peak memory of each phase
+    of a run, along with the time spent processing each module.
+    `get_counts` returns counters, such as the number of definitions,
+    which are recorded at the end of each phase.
+    """
+
+    def __init__(self, get_counts=None):
+        self.get_counts = get_counts
+        self.phases = []
+        self.modules = {}
+
+    @contextmanager
+    def phase(self, name, **info):
+        """
+        Times the enclosed block as a phase. The yielded record
+        can be extended with more information about the phase.
+        """
+        record = {"name": name}
+        record.update(info)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - wall
+            record["cpu_time"] = time.process_time() - cpu
+            record["peak_rss"] = get_peak_rss()
+            if self.get_counts:
+                record.update(self.get_counts())
+            self.phases.append(record)
+
+    @contextmanager
+    def module(self, modname, phase):
+        """
+        Times the processing of a module during a phase. When a module
+        imports modules not processed yet, their time is included.
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            if modname not in self.modules:
+                self.modules[modname] = {}
+            if phase not in self.modules[modname]:
+                self.modules[modname][phase] = {
+                    "runs": 0,
+                    "wall_time": 0.0,
+                    "cpu_time": 0.0,
+                }
+            record = self.modules[modname][phase]
+            record["runs"] += 1
+            record["wall_time"] += time.perf_counter() - wall
+            record["cpu_time"] += time.process_time() - cpu
+
+    def get_phases(self):
+        return self.phases
+
+    def get_modules(self):
+        return self.modules
+
+    def get_total(self):
+        return {
+            "wall_time": sum(p["wall_time"] for p in self.phases),
+            "cpu_time": sum(p["cpu_time"] for p in self.phases),
+            "peak_rss": get_peak_rss(),
+        }
+
+    def get_summary(self, slowest=10):
+        """Returns a human readable report of the phases and slowest modules"""
+        lines = [
+            "{:<24} {:>10} {:>10} {:>10} {:>12} {:>10}".format(
+                "phase", "wall (s)", "cpu (s)", "rss (MB)", "definitions", "edges"
+            )
+        ]
+
+        def to_mb(size):
+            return "-" if size is None else "{:.1f}".format(size / 2**20)
+
+        for p in self.phases + [dict(self.get_total(), name="total")]:
+            name = p["name"]
+            if "iteration" in p:
+                name = "{} #{}".format(name, p["iteration"])
+            lines.append(
+                "{:<24} {:>10.3f} {:>10.3f} {:>10} {:>12} {:>10}".format(
+                    name,
+                    p["wall_time"],
+                    p["cpu_time"],
+                    to_mb(p["peak_rss"]),
+                    p.get("definitions", "-"),
+                    p.get("edges", "-"),
+                )
+            )
+
+        times = []
+        for modname, phases in self.modules.items():
+            times.append((sum(p["wall_time"] for p in phases.values()), modname))
+        if times:
+            lines.append("")
+            lines.append("{:<46} {:>10}".format("slowest modules", "wall (s)"))
+            for wall, modname in sorted(times, reverse=True)[:slowest]:
+                lines.append("{:<46} {:>10.3f}".format(modname, wall))
+
+        return "\n".join(lines)
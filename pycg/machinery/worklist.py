@@ -0,0 +1,98 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+class Worklist(object):
+    """
+    Keeps track of the keys (definition, scope and class namespaces)
+    each module reads while it is being processed, so that when some
+    of those keys change only the modules reading them are processed again.
+    """
+
+    def __init__(self):
+        self.reads = {}
+        self.readers = {}
+        self.pending = set()
+        self.current_mod = None
+        self.current_reads = None
+
+    def start_reading(self, modname):
+        self.stop_reading()
+        self.current_mod = modname
+        self.current_reads = set()
+
+    def stop_reading(self):
+        if self.current_reads is None:
+            return
+
+        for key in self.reads.get(self.current_mod, set()):
+            readers = self.readers.get(key)
+            if readers:
+                readers.discard(self.current_mod)
+
+        self.reads[self.current_mod] = self.current_reads
+        for key in self.current_reads:
+            if key not in self.readers:
+                self.readers[key] = set()
+            self.readers[key].add(self.current_mod)
+
+        self.current_reads = None
+        self.current_mod = None
+
+    def record(self, key):
+        if self.current_reads is not None:
+            self.current_reads.add(key)
+
+    def set_reads(self, modname, reads):
+        """Records `reads` as the keys read when `modname` was last processed"""
+        self.start_reading(modname)
+        self.current_reads.update(reads)
+        self.stop_reading()
+
+    def get_reads(self, modname):
+        return self.reads.get(modname, set())
+
+    def get_readers(self, key):
+        return self.readers.get(key, set())
+
+    def add(self, modname):
+        self.pending.add(modname)
+
+    def mark_changed(self, keys, modnames=None):
+        """Adds the readers of `keys`, only those in `modnames` if given"""
+        for key in keys:
+            readers = self.get_readers(key)
+            if modnames is not None:
+                readers = readers & modnames
+            self.pending |= readers
+
+    def get_pending(self):
+        return set(self.pending)
+
+    def pop(self, order):
+        """
+        Returns the pending modules following `order`
+        and empties the worklist
+        """
+        pending = [modname for modname in order if modname in self.pending]
+        self.pending = set()
+        return pending
+
+    def is_empty(self):
+        return not self.pending
@@ -23,10 +23,11 @@ import os
 
 from pycg import utils
 from pycg.machinery.definitions import Definition
+from pycg.machinery.sources import SourceManager
 
 
 class ProcessingBase(ast.NodeVisitor):
-    def __init__(self, filename, modname, modules_analyzed):
+    def __init__(self, filename, modname, modules_analyzed, source_manager=None):
         self.modname = modname
 
         self.modules_analyzed = modules_analyzed
@@ -34,16 +35,27 @@ class ProcessingBase(ast.NodeVisitor):
 
         self.filename = os.path.abspath(filename)
 
-        with open(filename, "rt", errors="replace") as f:
-            self.contents = f.read()
+        if source_manager is None:
+            source_manager = SourceManager(max_trees=0)
+        self.source_manager = source_manager
+        self.contents = self.source_manager.get_contents(self.filename)
 
         self.name_stack = []
         self.method_stack = []
         self.last_called_names = None
 
+        # (node, namespace) -> decoded values, valid while
+        # the definitions version they were decoded at holds
+        self.decoded = {}
+        self.decoded_version = None
+        self.decoding_counters = False
+
     def get_modules_analyzed(self):
         return self.modules_analyzed
 
+    def get_tree(self):
+        return self.source_manager.get_tree(self.filename)
+
     def merge_modules_analyzed(self, analyzed):
         self.modules_analyzed = self.modules_analyzed.union(analyzed)
 
@@ -201,7 +213,44 @@ class ProcessingBase(ast.NodeVisitor):
         for target in targets:
             do_assign(decoded, target)
 
+    def get_definitions_version(self):
+        """
+        Returns a version that changes along with the analysis state,
+        except for the names pointed to by definitions
+        """
+        return (
+            self.def_manager.get_values_version(),
+            self.scope_manager.get_version(),
+            self.class_manager.get_version(),
+        )
+
     def decode_node(self, node):
+        """
+        Returns the definitions and literals an expression points to.
+        Names pointed to by definitions are read through the closure,
+        which stays the same while a module is processed, so the result
+        is kept until any other part of the state changes. Expressions
+        containing a lambda, a dict or a list are not kept, as these are
+        decoded from the scope counters of the ongoing visit.
+        """
+        version = self.get_definitions_version()
+        if version != self.decoded_version:
+            self.decoded = {}
+            self.decoded_version = version
+
+        key = (node, self.current_ns)
+        if key in self.decoded:
+            return self.decoded[key]
+
+        decoding_counters = self.decoding_counters
+        self.decoding_counters = False
+        decoded = self._decode_node(node)
+        if not self.decoding_counters and self.get_definitions_version() == version:
+            self.decoded[key] = decoded
+        self.decoding_counters = self.decoding_counters or decoding_counters
+        return decoded
+
+    def _decode_node(self, node):
         if isinstance(node, ast.Name):
             return [self.scope_manager.get_def(self.current_ns, node.id)]
         elif isinstance(node, ast.Call):
@@ -225,8 +274,18 @@ class ProcessingBase(ast.NodeVisitor):
                 if defi:
                     return_defs.append(defi)
 
+            for model in self.get_call_models(node, decoded):
+                for arg in self.get_model_args(node, model.get_returns()):
+                    for d in self.decode_node(arg):
+                        if isinstance(d, Definition):
+                            return_defs.append(d)
+                if model.does_return_calls():
+                    for arg in self.get_model_args(node, model.get_calls()):
+                        return_defs.extend(self._get_return_defs(self.decode_node(arg)))
+
             return return_defs
         elif isinstance(node, ast.Lambda):
+            self.decoding_counters = True
             lambda_counter = self.scope_manager.get_scope(
                 self.current_ns
             ).get_lambda_counter()
@@ -261,6 +320,7 @@ class ProcessingBase(ast.NodeVisitor):
         elif self._is_literal(node):
             return [node]
         elif isinstance(node, ast.Dict):
+            self.decoding_counters = True
             dict_counter = self.scope_manager.get_scope(
                 self.current_ns
             ).get_dict_counter()
@@ -268,6 +328,7 @@ class ProcessingBase(ast.NodeVisitor):
             scope_def = self.scope_manager.get_def(self.current_ns, dict_name)
             return [scope_def]
         elif isinstance(node, ast.List):
+            self.decoding_counters = True
             list_counter = self.scope_manager.get_scope(
                 self.current_ns
             ).get_list_counter()
@@ -354,16 +415,23 @@ class ProcessingBase(ast.NodeVisitor):
                 ]:
                     names.add(utils.join_ns(name, node.attr))
                 if defi.get_type() == utils.constants.EXT_DEF:
-                    # HACK: extenral attributes can lead to infinite loops
-                    # Identify them here
-                    if node.attr in name:
-                        continue
-                    ext_name = utils.join_ns(name, node.attr)
-                    if not self.def_manager.get(ext_name):
-                        self.def_manager.create(ext_name, utils.constants.EXT_DEF)
-                    names.add(ext_name)
+                    ext_def = self.def_manager.handle_external_attribute(
+                        name, node.attr
+                    )
+                    if ext_def:
+                        names.add(ext_def.get_ns())
         return names
 
+    def visit_call_args(self, node):
+        """
+        Visits the arguments of a call to an unknown function, as they
+        might define lambdas, which are named in the order visited
+        """
+        for arg in node.args:
+            self.visit(arg)
+        for keyword in node.keywords:
+            self.visit(keyword.value)
+
     def iterate_call_args(self, defi, node):
         for pos, arg in enumerate(node.args):
             self.visit(arg)
@@ -412,6 +480,84 @@ class ProcessingBase(ast.NodeVisitor):
                     else:
                         defi.get_name_pointer().add_lit_arg(keyword.arg, d)
 
+    def is_builtin(self, name):
+        return name in __builtins__
+
+    def _get_names(self, defi):
+        """Returns the names a definition points to, or its own if unknown"""
+        closured = getattr(self, "closured", None)
+        if closured and closured.get(defi.get_ns()):
+            return closured.get(defi.get_ns())
+        return [defi.get_ns()]
+
+    def _get_return_defs(self, decoded):
+        """Returns the return values of the functions decoded"""
+        return_defs = []
+        for d in decoded:
+            if not isinstance(d, Definition):
+                continue
+            for name in self._get_names(d):
+                defi = self.def_manager.get(name)
+                if defi and defi.get_type() == utils.constants.FUN_DEF:
+                    return_def = self.def_manager.get(
+                        utils.join_ns(name, utils.constants.RETURN_NAME)
+                    )
+                    if return_def:
+                        return_defs.append(return_def)
+        return return_defs
+
+    def get_call_models(self, node, decoded=None):
+        """
+        Returns the models of the external functions, such as those of
+        the standard library, that a call might be targeting. `decoded`
+        holds the definitions of the called expression, if decoded already.
+        """
+        if self.def_manager.models is None:
+            return []
+
+        names = set()
+        if isinstance(node.func, ast.Name):
+            if not self.scope_manager.get_def(
+                self.current_ns, node.func.id
+            ) and self.is_builtin(node.func.id):
+                names.add(utils.join_ns(utils.constants.BUILTIN_NAME, node.func.id))
+
+        if decoded is None:
+            decoded = self.decode_node(node.func)
+        for d in decoded:
+            if not isinstance(d, Definition):
+                continue
+            for name in self._get_names(d):
+                defi = self.def_manager.get(name)
+                if defi and defi.is_ext_def():
+                    names.add(name)
+
+        models = []
+        for name in sorted(names):
+            model = self.def_manager.get_model(name)
+            if model:
+                models.append(model)
+        return models
+
+    def get_model_args(self, node, params):
+        """
+        Returns the expressions passed to a call as the parameters of a
+        model, each given as a (position, keyword) pair
+        """
+        args = []
+        for pos, keyword_name in params:
+            if (
+                pos is not None
+                and pos < len(node.args)
+                and not any(isinstance(a, ast.Starred) for a in node.args[: pos + 1])
+            ):
+                args.append(node.args[pos])
+                continue
+            for keyword in node.keywords:
+                if keyword_name is not None and keyword.arg == keyword_name:
+                    args.append(keyword.value)
+        return args
+
     def retrieve_subscript_names(self, node):
         if not isinstance(node, ast.Subscript):
             raise Exception("The node is not an subcript")
@@ -504,12 +650,14 @@ class ProcessingBase(ast.NodeVisitor):
             return
 
         self.import_manager.set_current_mod(imp, fname)
+        self.def_manager.set_current_mod(imp)
 
         visitor = cls(fname, imp, *args, **kwargs)
         visitor.analyze()
         self.merge_modules_analyzed(visitor.get_modules_analyzed())
 
         self.import_manager.set_current_mod(self.modname, self.filename)
+        self.def_manager.set_current_mod(self.modname)
 
     def find_cls_fun_ns(self, cls_name, fn):
         cls = self.class_manager.get(cls_name)
@@ -530,12 +678,19 @@ class ProcessingBase(ast.NodeVisitor):
 
             parent = self.def_manager.get(item)
             if parent and parent.get_type() == utils.constants.EXT_DEF:
-                ext_names.add(ns)
+                ext_names.add(item)
 
-        for name in ext_names:
-            self.def_manager.create(name, utils.constants.EXT_DEF)
-            self.add_ext_mod_node(name)
-        return ext_names
+        names = set()
+        for item in ext_names:
+            # a member of a class of the MRO, rather than an attribute
+            # chain, so only the limits of the external table apply
+            ext_def = self.def_manager.handle_external_attribute(
+                item, fn, check_recursion=False
+            )
+            if ext_def:
+                names.add(ext_def.get_ns())
+                self.add_ext_mod_node(ext_def.get_ns())
+        return names
 
     def add_ext_mod_node(self, name):
         ext_modname = name.split(".")[0]
@@ -38,8 +38,9 @@ class CallGraphProcessor(ProcessingBase):
         module_manager,
         call_graph=None,
         modules_analyzed=None,
+        source_manager=None,
     ):
-        super().__init__(filename, modname, modules_analyzed)
+        super().__init__(filename, modname, modules_analyzed, source_manager)
         # parent directory of file
         self.parent_dir = os.path.dirname(filename)
 
@@ -140,6 +141,11 @@ class CallGraphProcessor(ProcessingBase):
 
         self.visit(node.func)
 
+        # the arguments that modeled external functions call
+        for model in self.get_call_models(node):
+            for arg in self.get_model_args(node, model.get_calls()):
+                self.add_callback_edges(self.decode_node(arg))
+
         names = self.retrieve_call_names(node)
         if not names:
             if isinstance(node.func, ast.Attribute) and self.has_ext_parent(node.func):
@@ -183,6 +189,21 @@ class CallGraphProcessor(ProcessingBase):
                 for ns in init_ns:
                     self.call_graph.add_edge(self.current_method, ns)
 
+    def add_callback_edges(self, decoded):
+        """Adds edges to the functions and classes passed to a call"""
+        for d in decoded:
+            if not isinstance(d, Definition):
+                continue
+            for name in self.closured.get(d.get_ns(), []):
+                defi = self.def_manager.get(name)
+                if not defi:
+                    continue
+                if defi.get_type() == utils.constants.FUN_DEF:
+                    self.call_graph.add_edge(self.current_method, name)
+                elif defi.get_type() == utils.constants.CLS_DEF:
+                    for ns in self.find_cls_fun_ns(name, utils.constants.CLS_INIT):
+                        self.call_graph.add_edge(self.current_method, ns)
+
     def analyze_submodules(self):
         super().analyze_submodules(
             CallGraphProcessor,
@@ -193,10 +214,11 @@ class CallGraphProcessor(ProcessingBase):
             self.module_manager,
             call_graph=self.call_graph,
             modules_analyzed=self.get_modules_analyzed(),
+            source_manager=self.source_manager,
         )
 
     def analyze(self):
-        self.visit(ast.parse(self.contents, self.filename))
+        self.visit(self.get_tree())
         self.analyze_submodules()
 
     def get_all_reachable_functions(self):
@@ -247,6 +269,3 @@ class CallGraphProcessor(ProcessingBase):
                 names.append(id + "." + name)
 
         return names
-
-    def is_builtin(self, name):
-        return name in __builtins__
@@ -18,7 +18,6 @@
 # specific language governing permissions and limitations
 # under the License.
 #
-import ast
 import os
 import re
 
@@ -37,8 +36,9 @@ class KeyErrProcessor(ProcessingBase):
         class_manager,
         key_errs,
         modules_analyzed=None,
+        source_manager=None,
     ):
-        super().__init__(filename, modname, modules_analyzed)
+        super().__init__(filename, modname, modules_analyzed, source_manager)
         # parent directory of file
         self.parent_dir = os.path.dirname(filename)
 
@@ -87,10 +87,11 @@ class KeyErrProcessor(ProcessingBase):
             self.class_manager,
             self.key_errs,
             modules_analyzed=self.get_modules_analyzed(),
+            source_manager=self.source_manager,
         )
 
     def analyze(self):
-        self.visit(ast.parse(self.contents, self.filename))
+        self.visit(self.get_tree())
         self.analyze_submodules()
 
     def visit_Lambda(self, node):
@@ -36,8 +36,9 @@ class PostProcessor(ProcessingBase):
         class_manager,
         module_manager,
         modules_analyzed=None,
+        source_manager=None,
     ):
-        super().__init__(input_file, modname, modules_analyzed)
+        super().__init__(input_file, modname, modules_analyzed, source_manager)
         self.import_manager = import_manager
         self.scope_manager = scope_manager
         self.def_manager = def_manager
@@ -55,10 +56,12 @@ class PostProcessor(ProcessingBase):
 
         names = self.retrieve_call_names(node)
         if not names:
+            self.visit_call_args(node)
             return
 
         self.last_called_names = names
 
+        visited = False
         for name in names:
             defi = self.def_manager.get(name)
             if not defi:
@@ -71,6 +74,10 @@ class PostProcessor(ProcessingBase):
                 if not defi:
                     continue
             self.iterate_call_args(defi, node)
+            visited = True
+
+        if not visited:
+            self.visit_call_args(node)
 
     def visit_Assign(self, node):
         self._visit_assign(node.value, node.targets)
@@ -335,8 +342,9 @@ class PostProcessor(ProcessingBase):
             self.class_manager,
             self.module_manager,
             modules_analyzed=self.get_modules_analyzed(),
+            source_manager=self.source_manager,
         )
 
     def analyze(self):
-        self.visit(ast.parse(self.contents, self.filename))
+        self.visit(self.get_tree())
         self.analyze_submodules()
@@ -36,8 +36,9 @@ class PreProcessor(ProcessingBase):
         class_manager,
         module_manager,
         modules_analyzed=None,
+        source_manager=None,
     ):
-        super().__init__(filename, modname, modules_analyzed)
+        super().__init__(filename, modname, modules_analyzed, source_manager)
 
         self.modname = modname
         self.mod_dir = "/".join(self.filename.split("/")[:-1])
@@ -50,13 +51,15 @@ class PreProcessor(ProcessingBase):
 
     def _get_fun_defaults(self, node):
         defaults = {}
-        start = len(node.args.args) - len(node.args.defaults)
+        # defaults are shared by positional-only and positional arguments
+        args = node.args.posonlyargs + node.args.args
+        start = len(args) - len(node.args.defaults)
         for cnt, d in enumerate(node.args.defaults, start=start):
             if not d:
                 continue
 
             self.visit(d)
-            defaults[node.args.args[cnt].arg] = self.decode_node(d)
+            defaults[args[cnt].arg] = self.decode_node(d)
 
         start = len(node.args.kwonlyargs) - len(node.args.kw_defaults)
         for cnt, d in enumerate(node.args.kw_defaults, start=start):
@@ -77,6 +80,7 @@ class PreProcessor(ProcessingBase):
             self.class_manager,
             self.module_manager,
             modules_analyzed=self.get_modules_analyzed(),
+            source_manager=self.source_manager,
         )
 
     def visit_Module(self, node):
@@ -92,6 +96,7 @@ class PreProcessor(ProcessingBase):
                 self.scope_manager.get_scope(parentns).add_def(name, defi)
 
         self.import_manager.set_current_mod(self.modname, self.filename)
+        self.prefetch_imports(node)
 
         mod = self.module_manager.create(self.modname, self.filename)
 
@@ -105,7 +110,10 @@ class PreProcessor(ProcessingBase):
         if not root_sc:
             # initialize module scopes
             items = self.scope_manager.handle_module(
-                self.modname, self.filename, self.contents
+                self.modname,
+                self.filename,
+                self.contents,
+                self.source_manager.get_scopes(self.filename),
             )
 
             root_sc = self.scope_manager.get_scope(self.modname)
@@ -129,6 +137,42 @@ class PreProcessor(ProcessingBase):
 
         super().visit_Module(node)
 
+    def prefetch_imports(self, node):
+        """
+        Queues the modules imported anywhere in the module to be read
+        and parsed in the background, before they are analyzed
+        """
+        if not self.source_manager.is_prefetching():
+            return
+
+        filenames = []
+        for item in ast.walk(node):
+            if isinstance(item, ast.Import):
+                names = [alias.name for alias in item.names]
+                level = 0
+            elif isinstance(item, ast.ImportFrom):
+                names = [
+                    (
+                        utils.join_ns(item.module, alias.name)
+                        if item.module
+                        else alias.name
+                    )
+                    for alias in item.names
+                ]
+                level = item.level
+            else:
+                continue
+
+            for name in names:
+                fname = self.import_manager.find_import(name, level)
+                if (
+                    fname
+                    and fname.endswith(".py")
+                    and self.import_manager.get_mod_dir() in fname
+                ):
+                    filenames.append(fname)
+        self.source_manager.prefetch(filenames)
+
     def visit_Import(self, node, prefix="", level=0):
         """
         For imports of the form
@@ -187,9 +231,7 @@ class PreProcessor(ProcessingBase):
                 name = name.split(".")[0]
                 target = target.split(".")[0]
             # add an external def for the name
-            defi = self.def_manager.get(name)
-            if not defi:
-                defi = self.def_manager.create(name, utils.constants.EXT_DEF)
+            defi = self.def_manager.handle_external_def(name)
             scope = self.scope_manager.get_scope(self.current_ns)
             if target != "*":
                 # add a def for the target that points to the name
@@ -278,12 +320,14 @@ class PreProcessor(ProcessingBase):
                 ):
                     is_static_method = True
 
+        # the AST is shared among passes so it should not be modified
+        args = node.args.args
         if (
             current_def.get_type() == utils.constants.CLS_DEF
             and not is_static_method
-            and node.args.args
+            and args
         ):
-            arg_ns = utils.join_ns(fn_def.get_ns(), node.args.args[0].arg)
+            arg_ns = utils.join_ns(fn_def.get_ns(), args[0].arg)
             arg_def = self.def_manager.get(arg_ns)
             if not arg_def:
                 arg_def = self.def_manager.create(arg_ns, utils.constants.NAME_DEF)
@@ -292,9 +336,9 @@ class PreProcessor(ProcessingBase):
             self.scope_manager.handle_assign(
                 fn_def.get_ns(), arg_def.get_name(), arg_def
             )
-            node.args.args = node.args.args[1:]
+            args = args[1:]
 
-        for pos, arg in enumerate(node.args.args):
+        for pos, arg in enumerate(args):
             arg_ns = utils.join_ns(fn_def.get_ns(), arg.arg)
             name_pointer.add_pos_arg(pos, arg.arg, arg_ns)
             defs_to_create.append(arg_ns)
@@ -367,23 +411,19 @@ class PreProcessor(ProcessingBase):
         # if it is not a name there's nothing we can do here
         # ModuleVisitor will be able to resolve those calls
         # since it'll have the name tracking information
-        if not isinstance(node.func, ast.Name):
-            return
-
-        utils.join_ns(self.current_ns, node.func.id)
-
-        defi = self.scope_manager.get_def(self.current_ns, node.func.id)
-        if not defi:
-            return
+        defi = None
+        if isinstance(node.func, ast.Name):
+            defi = self.scope_manager.get_def(self.current_ns, node.func.id)
 
-        if defi.get_type() == utils.constants.CLS_DEF:
+        if defi and defi.get_type() == utils.constants.CLS_DEF:
             defi = self.def_manager.get(
                 utils.join_ns(defi.get_ns(), utils.constants.CLS_INIT)
             )
-            if not defi:
-                return
 
-        self.iterate_call_args(defi, node)
+        if defi:
+            self.iterate_call_args(defi, node)
+        else:
+            self.visit_call_args(node)
 
     def visit_Lambda(self, node):
         # The name of a lambda is defined by the counter of the current scope
@@ -421,4 +461,4 @@ class PreProcessor(ProcessingBase):
             self.import_manager.create_node(self.modname)
             self.import_manager.set_filepath(self.modname, self.filename)
 
-        self.visit(ast.parse(self.contents, self.filename))
+        self.visit(self.get_tree())
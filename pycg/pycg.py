@@ -19,15 +19,22 @@
 # under the License.
 #
 import os
+import time
 
 from pycg import utils
+from pycg.machinery.cache import AnalysisCache
 from pycg.machinery.callgraph import CallGraph
 from pycg.machinery.classes import ClassManager
+from pycg.machinery.contributions import ContributionTable
 from pycg.machinery.definitions import DefinitionManager
-from pycg.machinery.imports import ImportManager
+from pycg.machinery.imports import FileSystemImportManager
 from pycg.machinery.key_err import KeyErrors
+from pycg.machinery.models import ModelManager
 from pycg.machinery.modules import ModuleManager
 from pycg.machinery.scopes import ScopeManager
+from pycg.machinery.sources import SourceManager
+from pycg.machinery.stats import Stats
+from pycg.machinery.worklist import Worklist
 from pycg.processing.cgprocessor import CallGraphProcessor
 from pycg.processing.keyerrprocessor import KeyErrProcessor
 from pycg.processing.postprocessor import PostProcessor
@@ -35,78 +42,194 @@ from pycg.processing.preprocessor import PreProcessor
 
 
 class CallGraphGenerator(object):
-    def __init__(self, entry_points, package, max_iter, operation):
+    def __init__(
+        self,
+        entry_points,
+        package,
+        max_iter,
+        operation,
+        max_trees=None,
+        cache_dir=None,
+        time_budget=None,
+        max_external_depth=utils.constants.MAX_EXTERNAL_DEPTH,
+        max_externals=None,
+        shard=None,
+        models=True,
+        prefetch=0,
+    ):
         self.entry_points = entry_points
         self.package = package
-        self.state = None
         self.max_iter = max_iter
         self.operation = operation
+        self.max_trees = max_trees
+        self.cache_dir = cache_dir
+        self.time_budget = time_budget
+        self.max_external_depth = max_external_depth
+        self.max_externals = max_externals
+        self.shard = shard
+        self.models = models
+        self.prefetch = prefetch
         self.setUp()
 
     def setUp(self):
-        self.import_manager = ImportManager()
-        self.scope_manager = ScopeManager()
-        self.def_manager = DefinitionManager()
+        self.source_manager = SourceManager(max_trees=self.max_trees)
+        self.cache = AnalysisCache(self.cache_dir) if self.cache_dir else None
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the state of the analysis, so that it can be run again.
+        The sources read so far are kept, and only the files that
+        changed since are read and parsed again.
+        """
+        self.worklist = None
+        # the definitions created while building the call graph
+        self.final_defs = set()
+        self.iterations = 0
+        self.deadline = None
+        self.incomplete = None
+        self.import_manager = FileSystemImportManager(self.shard)
+        self.contributions = ContributionTable()
+        self.scope_manager = ScopeManager(self.contributions)
+        self.def_manager = DefinitionManager(
+            self.max_external_depth,
+            self.max_externals,
+            ModelManager() if self.models else None,
+            self.contributions,
+        )
         self.class_manager = ClassManager()
         self.module_manager = ModuleManager()
         self.cg = CallGraph()
         self.key_errs = KeyErrors()
-
-    def extract_state(self):
-        state = {}
-        state["defs"] = {}
-        for key, defi in self.def_manager.get_defs().items():
-            state["defs"][key] = {
-                "names": defi.get_name_pointer().get().copy(),
-                "lit": defi.get_lit_pointer().get().copy(),
-            }
-
-        state["scopes"] = {}
-        for key, scope in self.scope_manager.get_scopes().items():
-            state["scopes"][key] = set([
-                x.get_ns() for (_, x) in scope.get_defs().items()
-            ])
-
-        state["classes"] = {}
-        for key, ch in self.class_manager.get_classes().items():
-            state["classes"][key] = ch.get_mro().copy()
-        return state
+        self.stats = Stats(self.get_counts)
+
+    def get_counts(self):
+        return {
+            "definitions": len(self.def_manager.get_defs()),
+            "edges": sum(len(dests) for dests in self.cg.get().values()),
+        }
+
+    def get_stats(self):
+        """
+        Returns the wall time, CPU time, peak memory and counts recorded
+        for each phase and module of the run, along with the counters
+        of the caches used by the analysis
+        """
+        closure = self.def_manager.closure
+        counters = {
+            "iterations": self.iterations,
+            "incomplete": self.incomplete,
+            "modules": len(self.module_manager.get_internal_modules()),
+            "propagation_rounds": self.def_manager.propagation_rounds,
+            "propagations": self.def_manager.propagations,
+            "closure_refreshes": closure.refreshes,
+            "closure_recomputed": closure.recomputed,
+            "closure_time": closure.refresh_time,
+            "external_attributes": len(self.def_manager.externals),
+            "external_attributes_dropped": self.def_manager.externals.dropped,
+            "scope_lookup_hits": self.scope_manager.hits,
+            "scope_lookup_misses": self.scope_manager.misses,
+            "tree_cache_hits": self.source_manager.hits,
+            "tree_cache_misses": self.source_manager.misses,
+            "sources_prefetched": self.source_manager.prefetched,
+        }
+        if self.cache is not None:
+            counters["analysis_cache_hits"] = self.cache.hits
+            counters["analysis_cache_misses"] = self.cache.misses
+        counters.update(self.get_counts())
+
+        return {
+            "phases": self.stats.get_phases(),
+            "modules": self.stats.get_modules(),
+            "total": self.stats.get_total(),
+            "counters": counters,
+        }
 
     def reset_counters(self):
         for key, scope in self.scope_manager.get_scopes().items():
             scope.reset_counters()
 
-    def has_converged(self):
-        if not self.state:
-            return False
+    def pop_changes(self):
+        """
+        Returns the keys (definition, scope and class namespaces)
+        that changed since the last call
+        """
+        return (
+            self.def_manager.pop_changes()
+            | self.scope_manager.pop_changes()
+            | self.class_manager.pop_changes()
+        )
 
-        curr_state = self.extract_state()
-
-        # check defs
-        for key, defi in curr_state["defs"].items():
-            if key not in self.state["defs"]:
-                return False
-            if defi["names"] != self.state["defs"][key]["names"]:
-                return False
-            if defi["lit"] != self.state["defs"][key]["lit"]:
-                return False
-
-        # check scopes
-        for key, scope in curr_state["scopes"].items():
-            if key not in self.state["scopes"]:
-                return False
-            if scope != self.state["scopes"][key]:
-                return False
-
-        # check classes
-        for key, ch in curr_state["classes"].items():
-            if key not in self.state["classes"]:
-                return False
-            if ch != self.state["classes"][key]:
-                return False
+    def check_budget(self, phase):
+        """
+        Returns whether the time budget ran out, recording the phase
+        it ran out in as the reason the analysis is incomplete
+        """
+        if self.incomplete is not None:
+            return True
+        if self.deadline is None or time.monotonic() <= self.deadline:
+            return False
 
+        self.incomplete = "time budget of {} s exceeded in {}".format(
+            self.time_budget, phase
+        )
         return True
 
+    def get_key_state(self, key):
+        """
+        Returns what the definition, scope and class named `key` hold, along
+        with the definition the scope entry named `key` points to
+        """
+        state = []
+        defi = self.def_manager.get_defs().get(key)
+        if defi:
+            name_pointer = defi.get_name_pointer()
+            state.append(
+                (
+                    defi.get_type(),
+                    frozenset(name_pointer.get()),
+                    frozenset(defi.get_lit_pointer().get()),
+                    frozenset(
+                        (name, frozenset(items))
+                        for name, items in name_pointer.get_args().items()
+                    ),
+                    frozenset(name_pointer.get_pos_names().items()),
+                )
+            )
+        scope = self.scope_manager.get_scopes().get(key)
+        if scope:
+            state.append(
+                (
+                    scope.parent.get_ns() if scope.parent else None,
+                    frozenset(
+                        (name, entry.get_ns())
+                        for name, entry in scope.get_defs().items()
+                    ),
+                )
+            )
+        cls = self.class_manager.get_classes().get(key)
+        if cls:
+            state.append(tuple(cls.get_mro()))
+        parent_ns, _, name = key.rpartition(".")
+        parent = self.scope_manager.get_scopes().get(parent_ns)
+        if parent and name in parent.get_defs():
+            state.append(parent.get_defs()[name].get_ns())
+        return state
+
+    def get_affected(self, changes):
+        """
+        Returns the changed keys along with the namespaces
+        whose transitive closure might include a changed one
+        """
+        affected = set(changes)
+        stack = list(changes)
+        while stack:
+            for ns in self.def_manager.closure.get_pointed_by(stack.pop()):
+                if ns not in affected:
+                    affected.add(ns)
+                    stack.append(ns)
+        return affected
+
     def remove_import_hooks(self):
         self.import_manager.remove_hooks()
 
@@ -125,6 +248,70 @@ class CallGraphGenerator(object):
 
         return input_mod
 
+    def get_modules(self):
+        """
+        Returns the (module name, filename) pairs reachable from the entry
+        points, in the order a pass through the source code visits them
+        """
+        modules = []
+        modules_analyzed = set()
+
+        def add_module(modname, filename):
+            modules_analyzed.add(modname)
+            modules.append((modname, filename))
+            for imp in self.import_manager.get_imports(modname):
+                if imp in modules_analyzed:
+                    continue
+                fname = self.import_manager.get_filepath(imp)
+                if (
+                    not fname
+                    or not fname.endswith(".py")
+                    or self.import_manager.get_mod_dir() not in fname
+                ):
+                    continue
+                add_module(imp, fname)
+
+        for entry_point in self.entry_points:
+            input_mod = self._get_mod_name(entry_point, self.package)
+            if input_mod and input_mod not in modules_analyzed:
+                add_module(input_mod, os.path.abspath(entry_point))
+
+        return modules
+
+    def set_worklist(self, worklist):
+        self.def_manager.set_worklist(worklist)
+        self.scope_manager.set_worklist(worklist)
+        self.class_manager.set_worklist(worklist)
+
+    def do_worklist_pass(self, cls, modules, *args, **kwargs):
+        """
+        Processes each module on its own, recording the keys it reads
+        on the worklist. Returns the number of modules processed.
+        """
+        filenames = dict(modules)
+        modules_analyzed = set(filenames.keys())
+        pending = self.worklist.pop([modname for modname, _ in modules])
+        processed = 0
+        for modname in pending:
+            if self.check_budget("{} of {}".format(cls.__name__, modname)):
+                break
+            processor = cls(
+                filenames[modname],
+                modname,
+                modules_analyzed=modules_analyzed,
+                source_manager=self.source_manager,
+                *args,
+                **kwargs,
+            )
+            self.worklist.start_reading(modname)
+            self.def_manager.set_current_mod(modname)
+            with self.stats.module(modname, cls.__name__):
+                processor.analyze()
+            self.def_manager.set_current_mod(None)
+            self.worklist.stop_reading()
+            processed += 1
+        return processed
+
     def do_pass(self, cls, install_hooks=False, *args, **kwargs):
         modules_analyzed = set()
         for entry_point in self.entry_points:
@@ -147,10 +334,14 @@ class CallGraphGenerator(object):
                     input_file,
                     input_mod,
                     modules_analyzed=modules_analyzed,
+                    source_manager=self.source_manager,
                     *args,
                     **kwargs,
                 )
-                processor.analyze()
+                self.def_manager.set_current_mod(input_mod)
+                with self.stats.module(input_mod, cls.__name__):
+                    processor.analyze()
+                self.def_manager.set_current_mod(None)
                 modules_analyzed = modules_analyzed.union(
                     processor.get_modules_analyzed()
                 )
@@ -158,39 +349,456 @@ class CallGraphGenerator(object):
                 if install_hooks:
                     self.remove_import_hooks()
 
-    def analyze(self):
-        self.do_pass(
-            PreProcessor,
-            True,
-            self.import_manager,
-            self.scope_manager,
-            self.def_manager,
-            self.class_manager,
-            self.module_manager,
-        )
-        self.def_manager.complete_definitions()
+    def complete_definitions(self, iteration):
+        with self.stats.phase("complete_definitions", iteration=iteration):
+            if not self.def_manager.complete_definitions(self.deadline):
+                self.check_budget(
+                    "complete_definitions of iteration {}".format(iteration)
+                )
+
+    def analyze_program(self):
+        if self.prefetch > 0:
+            # the modules are read once, while they are preprocessed
+            self.source_manager.start_prefetch(self.prefetch)
+            self.source_manager.prefetch(
+                [e for e in self.entry_points if e.endswith(".py")]
+            )
 
+        try:
+            with self.stats.phase("preprocess"):
+                self.do_pass(
+                    PreProcessor,
+                    True,
+                    self.import_manager,
+                    self.scope_manager,
+                    self.def_manager,
+                    self.class_manager,
+                    self.module_manager,
+                )
+        finally:
+            self.source_manager.stop_prefetch()
+        self.complete_definitions(0)
+
+        # Iterate the source code until a fix-point is reached.
+        # After the first iteration only the modules that read
+        # something that changed are processed again.
+        modules = self.get_modules()
+        self.worklist = Worklist()
+        for modname, _ in modules:
+            self.worklist.add(modname)
+
+        self.pop_changes()
+        self.iterate(modules)
+
+    def iterate(self, modules, changes=(), states=None):
+        """
+        Processes the modules pending on the worklist, and then the modules
+        that read something that changed, until a fix-point is reached.
+        The keys in `changes` changed before the first iteration. Those
+        back in their state before, in `states`, are only treated as
+        changed by the modules processed since, as the others read that.
+        Returns the modules processed.
+        """
+        states = states or {}
+        processed = set()
+        self.set_worklist(self.worklist)
         iter_cnt = 0
-        while (self.max_iter < 0 or iter_cnt < self.max_iter) and (
-            not self.has_converged()
+        while (
+            (self.max_iter < 0 or iter_cnt < self.max_iter)
+            and not self.worklist.is_empty()
+            and not self.check_budget("iteration {}".format(iter_cnt + 1))
         ):
-            self.state = self.extract_state()
             self.reset_counters()
-            self.do_pass(
-                PostProcessor,
-                False,
-                self.import_manager,
-                self.scope_manager,
-                self.def_manager,
-                self.class_manager,
-                self.module_manager,
-            )
+            processed |= self.worklist.get_pending()
+            closure_time = self.def_manager.closure.refresh_time
+            with self.stats.phase("postprocess", iteration=iter_cnt + 1) as record:
+                record["modules"] = self.do_worklist_pass(
+                    PostProcessor,
+                    modules,
+                    self.import_manager,
+                    self.scope_manager,
+                    self.def_manager,
+                    self.class_manager,
+                    self.module_manager,
+                )
+                record["closure_time"] = (
+                    self.def_manager.closure.refresh_time - closure_time
+                )
 
-            self.def_manager.complete_definitions()
+            self.complete_definitions(iter_cnt + 1)
+            changes = self.pop_changes() | set(changes)
+            same = {
+                key
+                for key in changes
+                if key in states and states[key] == self.get_key_state(key)
+            }
+            self.worklist.mark_changed(self.get_affected(changes - same))
+            self.worklist.mark_changed(self.get_affected(same), processed)
+            changes = ()
             iter_cnt += 1
+        self.iterations = iter_cnt
+        self.set_worklist(None)
+        return processed
+
+    def get_importers(self, modnames):
+        """Returns the modules importing any of `modnames` directly"""
+        importers = set()
+        for modname, _ in self.get_modules():
+            if not modnames.isdisjoint(self.import_manager.get_imports(modname)):
+                importers.add(modname)
+        return importers
+
+    def get_keys(self, modnames):
+        """
+        Returns the keys owned by the modules,
+        along with those processing them added to
+        """
+        get_owner = self.contributions.get_owner
+        keys = set()
+        for modname in modnames:
+            for kind, ns, slot, _ in self.contributions.get_contributed(modname):
+                keys.add(ns)
+                if kind == ContributionTable.SCOPE:
+                    keys.add(utils.join_ns(ns, slot))
+        for ns in self.def_manager.get_defs():
+            if get_owner(ns) in modnames:
+                keys.add(ns)
+        for ns, scope in self.scope_manager.get_scopes().items():
+            if get_owner(ns) in modnames:
+                keys.add(ns)
+                keys.update(utils.join_ns(ns, name) for name in scope.get_defs())
+        for ns in self.class_manager.get_classes():
+            if get_owner(ns) in modnames:
+                keys.add(ns)
+        return keys
+
+    def drop_modules(self, modnames):
+        """
+        Removes the definitions, scopes and classes owned by the modules,
+        along with what processing them added to those of the other
+        modules, so that they can be analyzed again. Returns the keys
+        that changed.
+        """
+        get_owner = self.contributions.get_owner
+        for kind, ns, slot, item in self.contributions.drop(modnames):
+            if kind == ContributionTable.SCOPE:
+                self.scope_manager.remove_def(ns, slot)
+            elif kind == ContributionTable.DEF:
+                self.def_manager.remove(ns)
+            else:
+                self.def_manager.discard(kind, ns, slot, item)
+
+        for ns in list(self.def_manager.get_defs()):
+            if get_owner(ns) in modnames:
+                self.def_manager.remove(ns)
+        for ns in list(self.scope_manager.get_scopes()):
+            if get_owner(ns) in modnames:
+                self.scope_manager.remove_scope(ns)
+        for ns in list(self.class_manager.get_classes()):
+            if get_owner(ns) in modnames:
+                self.class_manager.remove(ns)
+        # the modules are kept, as they are created again in place
+        for modname in modnames:
+            self.import_manager.remove_node(modname)
+        return self.pop_changes()
+
+    def restore_contributions(self, modnames):
+        """
+        Adds back what processing the other modules added to the
+        namespaces of the modules, once they are created again
+        """
+        defs = self.def_manager.get_defs()
+        scopes = self.scope_manager.get_scopes()
+        received = self.contributions.get_received(modnames)
+        # the definitions go first, as the other contributions point to them
+        for kind, ns, _, item in received:
+            if kind == ContributionTable.DEF and ns not in defs:
+                self.def_manager.create(ns, item)
+
+        for kind, ns, slot, item in received:
+            if kind == ContributionTable.SCOPE:
+                if ns in scopes and item in defs and slot not in scopes[ns].get_defs():
+                    scopes[ns].add_def(slot, defs[item])
+            elif kind == ContributionTable.DEF or ns not in defs:
+                continue
+            elif kind == ContributionTable.NAMES:
+                defs[ns].get_name_pointer().add(item)
+            elif kind == ContributionTable.LITS:
+                defs[ns].get_lit_pointer().add(item)
+            else:
+                defs[ns].get_name_pointer().add_arg(slot, item)
+
+    def rebind_scopes(self):
+        """
+        Points the scope entries to the definitions created again for
+        their namespaces, and removes those whose definition was removed
+        """
+        defs = self.def_manager.get_defs()
+        for scope in self.scope_manager.get_scopes().values():
+            for name, defi in list(scope.get_defs().items()):
+                current = defs.get(defi.get_ns())
+                if current is None:
+                    scope.remove_def(name)
+                elif current is not defi:
+                    scope.add_def(name, current)
+
+    def analyze_changes(self, modnames):
+        """
+        Analyzes again the modules `modnames`, whose source changed, along
+        with the modules importing them, keeping the state of the others.
+        The definitions, scopes and classes they own are dropped, along
+        with what they added to those of the other modules, and they are
+        preprocessed again. The fix-point then starts from them and from
+        the modules reading something that changed, instead of all.
+
+        What other modules derived from the state dropped, such as a value
+        passed on through one of their definitions, is kept, so the call
+        graph might have more edges than one analyzed from scratch.
+        Returns the modules processed until the fix-point.
+        """
+        filenames = dict(self.get_modules())
+        modnames = set(modnames) & set(filenames)
+        dirty = modnames | self.get_importers(modnames)
+
+        with self.stats.phase("drop") as record:
+            record["modules"] = len(dirty)
+            # the definitions created while building the call graph
+            # were not there when the fix-point was reached
+            keys = self.get_keys(dirty) | self.final_defs
+            for ns in self.final_defs:
+                self.def_manager.remove(ns)
+            self.final_defs = set()
+            states = {key: self.get_key_state(key) for key in keys}
+            changes = self.drop_modules(dirty)
+
+        # The modules are preprocessed in the order they were first,
+        # so that those importing each other see the same state
+        order = list(self.module_manager.get_internal_modules())
+        analyzed = set(filenames) - dirty
+        with self.stats.phase("preprocess"):
+            self.import_manager.install_hooks()
+            try:
+                for modname in order:
+                    if modname not in dirty or modname in analyzed:
+                        continue
+                    processor = PreProcessor(
+                        filenames[modname],
+                        modname,
+                        self.import_manager,
+                        self.scope_manager,
+                        self.def_manager,
+                        self.class_manager,
+                        self.module_manager,
+                        modules_analyzed=analyzed,
+                        source_manager=self.source_manager,
+                    )
+                    self.def_manager.set_current_mod(modname)
+                    with self.stats.module(modname, PreProcessor.__name__):
+                        processor.analyze()
+                    self.def_manager.set_current_mod(None)
+                    analyzed |= processor.get_modules_analyzed()
+            finally:
+                self.remove_import_hooks()
+            self.restore_contributions(dirty)
+            self.rebind_scopes()
+        self.complete_definitions(0)
+
+        # the modules added by the changes are processed too
+        modules = self.get_modules()
+        for modname, _ in modules:
+            if modname in dirty or modname not in filenames:
+                self.worklist.add(modname)
+        return self.iterate(modules, changes | self.pop_changes(), states)
+
+    def get_module_states(self):
+        """
+        Returns the state of each module at the fix-point: the definitions,
+        scopes and classes it owns, its import edges, the keys it read and
+        what processing it added to the others. The state owned by no module
+        is returned under None.
+        """
+        modnames = list(self.module_manager.get_internal_modules())
+        states = {}
+        for modname in modnames + [None]:
+            states[modname] = {"defs": [], "scopes": [], "classes": []}
+
+        get_owner = self.contributions.get_owner
+        for ns in self.def_manager.get_defs():
+            states[get_owner(ns)]["defs"].append(self.def_manager.get_state(ns))
+        for ns in self.scope_manager.get_scopes():
+            states[get_owner(ns)]["scopes"].append(self.scope_manager.get_state(ns))
+        for ns in self.class_manager.get_classes():
+            states[get_owner(ns)]["classes"].append(self.class_manager.get_state(ns))
+        for state in states.values():
+            for items in state.values():
+                items.sort()
+
+        def get_module(mod):
+            return mod.get_name(), mod.get_filename(), sorted(mod.get_methods().items())
+
+        def get_node(name):
+            node = self.import_manager.get_node(name)
+            return node["filename"], sorted(node["imports"])
+
+        for modname, mod in self.module_manager.get_internal_modules().items():
+            states[modname].update(
+                {
+                    "module": get_module(mod),
+                    "node": (
+                        get_node(modname)
+                        if self.import_manager.get_node(modname)
+                        else None
+                    ),
+                    "reads": sorted(self.worklist.get_reads(modname)),
+                    "contributed": sorted(
+                        self.contributions.get_contributed(modname), key=repr
+                    ),
+                    "symbols": self.source_manager.get_scopes(mod.get_filename()),
+                }
+            )
+
+        states[None].update(
+            {
+                "mod_dir": self.import_manager.get_mod_dir(),
+                "order": modnames,
+                "nodes": [
+                    (name, get_node(name))
+                    for name in sorted(self.import_manager.get_import_graph())
+                    if name not in states
+                ],
+                "external_modules": [
+                    get_module(mod)
+                    for _, mod in sorted(
+                        self.module_manager.get_external_modules().items()
+                    )
+                ],
+                "externals": sorted(self.def_manager.externals.depths.items()),
+                "contributed": sorted(
+                    self.contributions.get_contributed(None), key=repr
+                ),
+            }
+        )
+        return states
+
+    def load_module_states(self, states):
+        """Restores the managers from the states returned by get_module_states"""
+        shared = states[None]
+        self.import_manager.set_pkg(shared["mod_dir"])
+        self.worklist = Worklist()
+
+        def load_node(name, node):
+            filename, imports = node
+            self.import_manager.create_node(name)
+            self.import_manager.set_filepath(name, filename)
+            self.import_manager.get_node(name)["imports"] = set(imports)
+
+        def load_module(name, filename, methods, external=False):
+            mod = self.module_manager.create(name, filename, external)
+            for method, info in methods:
+                mod.add_method(method, info["first"], info["last"])
+
+        for name, node in shared["nodes"]:
+            load_node(name, node)
+        for name, filename, methods in shared["external_modules"]:
+            load_module(name, filename, methods, external=True)
+
+        contributed = {None: shared["contributed"]}
+        for modname in shared["order"]:
+            state = states[modname]
+            load_module(*state["module"])
+            if state["node"] is not None:
+                load_node(modname, state["node"])
+            self.worklist.set_reads(modname, state["reads"])
+            contributed[modname] = state["contributed"]
+            self.source_manager.set_scopes(state["module"][1], state["symbols"])
+        self.contributions.load(contributed)
+
+        self.def_manager.load([d for state in states.values() for d in state["defs"]])
+        self.def_manager.externals.depths.update(shared["externals"])
+        self.scope_manager.load(
+            [sc for state in states.values() for sc in state["scopes"]],
+            self.def_manager.get_defs(),
+        )
+        self.class_manager.load(
+            [cls for state in states.values() for cls in state["classes"]]
+        )
+        self.cg = CallGraph()
+
+    def get_cache_key(self):
+        return self.cache.get_key(
+            self.entry_points,
+            self.package,
+            self.max_iter,
+            self.max_external_depth,
+            self.max_externals,
+            self.shard,
+            self.models,
+        )
+
+    def load_cached_state(self):
+        """
+        Restores the state of the managers at the fix-point from
+        the cache, and analyzes again the modules that changed since
+        """
+        if self.cache is None:
+            return False
+
+        with self.stats.phase("cache_load") as record:
+            entry = self.cache.load_modules(self.get_cache_key(), self.source_manager)
+            record["hit"] = entry is not None
+        if entry is None:
+            return False
+
+        states, changed = entry
+        self.load_module_states(states)
+        if changed:
+            # the scopes cached were built for the contents before the change
+            for modname in changed:
+                self.source_manager.remove(states[modname]["module"][1])
+            self.analyze_changes(changed)
+            self.store_cached_state()
+        return True
+
+    def store_cached_state(self):
+        if self.cache is None or self.incomplete:
+            return
+
+        filenames = {
+            modname: mod.get_filename()
+            for modname, mod in self.module_manager.get_internal_modules().items()
+        }
+        dirs = set(os.path.dirname(os.path.abspath(f)) for f in filenames.values())
+        if self.import_manager.index is not None:
+            dirs |= set(self.import_manager.index.listings)
+        with self.stats.phase("cache_store"):
+            self.cache.store_modules(
+                self.get_cache_key(),
+                self.get_module_states(),
+                filenames,
+                dirs,
+                self.source_manager,
+            )
+
+    def analyze(self):
+        """
+        Analyzes the program and builds its call graph. If a time budget
+        is set, the fix-point stops once it runs out and the call graph
+        is built from the state reached, reporting why in `incomplete`.
+        """
+        if self.time_budget is not None:
+            self.deadline = time.monotonic() + self.time_budget
+
+        if not self.load_cached_state():
+            self.analyze_program()
+            self.store_cached_state()
 
         self.reset_counters()
+        with self.stats.phase(self.operation):
+            self.do_final_pass()
+
+    def do_final_pass(self):
         if self.operation == utils.constants.CALL_GRAPH_OP:
+            defs = set(self.def_manager.get_defs())
             self.do_pass(
                 CallGraphProcessor,
                 False,
@@ -201,6 +809,7 @@ class CallGraphGenerator(object):
                 self.module_manager,
                 call_graph=self.cg,
             )
+            self.final_defs = set(self.def_manager.get_defs()) - defs
         elif self.operation == utils.constants.KEY_ERR_OP:
             self.do_pass(
                 KeyErrProcessor,
@@ -214,9 +823,54 @@ class CallGraphGenerator(object):
         else:
             raise Exception("Invalid operation: " + self.operation)
 
+    def update_call_graph(self, modnames):
+        """
+        Builds the call graph again for the modules `modnames`, as returned
+        by analyze_changes. The edges of the other modules are kept, as
+        nothing they read changed.
+        """
+        get_owner = self.contributions.get_owner
+        for name in list(self.cg.get()):
+            if get_owner(name) in modnames:
+                self.cg.remove_callees(name)
+        # the nodes of the modules, and the external ones,
+        # are added back if they are still called
+        for name in list(self.cg.get()):
+            if get_owner(name) in modnames | {None} and not self.cg.get_callers(name):
+                self.cg.remove_node(name)
+
+        self.reset_counters()
+        defs = set(self.def_manager.get_defs())
+        filenames = dict(self.get_modules())
+        with self.stats.phase(self.operation):
+            for modname in filenames:
+                if modname not in modnames:
+                    continue
+                processor = CallGraphProcessor(
+                    filenames[modname],
+                    modname,
+                    self.import_manager,
+                    self.scope_manager,
+                    self.def_manager,
+                    self.class_manager,
+                    self.module_manager,
+                    modules_analyzed=set(filenames),
+                    source_manager=self.source_manager,
+                    call_graph=self.cg,
+                )
+                self.def_manager.set_current_mod(modname)
+                with self.stats.module(modname, CallGraphProcessor.__name__):
+                    processor.analyze()
+                self.def_manager.set_current_mod(None)
+        self.final_defs = set(self.def_manager.get_defs()) - defs
+
     def output(self):
         return self.cg.get()
 
+    def output_incomplete(self):
+        """Returns why the analysis stopped before the fix-point, if it did"""
+        return self.incomplete
+
     def output_key_errs(self):
         return self.key_errs.get()
 
@@ -0,0 +1,290 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from pycg.pycg import CallGraphGenerator
+from pycg.utils.constants import CALL_GRAPH_OP
+
+
+class AnalysisServer(object):
+    """
+    Keeps the state of an analysis in memory and answers queries on its
+    call graph. Files reported as changed mark the analysis as outdated
+    if they were analyzed, or if adding or removing them might change how
+    imports resolve. On the next query, the modules whose files changed
+    are analyzed again along with the modules importing them, keeping
+    the state of the others, and the call graph is built again for the
+    modules the fix-point processed. If a file was added or removed, or
+    the last analysis failed, the analysis is run again from scratch.
+    """
+
+    def __init__(self, entry_points, package, max_iter=-1, max_trees=None):
+        self.entry_points = [os.path.abspath(e) for e in entry_points]
+        self.generator = CallGraphGenerator(
+            self.entry_points, package, max_iter, CALL_GRAPH_OP, max_trees=max_trees
+        )
+        self.outdated = True
+        self.analyses = 0
+        self.filenames = set()
+        # filename -> name of the module analyzed from it
+        self.modnames = {}
+        # the modules changed since the last analysis, or None
+        # if it has to be run again from scratch
+        self.changed = None
+        self.lock = threading.Lock()
+        self.commands = {
+            "ping": self.do_ping,
+            "changed": self.do_changed,
+            "callees": self.do_callees,
+            "callers": self.do_callers,
+            "reachable": self.do_reachable,
+            "reaching": self.do_reaching,
+            "path": self.do_path,
+            "graph": self.do_graph,
+            "stats": self.do_stats,
+        }
+
+    def analyze(self):
+        """Runs the analysis again if it is outdated"""
+        if not self.outdated:
+            return
+
+        if self.changed is None:
+            self.generator.reset()
+            self.generator.analyze()
+        else:
+            processed = self.generator.analyze_changes(self.changed)
+            self.generator.update_call_graph(processed)
+
+        self.filenames = set(self.entry_points)
+        self.modnames = {}
+        for modname, filename in self.generator.get_modules():
+            self.modnames[os.path.abspath(filename)] = modname
+        for mod in self.generator.module_manager.get_internal_modules().values():
+            if mod.get_filename():
+                self.filenames.add(os.path.abspath(mod.get_filename()))
+        self.outdated = False
+        self.changed = set()
+        self.analyses += 1
+
+    def is_affected(self, filename):
+        filename = os.path.abspath(filename)
+        if filename in self.filenames:
+            return True
+
+        index = self.generator.import_manager.index
+        return index is not None and index.is_outdated(filename)
+
+    def notify_changed(self, filenames):
+        """Returns the changed files that affect the analysis"""
+        affected = []
+        for filename in filenames:
+            self.generator.source_manager.remove(filename)
+            if not self.is_affected(filename):
+                continue
+            affected.append(filename)
+            modname = self.modnames.get(os.path.abspath(filename))
+            if modname is None or not os.path.exists(filename):
+                self.changed = None
+            elif self.changed is not None:
+                self.changed.add(modname)
+
+        if affected:
+            self.outdated = True
+        return affected
+
+    def get_node(self, request, key="name"):
+        name = request.get(key)
+        if name not in self.generator.output():
+            raise ServerError("Unknown node: {}".format(name))
+        return name
+
+    def do_ping(self, request):
+        return None
+
+    def do_changed(self, request):
+        files = request.get("files")
+        if not isinstance(files, list):
+            raise ServerError("Expected a list of files")
+        return self.notify_changed(files)
+
+    def do_callees(self, request):
+        self.analyze()
+        return sorted(self.generator.cg.get_callees(self.get_node(request)))
+
+    def do_callers(self, request):
+        self.analyze()
+        return sorted(self.generator.cg.get_callers(self.get_node(request)))
+
+    def do_reachable(self, request):
+        self.analyze()
+        return sorted(self.generator.cg.get_reachable(self.get_node(request)))
+
+    def do_reaching(self, request):
+        self.analyze()
+        return sorted(self.generator.cg.get_reaching(self.get_node(request)))
+
+    def do_path(self, request):
+        self.analyze()
+        return self.generator.cg.get_path(
+            self.get_node(request, "source"), self.get_node(request, "target")
+        )
+
+    def do_graph(self, request):
+        self.analyze()
+        return {
+            src: sorted(dsts) for src, dsts in sorted(self.generator.output().items())
+        }
+
+    def do_stats(self, request):
+        stats = self.generator.get_stats()
+        stats["counters"]["analyses"] = self.analyses
+        stats["counters"]["outdated"] = self.outdated
+        return stats
+
+    def process(self, request):
+        """Returns the response to a request"""
+        command = request.get("command")
+        if command not in self.commands:
+            return {"status": "error", "error": "Unknown command: {}".format(command)}
+
+        with self.lock:
+            try:
+                result = self.commands[command](request)
+            except ServerError as e:
+                return {"status": "error", "error": str(e)}
+            except Exception as e:
+                # the analysis failed, e.g. on a syntax error, and
+                # is run again from scratch on the next query
+                self.outdated = True
+                self.changed = None
+                return {
+                    "status": "error",
+                    "error": "{}: {}".format(type(e).__name__, e),
+                }
+        return {"status": "ok", "result": result}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Reads a JSON request per line and writes the response on a line"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Expected an object")
+            except ValueError as e:
+                response = {"status": "error", "error": "Invalid request: {}".format(e)}
+            else:
+                if request.get("command") == "shutdown":
+                    response = {"status": "ok", "result": None}
+                    # shutdown waits for serve_forever to return
+                    threading.Thread(target=self.server.shutdown).start()
+                else:
+                    response = self.server.analysis.process(request)
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, analysis):
+        self.analysis = analysis
+        super().__init__(path, RequestHandler)
+
+
+def remove_stale_socket(path):
+    """Removes the socket left by a server that is no longer running"""
+    if not os.path.exists(path):
+        return
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise ServerError("A server is already listening on {}".format(path))
+    finally:
+        sock.close()
+
+
+def serve(path, analysis, ready=None):
+    """
+    Analyzes the code and answers requests on the Unix socket `path`
+    until a shutdown request. `ready` is set once the socket accepts
+    connections.
+    """
+    remove_stale_socket(path)
+    analysis.analyze()
+
+    with UnixServer(path, analysis) as server:
+        os.chmod(path, 0o600)
+        if ready is not None:
+            ready.set()
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
+
+
+class Client(object):
+    """Sends requests to a server listening on the Unix socket `path`"""
+
+    def __init__(self, path, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.rfile = self.sock.makefile("rb")
+
+    def request(self, command, **kwargs):
+        """Returns the result of a request, or raises a ServerError"""
+        kwargs["command"] = command
+        self.sock.sendall(json.dumps(kwargs).encode() + b"\n")
+        line = self.rfile.readline()
+        if not line:
+            raise ServerError("Connection closed by the server")
+
+        response = json.loads(line)
+        if response["status"] != "ok":
+            raise ServerError(response["error"])
+        return response["result"]
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ServerError(Exception):
+    pass
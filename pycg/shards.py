@@ -0,0 +1,389 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pycg import utils
+from pycg.machinery.cache import AnalysisCache
+from pycg.machinery.sources import SourceManager
+from pycg.pycg import CallGraphGenerator
+from pycg.utils.constants import CALL_GRAPH_OP
+
+# the definitions a name can resolve to in a summary
+SUMMARY_DEF_TYPES = [
+    utils.constants.FUN_DEF,
+    utils.constants.CLS_DEF,
+    utils.constants.MOD_DEF,
+    utils.constants.EXT_DEF,
+]
+
+
+def find_shards(root):
+    """
+    Returns the entry points of each top-level package
+    and module under `root`, keyed by its name
+    """
+    shards = {}
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if name.startswith("."):
+            continue
+        if os.path.isdir(path):
+            entry_points = sorted(
+                glob.glob(os.path.join(path, "**", "*.py"), recursive=True)
+            )
+            if entry_points:
+                shards[name] = entry_points
+        elif name.endswith(".py"):
+            shards[name[: -len(".py")]] = [path]
+    return shards
+
+
+def get_summary(generator):
+    """
+    Returns what the other shards need to resolve their calls to the
+    shard analyzed by `generator`: its modules, functions and the MRO of
+    its classes, along with the definitions that the names of its modules
+    and classes and the return values of its functions point to
+    """
+    def_manager = generator.def_manager
+    closure = def_manager.transitive_closure()
+
+    def get_targets(ns):
+        return sorted(
+            target
+            for target in closure.get(ns, ())
+            if def_manager.get(target)
+            and def_manager.get(target).get_type() in SUMMARY_DEF_TYPES
+        )
+
+    modules = sorted(generator.module_manager.get_internal_modules())
+    classes = {
+        cls: node.get_mro()
+        for cls, node in sorted(generator.class_manager.get_classes().items())
+    }
+    functions = []
+    names = {}
+    returns = {}
+    scopes = set(modules) | set(classes)
+    for ns, defi in sorted(def_manager.get_defs().items()):
+        targets = get_targets(ns)
+        if defi.is_function_def() and targets == [ns]:
+            functions.append(ns)
+            return_targets = get_targets(utils.join_ns(ns, utils.constants.RETURN_NAME))
+            if return_targets:
+                returns[ns] = return_targets
+        elif ns.rpartition(".")[0] in scopes and targets and targets != [ns]:
+            names[ns] = targets
+
+    return {
+        "modules": modules,
+        "functions": functions,
+        "classes": classes,
+        "names": names,
+        "returns": returns,
+    }
+
+
+def analyze_shard(
+    root,
+    name,
+    entry_points,
+    max_iter=-1,
+    cache=None,
+    time_budget=None,
+    max_external_depth=utils.constants.MAX_EXTERNAL_DEPTH,
+    max_externals=None,
+    models=True,
+):
+    """
+    Analyzes the shard `name` on its own, treating the other shards as
+    external, and returns its call graph and summary. The results are
+    stored in the AnalysisCache `cache`, until any of the analyzed
+    modules changes.
+    """
+    if cache is not None:
+        key = cache.get_key(
+            entry_points,
+            root,
+            "shard",
+            name,
+            max_iter,
+            max_external_depth,
+            max_externals,
+            models,
+        )
+        result = cache.load(key, SourceManager())
+        if result is not None:
+            result["cached"] = True
+            return result
+
+    generator = CallGraphGenerator(
+        entry_points,
+        root,
+        max_iter,
+        CALL_GRAPH_OP,
+        time_budget=time_budget,
+        max_external_depth=max_external_depth,
+        max_externals=max_externals,
+        shard=name,
+        models=models,
+    )
+    generator.analyze()
+    result = {
+        "shard": name,
+        "graph": {src: sorted(dsts) for src, dsts in generator.output().items()},
+        "summary": get_summary(generator),
+        "incomplete": generator.output_incomplete(),
+        "cached": False,
+    }
+
+    if cache is not None and not result["incomplete"]:
+        filenames = [
+            mod.get_filename()
+            for mod in generator.module_manager.get_internal_modules().values()
+            if mod.get_filename()
+        ]
+        cache.store(key, result, filenames, generator.source_manager)
+    return result
+
+
+class Linker(object):
+    """
+    Resolves the calls of a shard to the definitions of the other shards,
+    which it sees as external names such as `pkg.mod.func().method`,
+    through the summaries of the shards instead of their code
+    """
+
+    def __init__(self, summaries):
+        self.modules = set()
+        self.functions = set()
+        self.mros = {}
+        self.names = {}
+        self.returns = {}
+        for summary in summaries:
+            self.modules.update(summary["modules"])
+            self.functions.update(summary["functions"])
+            self.mros.update(summary["classes"])
+            self.names.update(summary["names"])
+            self.returns.update(summary["returns"])
+        self.resolved = {}
+        # the lowest depth, in the names being resolved, of a name
+        # reached again while it was being resolved
+        self.cut = None
+
+    def is_internal(self, ns):
+        return ns in self.functions or ns in self.mros or ns in self.modules
+
+    def is_known(self, ns):
+        return self.is_internal(ns) or ns in self.names
+
+    def lookup(self, ns, active):
+        """Returns the definitions a known namespace points to"""
+        if ns not in self.names:
+            return set([ns])
+
+        targets = set()
+        for target in self.names[ns]:
+            if target == ns or self.is_internal(target):
+                targets.add(target)
+            else:
+                # re-exported from another shard, or external
+                targets |= self.resolve(target, active)
+        return targets
+
+    def get_attribute(self, ns, attr, active):
+        """Returns the definitions the attribute `attr` of `ns` points to"""
+        if ns in self.functions:
+            # an attribute of a call to the function
+            targets = set()
+            for target in self.returns.get(ns, ()):
+                if not self.is_internal(target):
+                    target_names = self.resolve(target, active)
+                else:
+                    target_names = [target]
+                for name in target_names:
+                    targets |= self.get_attribute(name, attr, active)
+            return targets
+
+        if not self.is_internal(ns):
+            return self.resolve(utils.join_ns(ns, attr), active)
+
+        for item in self.mros.get(ns, [ns]):
+            item_attr = utils.join_ns(item, attr)
+            if self.is_known(item_attr):
+                return self.lookup(item_attr, active)
+            if not self.is_internal(item):
+                # an external base class
+                return self.resolve(item_attr, active)
+        return set()
+
+    def resolve(self, name, active=None):
+        """
+        Returns the definitions the name points to, the name itself if it
+        is external to every shard, or nothing if the shards that define
+        it have no such definition. `active` maps the names being resolved
+        to their depth. A name reached again resolves to nothing there, so
+        the names resolved since it was are only cached once it is.
+        """
+        if name in self.resolved:
+            return self.resolved[name]
+        if active is None:
+            active = {}
+        if name in active:
+            if self.cut is None or active[name] < self.cut:
+                self.cut = active[name]
+            return set()
+        depth = len(active)
+        active[name] = depth
+        outer_cut = self.cut
+        self.cut = None
+
+        parts = name.split(".")
+        for idx in range(len(parts), 0, -1):
+            prefix = ".".join(parts[:idx])
+            if self.is_known(prefix):
+                targets = self.lookup(prefix, active)
+                for attr in parts[idx:]:
+                    attr_targets = set()
+                    for target in targets:
+                        attr_targets |= self.get_attribute(target, attr, active)
+                    targets = attr_targets
+                break
+        else:
+            targets = set([name])
+
+        del active[name]
+        cut = self.cut
+        if cut is None or cut >= depth:
+            self.resolved[name] = targets
+            cut = outer_cut
+        elif outer_cut is not None:
+            cut = min(cut, outer_cut)
+        self.cut = cut
+        return targets
+
+    def get_callees(self, name):
+        """Returns the nodes a call to `name` leads to"""
+        if name in self.functions:
+            return set([name])
+
+        callees = set()
+        for target in self.resolve(name):
+            if target in self.mros:
+                for init in self.get_attribute(target, utils.constants.CLS_INIT, {}):
+                    if init in self.functions or not self.is_internal(init):
+                        callees.add(init)
+            elif target in self.functions or not self.is_internal(target):
+                callees.add(target)
+        return callees
+
+    def link(self, graphs):
+        """Returns the union of the call graphs of the shards, linked"""
+        output = {}
+        for graph in graphs:
+            for src, dsts in graph.items():
+                if not dsts and not self.is_internal(src):
+                    # an external node, kept only if a call still leads to it
+                    continue
+                callees = output.setdefault(src, set())
+                for dst in dsts:
+                    for callee in self.get_callees(dst):
+                        callees.add(callee)
+                        output.setdefault(callee, set())
+        return output
+
+
+class ShardedAnalysis(object):
+    """
+    Analyzes each top-level package and module under `root` on its own,
+    in `workers` processes, and links their call graphs through the
+    summaries of the shards. The call graph of a shard misses the calls
+    made through functions passed to other shards, as a summary does
+    not record what a function does with its arguments.
+    """
+
+    def __init__(
+        self,
+        root,
+        workers=1,
+        cache_dir=None,
+        max_iter=-1,
+        time_budget=None,
+        max_external_depth=utils.constants.MAX_EXTERNAL_DEPTH,
+        max_externals=None,
+        models=True,
+    ):
+        self.root = os.path.abspath(root)
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.max_iter = max_iter
+        self.time_budget = time_budget
+        self.max_external_depth = max_external_depth
+        self.max_externals = max_externals
+        self.models = models
+        self.results = []
+        self.cg = None
+
+    def analyze(self):
+        shards = find_shards(self.root)
+        cache = None
+        if self.cache_dir:
+            cache = AnalysisCache(self.cache_dir)
+            # hashed once, instead of in every shard
+            cache.get_analyzer_hash()
+        args = [
+            (
+                self.root,
+                name,
+                entry_points,
+                self.max_iter,
+                cache,
+                self.time_budget,
+                self.max_external_depth,
+                self.max_externals,
+                self.models,
+            )
+            for name, entry_points in shards.items()
+        ]
+        if self.workers > 1 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                self.results = list(executor.map(analyze_shard, *zip(*args)))
+        else:
+            self.results = [analyze_shard(*a) for a in args]
+
+        linker = Linker(result["summary"] for result in self.results)
+        self.cg = linker.link(result["graph"] for result in self.results)
+
+    def output(self):
+        return self.cg
+
+    def output_incomplete(self):
+        """Returns why the analysis of each shard that stopped early did"""
+        return {
+            result["shard"]: result["incomplete"]
+            for result in self.results
+            if result["incomplete"]
+        }
+
+    def output_summaries(self):
+        return {result["shard"]: result["summary"] for result in self.results}
@@ -18,8 +18,29 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import os
+import tempfile
 from unittest import TestCase
 
 
 class TestBase(TestCase):
-    pass
+    def create_tmpdir(self):
+        """
+        Creates a temporary directory, removed once the test is over,
+        which create_file writes to
+        """
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+        return self.tmpdir
+
+    def create_file(self, name, contents):
+        """
+        Writes `contents` to the path `name` under the temporary directory,
+        creating its parent directories, and returns the full path
+        """
+        path = os.path.join(self.tmpdir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(contents)
+        return path
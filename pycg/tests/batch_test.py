@@ -0,0 +1,104 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import json
+import os
+
+from base import TestBase
+
+from pycg.batch import BatchError, BatchRunner, get_summary, load_manifest
+
+
+class BatchTest(TestBase):
+    def setUp(self):
+        self.create_tmpdir()
+        self.output_dir = os.path.join(self.tmpdir, "out")
+
+    def create_manifest(self, entries):
+        return self.create_file(
+            "manifest.jsonl", "".join(json.dumps(e) + "\n" for e in entries)
+        )
+
+    def test_load_manifest(self):
+        main = self.create_file("pkg/main.py", "")
+        self.create_file("pkg/sub/mod.py", "")
+        path = self.create_manifest(
+            [
+                {"package": "pkg", "product": "pkg", "version": "1.0", "forge": "PyPI"},
+                {"package": "pkg", "entry_points": ["pkg/main.py"]},
+                {"package": "pkg", "name": "a/b"},
+                {"package": "pkg", "name": "a/b"},
+            ]
+        )
+
+        jobs = load_manifest(path)
+        self.assertEqual([j.name for j in jobs], ["pkg-1.0", "pkg", "a_b", "a_b.2"])
+        self.assertEqual(jobs[0].package, os.path.join(self.tmpdir, "pkg"))
+        self.assertEqual(
+            jobs[0].entry_points,
+            [main, os.path.join(self.tmpdir, "pkg", "sub", "mod.py")],
+        )
+        self.assertEqual(jobs[0].version, "1.0")
+        self.assertEqual(jobs[1].entry_points, [main])
+
+        path = self.create_manifest([{"entry_points": []}])
+        with self.assertRaises(BatchError):
+            load_manifest(path)
+
+    def test_run(self):
+        self.create_file("pkg/main.py", "def func():\n    pass\n\nfunc()\n")
+        self.create_file("invalid/main.py", "def func(:\n")
+        jobs = load_manifest(
+            self.create_manifest(
+                [
+                    {"package": "pkg"},
+                    {"package": "invalid"},
+                    {"package": "pkg", "name": "again"},
+                ]
+            )
+        )
+
+        finished = []
+        runner = BatchRunner(self.output_dir, workers=2, max_jobs_per_worker=1)
+        results = runner.run(jobs, lambda job, result: finished.append(job.name))
+        self.assertEqual(sorted(finished), ["again", "invalid", "pkg"])
+        self.assertEqual([r["status"] for r in results], ["ok", "error", "ok"])
+        self.assertIn("SyntaxError", results[1]["error"])
+
+        with open(results[0]["output"]) as f:
+            self.assertEqual(json.load(f), {"main": ["main.func"], "main.func": []})
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)), ["again.json", "pkg.json"]
+        )
+
+        summary = get_summary(results, 1.0)
+        self.assertEqual(summary["jobs"], 3)
+        self.assertEqual(summary["ok"], 2)
+        self.assertEqual(summary["error"], 1)
+
+    def test_timeout(self):
+        self.create_file(
+            "pkg/main.py",
+            "".join("def f{0}():\n    f{0}()\n\n".format(i) for i in range(2000)),
+        )
+        jobs = load_manifest(self.create_manifest([{"package": "pkg"}]))
+        results = BatchRunner(self.output_dir, timeout=0.01).run(jobs)
+        self.assertEqual(results[0]["status"], "timeout")
+        self.assertEqual(os.listdir(self.output_dir), [])
@@ -0,0 +1,102 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import gzip
+import os
+import tempfile
+
+from base import TestBase
+
+from pycg.formats.binary import Binary, BinaryCallGraph, BinaryFormatError
+
+
+class BinaryFormatTest(TestBase):
+    def setUp(self):
+        class CGGenerator:
+            cg = {
+                "mod": set(["mod.func", "mod.Cls.__init__", "ext.call"]),
+                "mod.func": set(["mod.func", "mod.é"]),
+                "mod.é": set(),
+                "mod.Cls.__init__": set(["ext.call"]),
+                "ext.call": set(),
+            }
+
+            def output(self):
+                return self.cg
+
+        self.cg_generator = CGGenerator()
+
+    def test_read(self):
+        graph = BinaryCallGraph(Binary(self.cg_generator).generate())
+        self.assertEqual(graph.get(), self.cg_generator.cg)
+        self.assertEqual(len(graph), 5)
+        self.assertEqual(graph.get_edge_count(), 6)
+        self.assertEqual(
+            list(graph.get_names()),
+            ["ext.call", "mod", "mod.Cls.__init__", "mod.func", "mod.é"],
+        )
+
+        self.assertEqual(
+            sorted(graph.get_callees("mod")),
+            ["ext.call", "mod.Cls.__init__", "mod.func"],
+        )
+        self.assertEqual(graph.get_callees("mod.é"), [])
+        for name in self.cg_generator.cg:
+            self.assertEqual(graph.get_name(graph.find(name)), name)
+        self.assertIsNone(graph.find("mod.other"))
+        self.assertNotIn("", graph)
+        self.assertNotIn("zzz", graph)
+        with self.assertRaises(KeyError):
+            graph.get_callees("mod.other")
+
+    def test_empty(self):
+        self.cg_generator.cg = {}
+        graph = BinaryCallGraph(Binary(self.cg_generator).generate())
+        self.assertEqual(len(graph), 0)
+        self.assertEqual(graph.get(), {})
+        self.assertIsNone(graph.find("mod"))
+
+    def test_open(self):
+        data = Binary(self.cg_generator).generate()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "cg")
+            with open(path, "wb") as f:
+                f.write(data)
+            with BinaryCallGraph.open(path) as graph:
+                self.assertEqual(graph.get(), self.cg_generator.cg)
+            self.assertIsNone(graph.mmap)
+
+            with gzip.open(path, "wb") as f:
+                f.write(data)
+            with BinaryCallGraph.open(path) as graph:
+                self.assertEqual(graph.get(), self.cg_generator.cg)
+
+            open(path, "wb").close()
+            with self.assertRaises(BinaryFormatError):
+                BinaryCallGraph.open(path)
+
+    def test_invalid(self):
+        data = Binary(self.cg_generator).generate()
+        with self.assertRaises(BinaryFormatError):
+            BinaryCallGraph(data[:-1])
+        with self.assertRaises(BinaryFormatError):
+            BinaryCallGraph(b"JSON" + data[4:])
+        with self.assertRaises(BinaryFormatError):
+            BinaryCallGraph(data[:10])
@@ -0,0 +1,154 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import os
+
+import mock
+from base import TestBase
+
+from pycg import utils
+from pycg.machinery.cache import AnalysisCache
+from pycg.machinery.sources import SourceManager
+from pycg.processing.preprocessor import PreProcessor
+from pycg.pycg import CallGraphGenerator
+
+
+class AnalysisCacheTest(TestBase):
+    def setUp(self):
+        self.create_tmpdir()
+        self.pkg = os.path.join(self.tmpdir, "pkg")
+        self.cache_dir = os.path.join(self.tmpdir, "cache")
+        os.mkdir(self.pkg)
+
+    def test_load(self):
+        path = self.create_file("pkg/mod.py", "a = 1\n")
+        cache = AnalysisCache(self.cache_dir)
+        key = cache.get_key([path], self.pkg, -1)
+        self.assertEqual(key, cache.get_key([path], self.pkg, -1))
+        self.assertNotEqual(key, cache.get_key([path], self.pkg, 1))
+
+        self.assertIsNone(cache.load(key, SourceManager()))
+        cache.store(key, {"state": 1}, [path], SourceManager())
+        self.assertEqual(cache.load(key, SourceManager()), {"state": 1})
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+        # a changed module invalidates the entry
+        self.create_file("pkg/mod.py", "a = 2\n")
+        self.assertIsNone(cache.load(key, SourceManager()))
+
+        # and so does a module added next to it
+        cache.store(key, {"state": 1}, [path], SourceManager())
+        self.create_file("pkg/other.py", "")
+        os.utime(self.pkg, ns=(0, 0))
+        self.assertIsNone(cache.load(key, SourceManager()))
+
+    def test_analyze(self):
+        entry_points = [
+            self.create_file("pkg/main.py", "from mod import func\nfunc()\n"),
+            self.create_file("pkg/mod.py", "def func():\n    pass\n"),
+        ]
+
+        def analyze():
+            cg = CallGraphGenerator(
+                entry_points,
+                self.pkg,
+                -1,
+                utils.constants.CALL_GRAPH_OP,
+                cache_dir=self.cache_dir,
+            )
+            cg.analyze()
+            return cg
+
+        cg = analyze()
+        self.assertEqual(cg.cache.misses, 1)
+        expected = {"main": set(["mod.func"]), "mod": set(), "mod.func": set()}
+        self.assertEqual(cg.output(), expected)
+
+        cg = analyze()
+        self.assertEqual(cg.cache.hits, 1)
+        self.assertEqual(cg.output(), expected)
+
+    def test_changed(self):
+        entry_points = [
+            self.create_file(
+                "pkg/main.py",
+                "from mod import func\nfrom other import g\nfunc()\ng()\n",
+            ),
+            self.create_file(
+                "pkg/mod.py", "from leaf import h\ndef func():\n    h()\n"
+            ),
+            self.create_file("pkg/leaf.py", "def h():\n    pass\n"),
+            self.create_file("pkg/other.py", "def g():\n    pass\n"),
+        ]
+
+        def analyze():
+            cg = CallGraphGenerator(
+                entry_points,
+                self.pkg,
+                -1,
+                utils.constants.CALL_GRAPH_OP,
+                cache_dir=self.cache_dir,
+            )
+            preprocessed = set()
+            visit_Module = PreProcessor.visit_Module
+
+            def record(processor, node):
+                preprocessed.add(processor.modname)
+                return visit_Module(processor, node)
+
+            with mock.patch.object(PreProcessor, "visit_Module", record):
+                cg.analyze()
+            return cg, preprocessed
+
+        cg, preprocessed = analyze()
+        self.assertEqual(preprocessed, set(["main", "mod", "leaf", "other"]))
+
+        # only the module changed and the modules importing it are analyzed again
+        self.create_file("pkg/leaf.py", "def h():\n    k()\ndef k():\n    pass\n")
+        cg, preprocessed = analyze()
+        self.assertEqual(cg.cache.hits, 1)
+        self.assertEqual(preprocessed, set(["leaf", "mod"]))
+        self.assertEqual(cg.output()["leaf.h"], set(["leaf.k"]))
+        self.assertEqual(cg.output()["main"], set(["mod.func", "other.g"]))
+
+        cg, preprocessed = analyze()
+        self.assertEqual(preprocessed, set())
+        self.assertEqual(cg.output()["leaf.h"], set(["leaf.k"]))
+
+    def test_incomplete(self):
+        entry_points = [self.create_file("pkg/main.py", "a = 1\n")]
+
+        def analyze(time_budget):
+            cg = CallGraphGenerator(
+                entry_points,
+                self.pkg,
+                -1,
+                utils.constants.CALL_GRAPH_OP,
+                cache_dir=self.cache_dir,
+                time_budget=time_budget,
+            )
+            cg.analyze()
+            return cg
+
+        # the state reached when the budget runs out is not stored
+        analyze(0)
+        cg = analyze(None)
+        self.assertEqual(cg.cache.misses, 1)
@@ -85,3 +85,97 @@ class CallGraphTest(TestBase):
             self.cg.add_edge("node1", "")
         with self.assertRaises(CallGraphError):
             self.cg.add_edge("", "node1")
+
+    def test_callers(self):
+        self.cg.add_edge("node1", "node2")
+        self.cg.add_edge("node3", "node2")
+        self.cg.add_node("node4")
+        self.assertEqual(self.cg.get_callers("node2"), set(["node1", "node3"]))
+        self.assertEqual(self.cg.get_callers("node1"), set())
+        self.assertEqual(self.cg.get_callees("node1"), set(["node2"]))
+        self.assertEqual(self.cg.get_callers("node4"), set())
+
+        with self.assertRaises(CallGraphError):
+            self.cg.get_callers("missing")
+        with self.assertRaises(CallGraphError):
+            self.cg.get_callees("missing")
+
+    def test_reachable(self):
+        # node1 -> node2 -> node3 <-> node4, node5 -> node4
+        self.cg.add_edge("node1", "node2")
+        self.cg.add_edge("node2", "node3")
+        self.cg.add_edge("node3", "node4")
+        self.cg.add_edge("node4", "node3")
+        self.cg.add_edge("node5", "node4")
+
+        self.assertEqual(self.cg.get_reachable("node3"), set(["node3", "node4"]))
+        self.assertEqual(
+            self.cg.get_reachable("node1"), set(["node2", "node3", "node4"])
+        )
+        self.assertEqual(self.cg.get_reachable("node5"), set(["node3", "node4"]))
+        self.assertEqual(
+            self.cg.get_reaching("node4"),
+            set(["node1", "node2", "node3", "node4", "node5"]),
+        )
+        self.assertEqual(self.cg.get_reaching("node1"), set())
+
+        self.assertEqual(
+            self.cg.get_all_reachable(["node2", "node5"]), set(["node3", "node4"])
+        )
+        self.assertEqual(self.cg.get_all_reaching(["node2", "node5"]), set(["node1"]))
+        self.assertEqual(self.cg.get_all_reachable([]), set())
+
+        # adding an edge invalidates the memoised results
+        self.cg.add_edge("node4", "node6")
+        self.assertEqual(
+            self.cg.get_reachable("node1"),
+            set(["node2", "node3", "node4", "node6"]),
+        )
+        self.assertIn("node5", self.cg.get_reaching("node6"))
+
+        with self.assertRaises(CallGraphError):
+            self.cg.get_reachable("missing")
+        with self.assertRaises(CallGraphError):
+            self.cg.get_all_reaching(["node1", "missing"])
+
+    def test_paths(self):
+        self.cg.add_edge("node1", "node2")
+        self.cg.add_edge("node2", "node3")
+        self.cg.add_edge("node1", "node4")
+        self.cg.add_edge("node4", "node5")
+        self.cg.add_edge("node5", "node3")
+        self.cg.add_node("node6")
+
+        self.assertEqual(
+            self.cg.get_path("node1", "node3"), ["node1", "node2", "node3"]
+        )
+        self.assertEqual(self.cg.get_path("node1", "node1"), ["node1"])
+        self.assertIsNone(self.cg.get_path("node3", "node1"))
+        self.assertEqual(
+            self.cg.get_paths("node1", ["node5", "node6", "node2"]),
+            {"node5": ["node1", "node4", "node5"], "node2": ["node1", "node2"]},
+        )
+
+        # memoised reachable nodes limit the search
+        self.cg.get_reachable("node4")
+        self.assertEqual(
+            self.cg.get_paths("node4", ["node2", "node3"]),
+            {"node3": ["node4", "node5", "node3"]},
+        )
+
+    def test_remove(self):
+        self.cg.add_edge("node1", "node2")
+        self.cg.add_edge("node2", "node3")
+        self.cg.add_edge("node3", "node2")
+        self.assertEqual(self.cg.get_reachable("node1"), set(["node2", "node3"]))
+
+        self.cg.remove_callees("node2")
+        self.assertEqual(self.cg.get_callees("node2"), set())
+        self.assertEqual(self.cg.get_callers("node3"), set())
+        self.assertEqual(self.cg.get_reachable("node1"), set(["node2"]))
+
+        self.cg.remove_node("node2")
+        self.assertEqual(self.cg.get(), {"node1": set(), "node3": set()})
+        self.assertEqual(self.cg.get_callers("node3"), set())
+        with self.assertRaises(CallGraphError):
+            self.cg.get_callers("node2")
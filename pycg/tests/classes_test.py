@@ -0,0 +1,70 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+from base import TestBase
+
+from pycg.machinery.classes import ClassManager
+
+
+class ClassesTest(TestBase):
+    def test_mro(self):
+        cm = ClassManager()
+        cls = cm.create("mod.cls", "mod")
+        cls.add_parent("mod.parent")
+        cls.add_parent(["mod.grandparent", "object"])
+        self.assertEqual(
+            cls.get_mro(), ["mod.cls", "mod.parent", "mod.grandparent", "object"]
+        )
+        self.assertEqual(cm.pop_changes(), set(["mod.cls"]))
+
+    def test_changes(self):
+        cm = ClassManager()
+        cls = cm.create("mod.cls", "mod")
+        cls.add_parent("mod.parent")
+        cm.pop_changes()
+
+        # rebuilding the same MRO is not a change
+        cls.clear_mro()
+        cls.add_parent("mod.parent")
+        cls.compute_mro()
+        self.assertEqual(cls.get_mro(), ["mod.cls", "mod.parent"])
+        self.assertEqual(cm.pop_changes(), set())
+
+        cls.clear_mro()
+        cls.add_parent("mod.other")
+        cls.compute_mro()
+        self.assertEqual(cm.pop_changes(), set(["mod.cls"]))
+
+    def test_redefined(self):
+        cm = ClassManager()
+        cls = cm.create("mod.cls", "mod")
+        cls.add_parent("mod.first")
+        cls.clear_mro()
+        cls.add_parent("mod.second")
+        cls.compute_mro()
+        self.assertEqual(cm.pop_changes(), set(["mod.cls"]))
+
+        # each pass defines the class twice, ending with the same MRO
+        for parent in ["mod.first", "mod.second"]:
+            cls.clear_mro()
+            cls.add_parent(parent)
+            cls.compute_mro()
+        self.assertEqual(cls.get_mro(), ["mod.cls", "mod.second"])
+        self.assertEqual(cm.pop_changes(), set())
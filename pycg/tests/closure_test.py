@@ -0,0 +1,103 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+from base import TestBase
+
+from pycg import utils
+from pycg.machinery.definitions import DefinitionManager
+from pycg.machinery.worklist import Worklist
+
+
+class ClosureIndexTest(TestBase):
+    def setUp(self):
+        self.dm = DefinitionManager()
+        for ns in ["a", "b", "c", "d"]:
+            self.dm.create(ns, utils.constants.NAME_DEF)
+
+    def test_closure(self):
+        self.dm.get("a").get_name_pointer().add("b")
+        self.dm.get("b").get_name_pointer().add_set(set(["c", "d"]))
+
+        closured = self.dm.transitive_closure()
+        self.assertEqual(closured.get("a"), set(["c", "d"]))
+        self.assertEqual(closured.get("b"), set(["c", "d"]))
+        self.assertEqual(closured.get("c"), set(["c"]))
+        self.assertEqual(closured["d"], set(["d"]))
+        self.assertIsNone(closured.get("e"))
+
+        # names that are not definitions are ignored
+        self.dm.get("c").get_name_pointer().add("e")
+        closured = self.dm.transitive_closure()
+        self.assertEqual(closured.get("c"), set())
+        self.assertEqual(closured.get("a"), set(["c", "d"]))
+
+        # until the definition is created
+        self.dm.create("e", utils.constants.NAME_DEF)
+        closured = self.dm.transitive_closure()
+        self.assertEqual(closured.get("c"), set(["e"]))
+        self.assertEqual(closured.get("a"), set(["d", "e"]))
+
+    def test_incremental(self):
+        self.dm.get("a").get_name_pointer().add("b")
+        self.dm.get("c").get_name_pointer().add("d")
+        closure = self.dm.closure
+
+        self.dm.transitive_closure()
+        recomputed = closure.recomputed
+
+        # nothing changed, nothing is recomputed
+        self.dm.transitive_closure()
+        self.assertEqual(closure.recomputed, recomputed)
+
+        # only b and the definitions reaching it are recomputed
+        self.dm.get("b").get_name_pointer().add("c")
+        closured = self.dm.transitive_closure()
+        self.assertEqual(closure.recomputed, recomputed + 2)
+        self.assertEqual(closured.get("a"), set(["d"]))
+        self.assertEqual(closure.get_pointed_by("c"), set(["b"]))
+
+        # adding a name that is already there does not mark anything
+        self.dm.get("b").get_name_pointer().add("c")
+        self.assertEqual(closure.dirty, set())
+
+    def test_cycles(self):
+        self.dm.get("a").get_name_pointer().add("a")
+        self.dm.get("b").get_name_pointer().add_set(set(["c", "d"]))
+        self.dm.get("c").get_name_pointer().add("b")
+
+        closured = self.dm.transitive_closure()
+        # a definition pointing to itself is part of its closure
+        self.assertEqual(closured.get("a"), set(["a"]))
+        # members of a cycle share one closure represented by one member
+        self.assertEqual(closured.get("b"), set(["b", "d"]))
+        self.assertIs(closured.get("b"), closured.get("c"))
+
+    def test_worklist(self):
+        wl = Worklist()
+        closured = self.dm.transitive_closure()
+        self.dm.set_worklist(wl)
+
+        wl.start_reading("mod")
+        closured.get("a")
+        closured["b"]
+        wl.stop_reading()
+        self.dm.set_worklist(None)
+
+        self.assertEqual(wl.get_reads("mod"), set(["a", "b"]))
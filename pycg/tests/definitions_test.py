@@ -22,6 +22,7 @@ from base import TestBase
 
 from pycg import utils
 from pycg.machinery.definitions import DefinitionError, DefinitionManager
+from pycg.pycg import CallGraphGenerator
 
 
 class DefinitionManagerTest(TestBase):
@@ -74,6 +75,20 @@ class DefinitionManagerTest(TestBase):
             set(["{}.{}".format("fndefi", utils.constants.RETURN_NAME)]),
         )
 
+    def test_shared_names(self):
+        dm = DefinitionManager()
+        defi = dm.create(utils.join_ns("mod", "func"), utils.constants.FUN_DEF)
+        other = dm.create("mod.other", utils.constants.NAME_DEF)
+
+        other.get_name_pointer().add(utils.join_ns("mod", "func"))
+        other.get_name_pointer().add_set(set([utils.join_ns("mod", "func2")]))
+        other.get_name_pointer().add_arg("0", set([utils.join_ns("mod", "func")]))
+
+        # an equal namespace built elsewhere maps to the interned one
+        self.assertIs(list(other.get_name_pointer().get_arg("0"))[0], defi.get_ns())
+        for name in other.get_name_pointer().get():
+            self.assertIs(name, dm.intern(name))
+
     def test_handle_function_def(self):
         # handle parent definition
         parent_ns = "root"
@@ -88,3 +103,152 @@ class DefinitionManagerTest(TestBase):
         # a definition for the function should be created
         fn_def = dm.get(fn_ns)
         self.assertIsNotNone(fn_def)
+
+    def test_complete_definitions(self):
+        dm = DefinitionManager()
+        # def fn(param): ...
+        fn_def = dm.handle_function_def("mod", "fn")
+        param_def = dm.create("mod.fn.param", utils.constants.NAME_DEF)
+        fn_def.get_name_pointer().add_pos_arg(0, "param", param_def.get_ns())
+        dm.create("mod.arg", utils.constants.NAME_DEF)
+
+        # alias = fn; alias2 = alias; alias2(arg)
+        alias = dm.create("mod.alias", utils.constants.NAME_DEF)
+        alias.get_name_pointer().add(fn_def.get_ns())
+        alias2 = dm.create("mod.alias2", utils.constants.NAME_DEF)
+        alias2.get_name_pointer().add(alias.get_ns())
+        alias2.get_name_pointer().add_pos_arg(0, None, "mod.arg")
+
+        dm.complete_definitions()
+        # the argument reaches the parameter of the function
+        self.assertEqual(param_def.get_name_pointer().get(), set(["mod.arg"]))
+        self.assertGreater(dm.propagations, 0)
+
+        # nothing changed since, so nothing is propagated
+        propagations = dm.propagations
+        dm.complete_definitions()
+        self.assertEqual(dm.propagations, propagations)
+
+        # new arguments are propagated on the next call
+        dm.create("mod.arg2", utils.constants.NAME_DEF)
+        alias.get_name_pointer().add_pos_arg(0, None, "mod.arg2")
+        dm.complete_definitions()
+        self.assertEqual(
+            param_def.get_name_pointer().get(), set(["mod.arg", "mod.arg2"])
+        )
+
+        # past the deadline nothing is propagated until the next call
+        dm.create("mod.arg3", utils.constants.NAME_DEF)
+        alias.get_name_pointer().add_pos_arg(0, None, "mod.arg3")
+        self.assertFalse(dm.complete_definitions(deadline=0))
+        self.assertNotIn("mod.arg3", param_def.get_name_pointer().get())
+        self.assertTrue(dm.complete_definitions())
+        self.assertIn("mod.arg3", param_def.get_name_pointer().get())
+
+    def test_complete_late_definitions(self):
+        dm = DefinitionManager()
+        # def fn(param): ...; alias = fn; alias(arg)
+        # with neither `param` nor `arg` defined yet
+        fn_def = dm.handle_function_def("mod", "fn")
+        fn_def.get_name_pointer().add_pos_arg(0, "param", "mod.fn.param")
+        alias = dm.create("mod.alias", utils.constants.NAME_DEF)
+        alias.get_name_pointer().add(fn_def.get_ns())
+        alias.get_name_pointer().add_pos_arg(0, None, "mod.arg")
+        dm.complete_definitions()
+        self.assertIsNone(dm.get("mod.fn.param"))
+
+        # the parameter, referenced only from the arguments of
+        # the function, is defined after its first propagation
+        param_def = dm.create("mod.fn.param", utils.constants.NAME_DEF)
+        dm.complete_definitions()
+        self.assertEqual(param_def.get_name_pointer().get(), set())
+
+        # so is the argument, referenced only from those of `alias`
+        dm.create("mod.arg", utils.constants.NAME_DEF)
+        dm.complete_definitions()
+        self.assertEqual(param_def.get_name_pointer().get(), set(["mod.arg"]))
+
+    def test_handle_external_attribute(self):
+        dm = DefinitionManager(max_external_depth=2)
+        dm.create("ext", utils.constants.EXT_DEF)
+
+        attr_def = dm.handle_external_attribute("ext", "attr")
+        self.assertEqual(attr_def.get_ns(), "ext.attr")
+        self.assertTrue(attr_def.is_ext_def())
+        # created once
+        self.assertIs(dm.handle_external_attribute("ext", "attr"), attr_def)
+
+        self.assertIsNotNone(dm.handle_external_attribute("ext.attr", "other"))
+        self.assertIsNone(dm.handle_external_attribute("ext.attr.other", "deeper"))
+        self.assertIsNone(dm.handle_external_attribute("ext.attr", "attr"))
+        self.assertIsNone(dm.get("ext.attr.other.deeper"))
+        # the limits still apply without the recursion check
+        self.assertEqual(
+            dm.handle_external_attribute(
+                "ext.attr", "attr", check_recursion=False
+            ).get_ns(),
+            "ext.attr.attr",
+        )
+        self.assertIsNone(
+            dm.handle_external_attribute(
+                "ext.attr.attr", "deeper", check_recursion=False
+            )
+        )
+
+    def test_complete_value_args(self):
+        # the arguments of definitions other than functions are values
+        for def_type in [utils.constants.EXT_DEF, utils.constants.NAME_DEF]:
+            dm = DefinitionManager()
+            callee = dm.create("mod.callee", def_type)
+            arg_defs = [
+                dm.create("mod.arg{}".format(i), utils.constants.NAME_DEF)
+                for i in range(2)
+            ]
+
+            # callee(arg0); alias = callee; alias(arg1)
+            callee.get_name_pointer().add_pos_arg(0, None, arg_defs[0].get_ns())
+            alias = dm.create("mod.alias", utils.constants.NAME_DEF)
+            alias.get_name_pointer().add(callee.get_ns())
+            alias.get_name_pointer().add_pos_arg(0, None, arg_defs[1].get_ns())
+            dm.complete_definitions()
+
+            # the values passed to the callee are
+            # collected without pointing to each other
+            self.assertEqual(
+                callee.get_name_pointer().get_pos_arg(0),
+                set(["mod.arg0", "mod.arg1"]),
+            )
+            self.assertEqual(arg_defs[0].get_name_pointer().get(), set())
+
+    def test_complete_value_args_edges(self):
+        self.create_tmpdir()
+        path = self.create_file(
+            "main.py",
+            "import ext\n"
+            "def g(x):\n    x()\n"
+            "def h(y):\n    y()\n"
+            "def first():\n    pass\n"
+            "def second():\n    pass\n"
+            "if c:\n    f = g\nelse:\n    f = h\n"
+            "value = first\n"
+            "f(value)\n"
+            "alias = f\n"
+            "alias(second)\n"
+            "ext.run(value)\n"
+            "run = ext.run\n"
+            "run(second)\n"
+            "value()\n",
+        )
+        cg = CallGraphGenerator([path], self.tmpdir, -1, utils.constants.CALL_GRAPH_OP)
+        cg.analyze()
+        output = cg.output()
+
+        # both functions f points to are passed the values given to
+        # f and to its alias, through the arguments of the name f
+        for fn in ["main.g", "main.h"]:
+            self.assertEqual(output[fn], set(["main.first", "main.second"]))
+        # while the value passed to f, or to the external function, does
+        # not point to what is passed to their aliases
+        self.assertEqual(
+            output["main"], set(["main.g", "main.h", "main.first", "ext.run"])
+        )
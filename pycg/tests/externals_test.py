@@ -0,0 +1,67 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+from base import TestBase
+
+from pycg.machinery.externals import ExternalTable
+
+
+class ExternalTableTest(TestBase):
+    def test_add(self):
+        table = ExternalTable(max_depth=2)
+        self.assertEqual(table.add("os", "path"), "os.path")
+        self.assertEqual(table.get_depth("os.path"), 1)
+        self.assertEqual(table.add("os.path", "join"), "os.path.join")
+        self.assertIsNone(table.add("os.path.join", "attr"))
+        self.assertEqual(table.dropped, 1)
+        self.assertIn("os.path.join", table)
+        self.assertEqual(len(table), 2)
+
+    def test_max_size(self):
+        table = ExternalTable(max_size=1)
+        self.assertEqual(table.add("os", "path"), "os.path")
+        self.assertIsNone(table.add("os", "sep"))
+        self.assertEqual(table.dropped, 1)
+
+    def test_limits(self):
+        # either limit drops an attribute while the other one is not reached
+        table = ExternalTable(max_depth=1, max_size=2)
+        self.assertEqual(table.add("os", "path"), "os.path")
+        self.assertIsNone(table.add("os.path", "join"))
+        self.assertEqual(table.dropped, 1)
+
+        self.assertEqual(table.add("os", "sep"), "os.sep")
+        self.assertIsNone(table.add("os", "name"))
+        self.assertEqual(table.dropped, 2)
+        self.assertEqual(len(table), 2)
+
+    def test_is_recursive(self):
+        table = ExternalTable()
+        table.add("ext.node", "parent")
+        self.assertTrue(table.is_recursive("ext.node.parent", "parent"))
+        # only whole attributes are compared
+        table.add("quopri", "decodestring")
+        self.assertFalse(table.is_recursive("quopri.decodestring", "decode"))
+        # the namespace of the external definition the chain starts from
+        # is not an attribute the table added
+        self.assertFalse(table.is_recursive("ext.node", "node"))
+        attr_ns = table.add("http.server.BaseHTTPRequestHandler", "server")
+        self.assertFalse(table.is_recursive(attr_ns, "http"))
+        self.assertTrue(table.is_recursive(attr_ns, "server"))
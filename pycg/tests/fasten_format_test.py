@@ -18,6 +18,9 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import io
+import json
+
 from base import TestBase
 
 from pycg import utils
@@ -317,3 +320,31 @@ class FastenFormatTest(TestBase):
                     "metadata"
                 ]["superClasses"],
             )
+
+    def test_stream(self):
+        self.cg_generator.internal_mods = self._get_internal_mods()
+        self.cg_generator.external_mods = self._get_external_mods()
+        self.cg_generator.classes = self._get_classes()
+        self.cg_generator.functions = ["mod1.method", "mod.mod2.method"]
+        self.cg_generator.edges = [
+            ["mod1", "mod1.method"],
+            ["mod1.method", "mod.mod2.method"],
+            ["mod.mod2.method", "external.method"],
+            ["mod1", "external2.method"],
+            ["mod1", "unknown.method"],
+        ]
+
+        expected = self.get_formatter().generate()
+        self.assertEqual(len(expected["graph"]["internalCalls"]), 2)
+        self.assertEqual(len(expected["graph"]["externalCalls"]), 2)
+
+        f = io.StringIO()
+        self.get_formatter().write(f)
+        self.assertEqual(f.getvalue(), json.dumps(expected))
+
+    def test_incomplete(self):
+        self.assertNotIn("incomplete", self.get_formatter().generate())
+
+        self.cg_generator.output_incomplete = lambda: "time budget exceeded"
+        output = self.get_formatter().generate()
+        self.assertEqual(output["incomplete"], "time budget exceeded")
@@ -0,0 +1,94 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import io
+import json
+
+from base import TestBase
+
+from pycg.formats import AsGraph, Simple
+from pycg.formats.base import StreamedArray, StreamedObject, write_json
+
+
+class FormatsTest(TestBase):
+    def write(self, obj):
+        f = io.StringIO()
+        write_json(obj, f)
+        return f.getvalue()
+
+    def test_write_json(self):
+        obj = {
+            "str": 'a"b',
+            1: [1, 2.5, None, True],
+            None: {"nested": {}},
+            "empty": [],
+        }
+        self.assertEqual(self.write(obj), json.dumps(obj))
+
+        streamed = StreamedObject(
+            (key, StreamedArray(iter(value)) if isinstance(value, list) else value)
+            for key, value in obj.items()
+        )
+        self.assertEqual(self.write(streamed), json.dumps(obj))
+        self.assertEqual(self.write(StreamedArray(iter([]))), "[]")
+        self.assertEqual(self.write(StreamedObject(iter([]))), "{}")
+
+        # items are produced while they are written
+        produced = []
+
+        def items():
+            for i in range(3):
+                produced.append(i)
+                yield i
+
+        f = io.StringIO()
+        write_json(StreamedArray(items()), f)
+        self.assertEqual(f.getvalue(), "[0, 1, 2]")
+        self.assertEqual(produced, [0, 1, 2])
+
+    def test_formatters(self):
+        class MockPointer:
+            def __init__(self, names):
+                self.names = names
+
+            def get(self):
+                return self.names
+
+        class MockDef:
+            def __init__(self, names):
+                self.pointer = MockPointer(names)
+
+            def get_name_pointer(self):
+                return self.pointer
+
+        class CGGenerator:
+            def output(self):
+                return {"mod": set(["mod.func"]), "mod.func": set()}
+
+            def get_as_graph(self):
+                return {
+                    "mod.a": MockDef(set(["mod.b"])),
+                    "mod.b": MockDef(set()),
+                }.items()
+
+        for formatter in [Simple(CGGenerator()), AsGraph(CGGenerator())]:
+            f = io.StringIO()
+            formatter.write(f)
+            self.assertEqual(f.getvalue(), json.dumps(formatter.generate()))
@@ -25,7 +25,13 @@ import sys
 import mock
 from base import TestBase
 
-from pycg.machinery.imports import ImportManager, ImportManagerError, get_custom_loader
+from pycg.machinery.imports import (
+    FileSystemImportManager,
+    ImportManager,
+    ImportManagerError,
+    ModuleIndex,
+    get_custom_loader,
+)
 
 
 class ImportsTest(TestBase):
@@ -187,3 +193,106 @@ class ImportsTest(TestBase):
             modname = im.handle_import("mod2", 1)
             self.assertEqual(modname, "mod2")
             mock_import.assert_called_once_with(".mod2", package="mod1")
+
+
+class FileSystemImportsTest(TestBase):
+    def setUp(self):
+        self.root = self.create_tmpdir()
+        for name in [
+            "pkg/__init__.py",
+            "pkg/mod.py",
+            "pkg/sub/__init__.py",
+            "pkg/sub/mod.py",
+            "ns/mod.py",
+            "shadow/__init__.py",
+            "shadow.py",
+            "main.py",
+        ]:
+            self.create_file(name, "")
+
+    def get_path(self, name):
+        return os.path.join(self.root, name)
+
+    def test_index(self):
+        index = ModuleIndex(self.root)
+        self.assertEqual(
+            index.find("pkg").get_filename(), self.get_path("pkg/__init__.py")
+        )
+        self.assertEqual(index.find("pkg").get_path(), self.get_path("pkg"))
+        self.assertEqual(
+            index.find("pkg.sub.mod").get_filename(), self.get_path("pkg/sub/mod.py")
+        )
+        self.assertIsNone(index.find("pkg.mod").get_path())
+        # a package has precedence over a module
+        self.assertEqual(
+            index.find("shadow").get_filename(), self.get_path("shadow/__init__.py")
+        )
+        self.assertIsNone(index.find("ns").get_filename())
+        self.assertEqual(
+            index.find("ns.mod").get_filename(), self.get_path("ns/mod.py")
+        )
+        self.assertIsNone(index.find("missing"))
+        self.assertIsNone(index.find("pkg.mod.missing"))
+        self.assertIsNone(index.find("main.missing"))
+
+    def test_handle_import(self):
+        path_hooks = copy.copy(sys.path_hooks)
+        path = copy.copy(sys.path)
+        modules = set(sys.modules.keys())
+
+        im = FileSystemImportManager()
+        im.set_pkg(self.root)
+        im.install_hooks()
+        im.create_node("main")
+        im.set_current_mod("main", self.get_path("main.py"))
+
+        self.assertEqual(im.handle_import("pkg.sub.mod", 0), "pkg.sub.mod")
+        self.assertEqual(im.get_imports("main"), set(["pkg", "pkg.sub", "pkg.sub.mod"]))
+        self.assertEqual(
+            im.get_filepath("pkg.sub"), self.get_path("pkg/sub/__init__.py")
+        )
+        self.assertEqual(im.handle_import("pkg", 0), "pkg")
+        self.assertEqual(im.handle_import("ns.mod", 0), "ns.mod")
+        # namespace packages and external modules are not analyzed
+        self.assertIsNone(im.handle_import("ns", 0))
+        self.assertIsNone(im.handle_import("json", 0))
+        self.assertIsNone(im.get_node("json"))
+        self.assertIsNone(im.handle_import("sys", 0))
+        self.assertIn("sys", im.get_imports("main"))
+
+        # relative imports
+        im.create_node("pkg.mod")
+        im.set_current_mod("pkg.mod", self.get_path("pkg/mod.py"))
+        self.assertEqual(im.handle_import("sub.mod", 1), "pkg.sub.mod")
+        # the name of an imported item
+        self.assertEqual(im.handle_import("sub.mod.func", 1), "pkg.sub.mod")
+        self.assertIsNone(im.handle_import("mod", 4))
+
+        im.remove_hooks()
+        # the interpreter's import state is untouched
+        self.assertEqual(sys.path_hooks, path_hooks)
+        self.assertEqual(sys.path, path)
+        self.assertEqual(set(sys.modules.keys()), modules)
+
+    def test_find_import(self):
+        im = FileSystemImportManager()
+        self.assertIsNone(im.find_import("pkg", 0))
+
+        im.set_pkg(self.root)
+        im.install_hooks()
+        im.create_node("pkg.mod")
+        im.set_current_mod("pkg.mod", self.get_path("pkg/mod.py"))
+
+        self.assertEqual(
+            im.find_import("pkg.sub.mod", 0), self.get_path("pkg/sub/mod.py")
+        )
+        self.assertEqual(
+            im.find_import("sub.mod.func", 1), self.get_path("pkg/sub/mod.py")
+        )
+        self.assertIsNone(im.find_import("ns", 0))
+        self.assertIsNone(im.find_import("json", 0))
+        self.assertIsNone(im.find_import("sys", 0))
+        # nothing is recorded
+        self.assertEqual(im.get_imports("pkg.mod"), set())
+        self.assertIsNone(im.get_node("pkg.sub.mod"))
+        im.remove_hooks()
@@ -0,0 +1,164 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import json
+import os
+
+from base import TestBase
+
+from pycg.machinery.models import (
+    MODELS_DIR,
+    MODELS_VERSION,
+    ModelError,
+    ModelManager,
+)
+from pycg.pycg import CallGraphGenerator
+from pycg.utils.constants import CALL_GRAPH_OP
+
+CALLBACKS = """
+import threading
+from functools import partial
+
+def func(x):
+    pass
+
+def make(x):
+    def inner():
+        pass
+    return inner
+
+class Worker:
+    def __init__(self):
+        pass
+
+def main():
+    sorted([1, 2], key=func)
+    for f in map(make, [1, 2]):
+        f()
+    threading.Thread(target=Worker)
+    p = partial(func, 1)
+    p()
+    map(lambda x: x, [1])
+"""
+
+
+class ModelManagerTest(TestBase):
+    def setUp(self):
+        self.create_tmpdir()
+
+    def create_models(self, modname, functions, version=MODELS_VERSION):
+        path = os.path.join(self.tmpdir, modname + ".json")
+        with open(path, "w") as f:
+            f.write(
+                json.dumps(
+                    {"version": version, "module": modname, "functions": functions}
+                )
+            )
+
+    def test_get(self):
+        self.create_models("builtins", {"map": {"calls": [[0, None]]}})
+        self.create_models("pkg", {"func": {}, "Cls.method": {}})
+        self.create_models(
+            "pkg.mod", {"func": {"calls": [[1, "cb"]], "returns": [[0, None]]}}
+        )
+        mm = ModelManager(self.tmpdir)
+
+        model = mm.get("<builtin>.map")
+        self.assertEqual(model.get_name(), "builtins.map")
+        self.assertEqual(model.get_calls(), [(0, None)])
+        self.assertEqual(model.get_returns(), [])
+        self.assertFalse(model.does_return_calls())
+        self.assertIsNone(mm.get("<builtin>.len"))
+
+        # the module with the longest name holds the model
+        model = mm.get("pkg.mod.func")
+        self.assertEqual(model.get_name(), "pkg.mod.func")
+        self.assertEqual(model.get_calls(), [(1, "cb")])
+        self.assertEqual(model.get_returns(), [(0, None)])
+        self.assertEqual(mm.get("pkg.Cls.method").get_name(), "pkg.Cls.method")
+        self.assertIsNone(mm.get("pkg.mod.other"))
+        self.assertIsNone(mm.get("other.func"))
+
+    def test_lazy(self):
+        self.create_models("pkg", {"func": {}})
+        self.create_models("other", {"func": {}})
+        mm = ModelManager(self.tmpdir)
+        self.assertEqual(mm.get_loaded(), set())
+        mm.get("pkg.func")
+        mm.get("unknown.func")
+        self.assertEqual(mm.get_loaded(), set(["pkg"]))
+
+    def test_version(self):
+        self.create_models("pkg", {"func": {}}, version=MODELS_VERSION + 1)
+        with self.assertRaises(ModelError):
+            ModelManager(self.tmpdir).get("pkg.func")
+
+    def test_shipped(self):
+        mm = ModelManager()
+        for name in os.listdir(MODELS_DIR):
+            modname = os.path.splitext(name)[0]
+            with open(os.path.join(MODELS_DIR, name)) as f:
+                contents = json.load(f)
+            self.assertEqual(contents["module"], modname)
+            for fn in contents["functions"]:
+                if modname == "builtins":
+                    self.assertIsNotNone(mm.get("<builtin>." + fn))
+                else:
+                    self.assertIsNotNone(mm.get(modname + "." + fn))
+
+    def test_callbacks(self):
+        with open(os.path.join(self.tmpdir, "mod.py"), "w") as f:
+            f.write(CALLBACKS)
+        entry_points = [os.path.join(self.tmpdir, "mod.py")]
+
+        cg = CallGraphGenerator(entry_points, self.tmpdir, -1, CALL_GRAPH_OP)
+        cg.analyze()
+        self.assertEqual(
+            cg.output()["mod.main"],
+            set(
+                [
+                    "<builtin>.sorted",
+                    "<builtin>.map",
+                    "threading.Thread",
+                    "functools.partial",
+                    "mod.func",
+                    "mod.make",
+                    "mod.make.inner",
+                    "mod.Worker.__init__",
+                    "mod.main.<lambda1>",
+                ]
+            ),
+        )
+
+        cg = CallGraphGenerator(
+            entry_points, self.tmpdir, -1, CALL_GRAPH_OP, models=False
+        )
+        cg.analyze()
+        self.assertEqual(
+            cg.output()["mod.main"],
+            set(
+                [
+                    "<builtin>.sorted",
+                    "<builtin>.map",
+                    "threading.Thread",
+                    "functools.partial",
+                ]
+            ),
+        )
@@ -20,6 +20,7 @@
 #
 from base import TestBase
 
+from pycg.machinery.definitions import DefinitionManager
 from pycg.machinery.pointers import LiteralPointer, NamePointer, Pointer, PointerError
 
 
@@ -110,3 +111,33 @@ class PointerTest(TestBase):
         self.assertEqual(pointer1.get(), set(["smth1", "smth6"]))
         self.assertEqual(pointer1.get_arg(0), set(["smth2", "smth3", "smth7", "smth8"]))
         self.assertEqual(pointer1.get_arg(1), set(["smth4", "smth9"]))
+
+    def test_values_version(self):
+        # names are tracked through the closure, literals are not
+        dm = DefinitionManager()
+        version = dm.get_values_version()
+        NamePointer("ns", dm).add("smth")
+        self.assertEqual(dm.get_values_version(), version)
+
+        LiteralPointer("ns", dm).add("smth")
+        self.assertGreater(dm.get_values_version(), version)
+
+    def test_empty_name_pointer(self):
+        pointer1 = NamePointer()
+        pointer2 = NamePointer()
+        # empty pointers share their sets and maps until written to
+        self.assertIs(pointer1.get(), pointer2.get())
+        self.assertIs(pointer1.get_args(), pointer2.get_args())
+        self.assertEqual(pointer1.get_pos_args(), {})
+        self.assertEqual(pointer1.get_pos_of_name("smth"), None)
+
+        pointer1.add("smth1")
+        pointer1.add_pos_arg(0, "arg", "smth2")
+        self.assertEqual(pointer1.get(), set(["smth1"]))
+        self.assertEqual(pointer1.get_pos_args(), {0: set(["smth2"])})
+        self.assertEqual(pointer2.get(), set())
+        self.assertEqual(pointer2.get_args(), {})
+
+        pointer2.merge(pointer1)
+        self.assertEqual(pointer2.get_pos_names(), {0: "arg"})
+        self.assertEqual(pointer2.get_arg("arg"), set(["smth2"]))
@@ -0,0 +1,80 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+from base import TestBase
+
+from pycg import utils
+from pycg.pycg import CallGraphGenerator
+
+
+class CallGraphGeneratorTest(TestBase):
+    def setUp(self):
+        self.pkg = self.create_tmpdir()
+
+    def test_time_budget(self):
+        entry_points = [
+            self.create_file("main.py", "from mod import func\nfunc()\n"),
+            self.create_file("mod.py", "def func():\n    pass\n"),
+        ]
+
+        # the budget runs out before the fix-point iteration,
+        # but the call graph is still built from the state reached
+        cg = CallGraphGenerator(
+            entry_points, self.pkg, -1, utils.constants.CALL_GRAPH_OP, time_budget=0
+        )
+        cg.analyze()
+        self.assertIn("time budget", cg.output_incomplete())
+        self.assertEqual(cg.get_stats()["counters"]["incomplete"], cg.incomplete)
+        self.assertEqual(cg.iterations, 0)
+        self.assertIn("main", cg.output())
+
+        cg = CallGraphGenerator(
+            entry_points, self.pkg, -1, utils.constants.CALL_GRAPH_OP, time_budget=60
+        )
+        cg.analyze()
+        self.assertIsNone(cg.output_incomplete())
+        self.assertEqual(cg.output()["main"], set(["mod.func"]))
+
+    def test_external_member(self):
+        # the attribute is named like a module of the path of the
+        # external class, which is not an attribute chain repeating it
+        entry_points = [
+            self.create_file(
+                "main.py",
+                "import http.server\n"
+                "class H(http.server.BaseHTTPRequestHandler):\n"
+                "    def do_POST(self):\n"
+                "        self.server.shutdown()\n",
+            )
+        ]
+
+        for max_external_depth in [utils.constants.MAX_EXTERNAL_DEPTH, None]:
+            cg = CallGraphGenerator(
+                entry_points,
+                self.pkg,
+                -1,
+                utils.constants.CALL_GRAPH_OP,
+                max_external_depth=max_external_depth,
+            )
+            cg.analyze()
+            self.assertEqual(
+                cg.output()["main.H.do_POST"],
+                set(["http.server.BaseHTTPRequestHandler.server.shutdown"]),
+            )
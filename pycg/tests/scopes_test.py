@@ -215,3 +215,68 @@ class ScopeItemTest(TestBase):
         # If the def doesn't exist just assign to it
         scope.merge_def("defi100", "defi1001")
         self.assertEqual(scope.get_def("defi100"), "defi1001")
+
+    def test_changes(self):
+        class MockDef(object):
+            def __init__(self, ns):
+                self.ns = ns
+
+            def get_ns(self):
+                return self.ns
+
+        sm = ScopeManager()
+        scope = sm.create_scope("root", None)
+        self.assertEqual(sm.pop_changes(), set(["root"]))
+
+        scope.add_def("name", MockDef("root.name"))
+        self.assertEqual(sm.pop_changes(), set(["root", "root.name"]))
+
+        # pointing to the same definition is not a change
+        scope.add_def("name", MockDef("root.name"))
+        self.assertEqual(sm.pop_changes(), set())
+
+        scope.add_def("name", MockDef("root.other"))
+        self.assertEqual(sm.pop_changes(), set(["root", "root.name"]))
+
+    def test_get_def_cache(self):
+        class MockDef(object):
+            def __init__(self, ns):
+                self.ns = ns
+
+            def get_ns(self):
+                return self.ns
+
+        sm = ScopeManager()
+        root = sm.create_scope("root", None)
+        chld = sm.create_scope("root.chld", root)
+        grndchld = sm.create_scope("root.chld.grndchld", chld)
+        other = sm.create_scope("root.other", root)
+
+        root.add_def("var", "root_def")
+        self.assertEqual(sm.get_def("root.chld.grndchld", "var"), "root_def")
+        self.assertEqual(sm.get_def("root.chld.grndchld", "var"), "root_def")
+        self.assertEqual(sm.get_def("root.chld.grndchld", "missing"), None)
+        self.assertEqual(sm.get_def("root.chld.grndchld", "missing"), None)
+        self.assertEqual(sm.get_def("root.other", "var"), "root_def")
+        self.assertEqual((sm.hits, sm.misses), (2, 3))
+
+        # scopes outside of the path and other names do not invalidate the lookup
+        other.add_def("var", "other_def")
+        grndchld.add_def("name", "name_def")
+        self.assertEqual(sm.get_def("root.chld.grndchld", "var"), "root_def")
+        self.assertEqual((sm.hits, sm.misses), (3, 3))
+
+        # a definition in a scope on the path hides the previous one
+        chld.add_def("var", "chld_def")
+        self.assertEqual(sm.get_def("root.chld.grndchld", "var"), "chld_def")
+        self.assertEqual(sm.get_def("root.other", "var"), "other_def")
+        self.assertEqual((sm.hits, sm.misses), (3, 5))
+
+        chld.merge_def("missing", MockDef("root.chld.missing"))
+        self.assertEqual(
+            sm.get_def("root.chld.grndchld", "missing").get_ns(), "root.chld.missing"
+        )
+
+        # lookups of missing scopes are not cached
+        self.assertEqual(sm.get_def("root.missing", "var"), None)
+        self.assertEqual((sm.hits, sm.misses), (3, 6))
@@ -0,0 +1,158 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import os
+import socket
+import threading
+import unittest
+
+import mock
+from base import TestBase
+
+from pycg.processing.base import ProcessingBase
+from pycg.server import AnalysisServer, Client, ServerError, serve
+
+
+class AnalysisServerTest(TestBase):
+    def setUp(self):
+        self.create_tmpdir()
+        self.pkg = os.path.join(self.tmpdir, "pkg")
+        self.entry_points = [
+            self.create_file("pkg/main.py", "from mod import func\nfunc()\n"),
+            self.create_file("pkg/mod.py", "def func():\n    pass\n"),
+        ]
+        self.other = self.create_file("pkg/other.py", "def unused():\n    pass\n")
+
+    def test_queries(self):
+        server = AnalysisServer(self.entry_points, self.pkg)
+        response = server.process({"command": "callees", "name": "main"})
+        self.assertEqual(response, {"status": "ok", "result": ["mod.func"]})
+        response = server.process({"command": "callers", "name": "mod.func"})
+        self.assertEqual(response, {"status": "ok", "result": ["main"]})
+        response = server.process({"command": "reachable", "name": "main"})
+        self.assertEqual(response["result"], ["mod.func"])
+        response = server.process({"command": "reaching", "name": "mod.func"})
+        self.assertEqual(response["result"], ["main"])
+        response = server.process(
+            {"command": "path", "source": "main", "target": "mod.func"}
+        )
+        self.assertEqual(response["result"], ["main", "mod.func"])
+        response = server.process(
+            {"command": "path", "source": "mod", "target": "main"}
+        )
+        self.assertEqual(response, {"status": "ok", "result": None})
+        response = server.process({"command": "graph"})
+        self.assertEqual(
+            response["result"], {"main": ["mod.func"], "mod": [], "mod.func": []}
+        )
+
+        response = server.process({"command": "callees", "name": "missing"})
+        self.assertEqual(response["status"], "error")
+        response = server.process({"command": "missing"})
+        self.assertEqual(response["status"], "error")
+        self.assertEqual(server.analyses, 1)
+
+    def test_changed(self):
+        server = AnalysisServer(self.entry_points, self.pkg)
+        server.analyze()
+
+        # a file that is not analyzed does not affect the call graph
+        self.create_file("pkg/other.py", "def unused():\n    return 1\n")
+        self.assertEqual(server.notify_changed([self.other]), [])
+        self.assertFalse(server.outdated)
+
+        self.create_file(
+            "pkg/mod.py", "def func():\n    helper()\n\ndef helper():\n    pass\n"
+        )
+        self.assertEqual(
+            server.notify_changed([self.entry_points[1]]), [self.entry_points[1]]
+        )
+        self.assertTrue(server.outdated)
+        response = server.process({"command": "callees", "name": "mod.func"})
+        self.assertEqual(response["result"], ["mod.helper"])
+        self.assertEqual(server.analyses, 2)
+
+        # a module added where an import is looked up
+        path = self.create_file("pkg/added.py", "")
+        self.assertEqual(server.notify_changed([path]), [path])
+
+    def test_changed_modules(self):
+        entry_points = self.entry_points + [
+            self.create_file("pkg/util.py", "def g():\n    pass\n"),
+            self.create_file("pkg/app.py", "from util import g\ng()\n"),
+        ]
+        server = AnalysisServer(entry_points, self.pkg)
+        server.analyze()
+
+        visited = set()
+        visit_Module = ProcessingBase.visit_Module
+
+        def record(processor, node):
+            visited.add(processor.modname)
+            return visit_Module(processor, node)
+
+        # only the module changed and those importing it are visited again
+        self.create_file("pkg/util.py", "def g():\n    h()\n\ndef h():\n    pass\n")
+        server.notify_changed([entry_points[2]])
+        with mock.patch.object(ProcessingBase, "visit_Module", record):
+            response = server.process({"command": "callees", "name": "util.g"})
+        self.assertEqual(response["result"], ["util.h"])
+        self.assertEqual(visited, set(["util", "app"]))
+        self.assertEqual(server.analyses, 2)
+
+        response = server.process({"command": "callees", "name": "main"})
+        self.assertEqual(response["result"], ["mod.func"])
+        response = server.process({"command": "callees", "name": "app"})
+        self.assertEqual(response["result"], ["util.g"])
+
+    def test_failed_analysis(self):
+        server = AnalysisServer(self.entry_points, self.pkg)
+        server.analyze()
+        self.create_file("pkg/mod.py", "def func(:\n")
+        server.notify_changed([self.entry_points[1]])
+        response = server.process({"command": "graph"})
+        self.assertEqual(response["status"], "error")
+        self.assertTrue(server.outdated)
+
+        self.create_file("pkg/mod.py", "def func():\n    pass\n")
+        response = server.process({"command": "graph"})
+        self.assertEqual(response["status"], "ok")
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+    def test_socket(self):
+        path = os.path.join(self.tmpdir, "pycg.sock")
+        ready = threading.Event()
+        thread = threading.Thread(
+            target=serve,
+            args=(path, AnalysisServer(self.entry_points, self.pkg), ready),
+        )
+        thread.start()
+        ready.wait()
+
+        with Client(path) as client:
+            self.assertIsNone(client.request("ping"))
+            self.assertEqual(client.request("callees", name="main"), ["mod.func"])
+            self.assertEqual(client.request("changed", files=[self.other]), [])
+            with self.assertRaises(ServerError):
+                client.request("callers", name="missing")
+            self.assertIsNone(client.request("shutdown"))
+
+        thread.join()
+        self.assertFalse(os.path.exists(path))
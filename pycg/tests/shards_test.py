@@ -0,0 +1,219 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import glob
+import os
+
+from base import TestBase
+
+from pycg.pycg import CallGraphGenerator
+from pycg.shards import Linker, ShardedAnalysis, analyze_shard, find_shards
+from pycg.utils.constants import CALL_GRAPH_OP
+
+IMPL = """
+class Base:
+    def base_method(self):
+        pass
+
+class Cls(Base):
+    def __init__(self):
+        pass
+
+    def method(self):
+        pass
+
+def helper():
+    pass
+
+def make():
+    return Cls()
+
+alias = helper
+"""
+
+MAIN = """
+import lib
+from lib.impl import make, Base
+from lib import helper
+
+class Sub(Base):
+    def run(self):
+        self.base_method()
+
+def main():
+    make().method()
+    helper()
+    lib.helper()
+    lib.impl.alias()
+    Sub().run()
+    lib.os.getcwd()
+"""
+
+
+class ShardsTest(TestBase):
+    def setUp(self):
+        self.root = self.create_tmpdir()
+        self.create_file("lib/__init__.py", "from .impl import helper\nimport os\n")
+        self.create_file("lib/impl.py", IMPL)
+        self.create_file("app/__init__.py", MAIN)
+        self.create_file("script.py", "import app\napp.main()\n")
+        self.create_file(".hidden/mod.py", "")
+
+    def get_full_graph(self):
+        entry_points = sorted(
+            glob.glob(os.path.join(self.root, "**", "*.py"), recursive=True)
+        )
+        cg = CallGraphGenerator(entry_points, self.root, -1, CALL_GRAPH_OP)
+        cg.analyze()
+        return cg.output()
+
+    def test_find_shards(self):
+        shards = find_shards(self.root)
+        self.assertEqual(sorted(shards), ["app", "lib", "script"])
+        self.assertEqual(
+            shards["lib"],
+            [
+                os.path.join(self.root, "lib", "__init__.py"),
+                os.path.join(self.root, "lib", "impl.py"),
+            ],
+        )
+
+    def test_summary(self):
+        result = analyze_shard(self.root, "lib", find_shards(self.root)["lib"])
+        summary = result["summary"]
+        self.assertEqual(summary["modules"], ["lib", "lib.impl"])
+        self.assertIn("lib.impl.make", summary["functions"])
+        self.assertEqual(
+            summary["classes"]["lib.impl.Cls"], ["lib.impl.Cls", "lib.impl.Base"]
+        )
+        self.assertEqual(summary["names"]["lib.helper"], ["lib.impl.helper"])
+        self.assertEqual(summary["names"]["lib.impl.alias"], ["lib.impl.helper"])
+        self.assertEqual(summary["names"]["lib.os"], ["os"])
+        self.assertEqual(summary["returns"]["lib.impl.make"], ["lib.impl.Cls"])
+
+        # the other shards are external
+        result = analyze_shard(self.root, "app", find_shards(self.root)["app"])
+        self.assertEqual(result["summary"]["modules"], ["app"])
+        self.assertIn("lib.impl.make", result["graph"]["app.main"])
+
+    def test_linker(self):
+        linker = Linker(
+            [
+                {
+                    "modules": ["lib", "lib.impl"],
+                    "functions": ["lib.impl.make", "lib.impl.Base.meth"],
+                    "classes": {
+                        "lib.impl.Cls": ["lib.impl.Cls", "lib.impl.Base", "ext.Base"],
+                        "lib.impl.Base": ["lib.impl.Base"],
+                    },
+                    "names": {
+                        "lib.make": ["lib.impl.make"],
+                        "lib.other": ["other.func"],
+                        "lib.path": ["os.path"],
+                    },
+                    "returns": {"lib.impl.make": ["lib.impl.Cls"]},
+                },
+                {
+                    "modules": ["other"],
+                    "functions": ["other.real"],
+                    "classes": {},
+                    "names": {"other.func": ["other.real"]},
+                    "returns": {},
+                },
+            ]
+        )
+        # names exported, and re-exported from other shards
+        self.assertEqual(linker.resolve("lib.make"), set(["lib.impl.make"]))
+        self.assertEqual(linker.resolve("lib.other"), set(["other.real"]))
+        # attributes of return values, through the MRO
+        self.assertEqual(linker.resolve("lib.make.meth"), set(["lib.impl.Base.meth"]))
+        self.assertEqual(linker.resolve("lib.make.ext"), set(["ext.Base.ext"]))
+        # external names
+        self.assertEqual(linker.resolve("lib.path.join"), set(["os.path.join"]))
+        self.assertEqual(linker.resolve("unknown.func"), set(["unknown.func"]))
+        # missing definitions of a shard
+        self.assertEqual(linker.resolve("lib.missing"), set())
+        self.assertEqual(linker.get_callees("lib.impl.Base"), set())
+
+    def test_linker_cycle(self):
+        linker = Linker(
+            [
+                {
+                    "modules": ["s", "t"],
+                    "functions": ["s.real"],
+                    "classes": {},
+                    "names": {"s.a": ["t.b", "s.real"], "t.b": ["s.a"]},
+                    "returns": {},
+                }
+            ]
+        )
+        self.assertEqual(linker.resolve("s.a"), set(["s.real"]))
+        # `t.b` was resolved while `s.a` was, which was cut short there
+        self.assertNotIn("t.b", linker.resolved)
+        self.assertEqual(linker.resolve("t.b"), set(["s.real"]))
+
+    def test_link(self):
+        analysis = ShardedAnalysis(self.root)
+        analysis.analyze()
+        self.assertEqual(analysis.output_incomplete(), {})
+        self.assertEqual(sorted(analysis.output_summaries()), ["app", "lib", "script"])
+
+        # the full analysis also leads to the name `lib.helper` re-exporting
+        # the function, which the summary of `lib` resolves
+        full = self.get_full_graph()
+        del full["lib.helper"]
+        full["app.main"].remove("lib.helper")
+        self.assertEqual(analysis.output(), full)
+        self.assertIn("lib.impl.Cls.method", full["app.main"])
+
+    def test_cache(self):
+        cache_dir = os.path.join(self.root, ".cache")
+        analysis = ShardedAnalysis(self.root, cache_dir=cache_dir)
+        analysis.analyze()
+        output = analysis.output()
+        self.assertFalse(any(r["cached"] for r in analysis.results))
+
+        self.create_file("script.py", "import app\n")
+        analysis = ShardedAnalysis(self.root, workers=2, cache_dir=cache_dir)
+        analysis.analyze()
+        cached = {r["shard"]: r["cached"] for r in analysis.results}
+        self.assertEqual(cached, {"app": True, "lib": True, "script": False})
+        self.assertEqual(analysis.output()["app.main"], output["app.main"])
+        self.assertEqual(analysis.output()["script"], set())
+
+        # the options changing the output are part of the key
+        self.create_file("deep.py", "import ext\next.make().attr.attr2.run()\n")
+        analysis = ShardedAnalysis(
+            self.root, cache_dir=cache_dir, max_external_depth=None
+        )
+        analysis.analyze()
+        self.assertIn("ext.make.attr.attr2.run", analysis.output()["deep"])
+        for options in [
+            {"max_external_depth": 1},
+            {"max_externals": 1},
+            {"models": False},
+        ]:
+            analysis = ShardedAnalysis(self.root, cache_dir=cache_dir, **options)
+            analysis.analyze()
+            self.assertFalse(any(r["cached"] for r in analysis.results))
+        analysis = ShardedAnalysis(self.root, cache_dir=cache_dir, max_external_depth=1)
+        analysis.analyze()
+        self.assertTrue(all(r["cached"] for r in analysis.results))
+        self.assertEqual(analysis.output()["deep"], set(["ext.make"]))
@@ -0,0 +1,130 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import os
+
+from base import TestBase
+
+from pycg.machinery.sources import SourceManager
+
+
+class SourceManagerTest(TestBase):
+    def setUp(self):
+        self.create_tmpdir()
+
+    def test_get_tree(self):
+        path = self.create_file("mod.py", "a = 1\n")
+        sm = SourceManager()
+
+        self.assertEqual(sm.get_contents(path), "a = 1\n")
+        tree = sm.get_tree(path)
+        # the same tree is returned while the file is unchanged
+        self.assertIs(sm.get_tree(path), tree)
+        self.assertEqual(sm.hits, 1)
+        self.assertEqual(sm.misses, 1)
+
+    def test_invalidation(self):
+        path = self.create_file("mod.py", "a = 1\n")
+        sm = SourceManager()
+        tree = sm.get_tree(path)
+
+        self.create_file("mod.py", "a = 1\nb = 2\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        self.assertEqual(sm.get_contents(path), "a = 1\nb = 2\n")
+        self.assertIsNot(sm.get_tree(path), tree)
+        self.assertEqual(len(sm.get_tree(path).body), 2)
+
+    def test_eviction(self):
+        paths = [self.create_file("mod%d.py" % i, "a = 1\n") for i in range(3)]
+        sm = SourceManager(max_trees=2)
+
+        trees = [sm.get_tree(path) for path in paths]
+        # the least recently used tree was evicted
+        self.assertIsNot(sm.get_tree(paths[0]), trees[0])
+        self.assertIs(sm.get_tree(paths[0]), sm.get_tree(paths[0]))
+        self.assertEqual(sm.misses, 4)
+        # a tree used again is kept over those used before it
+        sm.get_tree(paths[2])
+        sm.get_tree(paths[1])
+        self.assertEqual(list(sm.trees), [paths[2], paths[1]])
+        self.assertEqual(sm.misses, 5)
+
+        sm = SourceManager(max_trees=0)
+        self.assertIsNotNone(sm.get_tree(paths[0]))
+        self.assertIsNot(sm.get_tree(paths[0]), sm.get_tree(paths[0]))
+
+    def test_scopes(self):
+        contents = "def func():\n    pass\n\nclass Cls:\n    pass\n"
+        path = self.create_file("mod.py", contents)
+        missing = os.path.join(self.tmpdir, "missing.py")
+        sm = SourceManager()
+
+        scopes = sm.get_scopes(path)
+        self.assertEqual(
+            scopes,
+            [("", None, "module"), ("func", "", "function"), ("Cls", "", "class")],
+        )
+        self.assertIs(sm.get_scopes(path), scopes)
+        with self.assertRaises(OSError):
+            sm.get_scopes(missing)
+
+    def test_prefetch(self):
+        paths = [self.create_file("mod%d.py" % i, "a = %d\n" % i) for i in range(3)]
+        invalid = self.create_file("invalid.py", "def func(:\n")
+        missing = os.path.join(self.tmpdir, "missing.py")
+        sm = SourceManager()
+        self.assertFalse(sm.is_prefetching())
+        # without threads nothing is queued
+        sm.prefetch(paths)
+        self.assertEqual(sm.pending, {})
+
+        sm.start_prefetch(2)
+        self.assertTrue(sm.is_prefetching())
+        sm.prefetch(paths + [invalid, missing])
+        sm.prefetch(paths)
+        self.assertEqual(len(sm.pending), 5)
+        for future in list(sm.pending.values()):
+            future.result()
+
+        # the trees parsed ahead are handed over
+        self.assertEqual(sm.get_contents(paths[0]), "a = 0\n")
+        self.assertEqual(sm.get_tree(paths[1]).body[0].value.value, 1)
+        self.assertEqual(sm.hits, 1)
+        self.assertEqual(sm.prefetched, 2)
+        with self.assertRaises(SyntaxError):
+            sm.get_tree(invalid)
+        with self.assertRaises(OSError):
+            sm.get_contents(missing)
+
+        sm.stop_prefetch()
+        self.assertFalse(sm.is_prefetching())
+        self.assertEqual(sm.pending, {})
+        self.assertEqual(sm.get_contents(paths[2]), "a = 2\n")
+
+        # only the contents are read if the trees held are bounded
+        sm = SourceManager(max_trees=1)
+        sm.start_prefetch(1)
+        sm.prefetch(paths)
+        sm.pending[paths[0]].result()
+        self.assertIsNotNone(sm.get_tree(paths[0]))
+        self.assertEqual(sm.misses, 1)
+        sm.stop_prefetch()
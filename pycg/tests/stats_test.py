@@ -0,0 +1,100 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import os
+import tempfile
+
+from base import TestBase
+
+from pycg import utils
+from pycg.machinery.stats import Stats
+from pycg.pycg import CallGraphGenerator
+
+
+class StatsTest(TestBase):
+    def test_phase(self):
+        stats = Stats(lambda: {"definitions": 1})
+        with stats.phase("first", iteration=1) as record:
+            record["modules"] = 2
+        with self.assertRaises(ValueError):
+            with stats.phase("second"):
+                raise ValueError()
+
+        phases = stats.get_phases()
+        self.assertEqual([p["name"] for p in phases], ["first", "second"])
+        self.assertEqual(phases[0]["iteration"], 1)
+        self.assertEqual(phases[0]["modules"], 2)
+        self.assertEqual(phases[0]["definitions"], 1)
+        for key in ["wall_time", "cpu_time", "peak_rss"]:
+            self.assertIn(key, phases[1])
+        self.assertGreaterEqual(stats.get_total()["wall_time"], 0)
+
+    def test_module(self):
+        stats = Stats()
+        for _ in range(2):
+            with stats.module("mod", "PostProcessor"):
+                pass
+        with stats.module("mod", "PreProcessor"):
+            pass
+
+        modules = stats.get_modules()
+        self.assertEqual(list(modules.keys()), ["mod"])
+        self.assertEqual(modules["mod"]["PostProcessor"]["runs"], 2)
+        self.assertEqual(modules["mod"]["PreProcessor"]["runs"], 1)
+        self.assertIn("mod", stats.get_summary())
+
+    def test_generator(self):
+        with tempfile.TemporaryDirectory() as pkg:
+            path = os.path.join(pkg, "main.py")
+            with open(path, "w") as f:
+                f.write("def func():\n    pass\nfunc()\n")
+
+            cg = CallGraphGenerator([path], pkg, -1, utils.constants.CALL_GRAPH_OP)
+            cg.analyze()
+
+        stats = cg.get_stats()
+        names = [p["name"] for p in stats["phases"]]
+        self.assertEqual(names[0], "preprocess")
+        self.assertIn("postprocess", names)
+        self.assertEqual(names[-1], utils.constants.CALL_GRAPH_OP)
+        self.assertEqual(stats["phases"][-1]["edges"], 1)
+        self.assertEqual(stats["counters"]["iterations"], cg.iterations)
+        self.assertEqual(stats["counters"]["edges"], 1)
+        self.assertIn("PostProcessor", stats["modules"]["main"])
+
+    def test_propagation_counters(self):
+        with tempfile.TemporaryDirectory() as pkg:
+            path = os.path.join(pkg, "main.py")
+            with open(path, "w") as f:
+                f.write(
+                    "def callback():\n    pass\n"
+                    "def call(fn):\n    fn()\n"
+                    "alias = call\n"
+                    "alias(callback)\n"
+                )
+
+            cg = CallGraphGenerator([path], pkg, -1, utils.constants.CALL_GRAPH_OP)
+            cg.analyze()
+
+        # the callback reaches call through the arguments of alias
+        self.assertIn("main.callback", cg.output()["main.call"])
+        counters = cg.get_stats()["counters"]
+        self.assertGreater(counters["propagation_rounds"], 0)
+        self.assertGreater(counters["propagations"], 0)
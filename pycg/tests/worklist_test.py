@@ -0,0 +1,67 @@
+#
+# Copyright (c) 2021 Vitalis Salis.
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+from base import TestBase
+
+from pycg.machinery.worklist import Worklist
+
+
+class WorklistTest(TestBase):
+    def test_record(self):
+        wl = Worklist()
+
+        # nothing is recorded outside of a module
+        wl.record("mod1.a")
+        self.assertEqual(wl.get_readers("mod1.a"), set())
+
+        wl.start_reading("mod1")
+        wl.record("mod1.a")
+        wl.record("mod2.b")
+        wl.stop_reading()
+
+        self.assertEqual(wl.get_reads("mod1"), set(["mod1.a", "mod2.b"]))
+        self.assertEqual(wl.get_readers("mod2.b"), set(["mod1"]))
+
+        # reading a module again replaces its previous reads
+        wl.start_reading("mod1")
+        wl.record("mod1.c")
+        wl.stop_reading()
+
+        self.assertEqual(wl.get_reads("mod1"), set(["mod1.c"]))
+        self.assertEqual(wl.get_readers("mod2.b"), set())
+        self.assertEqual(wl.get_readers("mod1.c"), set(["mod1"]))
+
+    def test_mark_changed(self):
+        wl = Worklist()
+        for modname, key in [("mod1", "a"), ("mod2", "b"), ("mod3", "a")]:
+            wl.start_reading(modname)
+            wl.record(key)
+            wl.stop_reading()
+
+        self.assertTrue(wl.is_empty())
+        wl.mark_changed(set(["a", "c"]))
+        self.assertFalse(wl.is_empty())
+
+        # pending modules are returned in the order provided
+        self.assertEqual(wl.pop(["mod3", "mod2", "mod1"]), ["mod3", "mod1"])
+        self.assertTrue(wl.is_empty())
+
+        wl.add("mod2")
+        self.assertEqual(wl.pop(["mod1", "mod2"]), ["mod2"])
@@ -40,3 +40,6 @@ INVALID_NAME = "<**INVALID**>"
 
 CALL_GRAPH_OP = "call-graph"
 KEY_ERR_OP = "key-error"
+
+# attributes accessed on external definitions that are given definitions
+MAX_EXTERNAL_DEPTH = 4
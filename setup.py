@@ -41,6 +41,7 @@ def setup_package():
         url="https://github.com/vitsalis/pycg",
         license="Apache Software License",
         packages=find_packages(),
+        package_data={"pycg": ["models/*.json"]},
         install_requires=[],
         python_requires=">=3.4",
         entry_points={